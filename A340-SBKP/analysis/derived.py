@@ -0,0 +1,116 @@
+"""
+A registry of named derived quantities such as curve fits and the observer position.
+
+Each quantity is computed once and cached. It is recomputed if any of its inputs have changed or any of
+the quantities it depends on have been recomputed. Hit and miss counts are kept for each quantity.
+"""
+import collections
+import typing
+
+
+class DerivedStats(collections.namedtuple('DerivedStats', 'hits, misses')):
+    """Number of times a derived quantity was taken from the cache and computed."""
+    __slots__ = ()
+
+
+class _Derived(collections.namedtuple('_Derived', 'function, depends, inputs')):
+    __slots__ = ()
+
+
+class _Cached(collections.namedtuple('_Cached', 'value, key')):
+    __slots__ = ()
+
+
+class Registry:
+    """
+    Registry of named derived quantities.
+
+    Each quantity is computed by calling its function with no arguments, the function can get other
+    quantities from the registry. These must be declared as dependencies so that when they are recomputed
+    this quantity is recomputed as well. Inputs are callables that return a value, such as a constant in
+    plot_constants, that is compared with == on each get() and if any differ the quantity is recomputed.
+    """
+    def __init__(self):
+        self._derived: typing.Dict[str, _Derived] = {}
+        self._cache: typing.Dict[str, _Cached] = {}
+        self._versions: typing.Dict[str, int] = {}
+        self._hits: typing.Dict[str, int] = {}
+        self._misses: typing.Dict[str, int] = {}
+
+    def register(self,
+                 name: str,
+                 function: typing.Callable[[], typing.Any],
+                 depends: typing.Sequence[str] = (),
+                 inputs: typing.Sequence[typing.Callable[[], typing.Any]] = ()) -> None:
+        """Registers a derived quantity. Dependencies must already be registered, so there can not be cycles."""
+        if name in self._derived:
+            raise ValueError('Derived quantity "{}" is already registered'.format(name))
+        for dependency in depends:
+            if dependency not in self._derived:
+                raise ValueError('Derived quantity "{}" depends on unregistered "{}"'.format(name, dependency))
+        self._derived[name] = _Derived(function, tuple(depends), tuple(inputs))
+        self._versions[name] = 0
+        self._hits[name] = 0
+        self._misses[name] = 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._derived
+
+    def _key(self, name: str) -> typing.Tuple[tuple, tuple]:
+        """The current input values and dependency versions, dependencies are brought up to date first."""
+        derived = self._derived[name]
+        for dependency in derived.depends:
+            self._update(dependency, count=False)
+        return (
+            tuple(fn() for fn in derived.inputs),
+            tuple(self._versions[dependency] for dependency in derived.depends),
+        )
+
+    def _update(self, name: str, count: bool = True) -> typing.Any:
+        """Returns the value of the quantity, computing it if necessary.
+        If count then the hit/miss counts are updated, a computation is always counted as a miss."""
+        key = self._key(name)
+        cached = self._cache.get(name)
+        if cached is not None and cached.key == key:
+            if count:
+                self._hits[name] += 1
+            return cached.value
+        self._misses[name] += 1
+        value = self._derived[name].function()
+        self._versions[name] += 1
+        self._cache[name] = _Cached(value, key)
+        return value
+
+    def get(self, name: str) -> typing.Any:
+        """Returns the value of the named quantity, this raises a KeyError if it is not registered."""
+        if name not in self._derived:
+            raise KeyError('Derived quantity "{}" is not registered'.format(name))
+        return self._update(name)
+
+    def invalidate(self, name: str = None) -> None:
+        """Discards the cached value of the named quantity, or all of them if name is None.
+        Anything that depends on it will be recomputed on its next get()."""
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name, None)
+
+    def stats(self) -> typing.Dict[str, DerivedStats]:
+        """Returns the hit and miss counts of each quantity."""
+        return {name: DerivedStats(self._hits[name], self._misses[name]) for name in self._derived}
+
+    def reset_stats(self) -> None:
+        for name in self._derived:
+            self._hits[name] = 0
+            self._misses[name] = 0
+
+    def stats_lines(self) -> typing.List[str]:
+        """Returns the hit and miss counts as a list of strings for printing."""
+        ret = ['{:32s} {:>8s} {:>8s}'.format('Derived quantity', 'Hits', 'Misses')]
+        for name, stats in self.stats().items():
+            ret.append('{:32s} {:8d} {:8d}'.format(name, stats.hits, stats.misses))
+        return ret
+
+
+#: The registry used for a plot.main() run.
+REGISTRY = Registry()
@@ -0,0 +1,101 @@
+"""
+Reduces dense series to about a target number of points before plotting while keeping the visual result.
+
+This uses min/max decimation: the series is divided into buckets of consecutive samples and the samples with
+the minimum and maximum value in each bucket are kept, so peaks and troughs are not lost. The first and last
+samples, both sides of every NaN gap and the samples around any special times are always kept.
+"""
+import typing
+
+import numpy as np
+
+from analysis import video_data
+
+#: Times that are always kept when downsampling.
+PRESERVED_TIMES = (
+    video_data.TIME_VIDEO_NOSEWHEEL_OFF.time,
+    video_data.TIME_VIDEO_MAINWHEEL_OFF.time,
+    video_data.TIME_VIDEO_END_ASPHALT.time,
+)
+
+
+def min_max_indices(values: np.ndarray, target: int) -> np.ndarray:
+    """
+    Returns the sorted indices of values to keep for min/max decimation to about target points.
+    values is a (n,) or (n, k) array, for k columns the minimum and maximum of each column is kept so the result
+    has up to about target points whatever k is.
+    The first and last indices and the indices either side of a change between NaN and non-NaN in any column are
+    included so that NaN gaps are preserved exactly.
+    If values has no columns only the first and last indices are returned.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    count = len(values)
+    if count <= target:
+        return np.arange(count)
+    # Contiguous (columns, count) so each bucket is a contiguous run for argmin()/argmax().
+    values = np.ascontiguousarray(values.reshape(count, -1).T)
+    columns = len(values)
+    if columns == 0:
+        return np.array([0, count - 1])
+    buckets = max(1, target // (2 * columns))
+    size = count // buckets
+    tail_start = (buckets - 1) * size
+    missing = ~np.isfinite(values)
+    has_missing = missing.any()
+    # Whole buckets are a (columns, buckets, size) view, the few remaining samples are added to the last bucket.
+    whole = values[:, :buckets * size].reshape(columns, buckets, size)
+    tail = values[:, tail_start:]
+    if has_missing:
+        finite = ~missing[:, :buckets * size].reshape(columns, buckets, size)
+        minimum = np.argmin(np.where(finite, whole, np.inf), axis=2)
+        maximum = np.argmax(np.where(finite, whole, -np.inf), axis=2)
+        finite = ~missing[:, tail_start:]
+        tail_minimum = np.argmin(np.where(finite, tail, np.inf), axis=1)
+        tail_maximum = np.argmax(np.where(finite, tail, -np.inf), axis=1)
+    else:
+        minimum = np.argmin(whole, axis=2)
+        maximum = np.argmax(whole, axis=2)
+        tail_minimum = np.argmin(tail, axis=1)
+        tail_maximum = np.argmax(tail, axis=1)
+    starts = np.arange(buckets) * size
+    pieces = [
+        (starts + minimum).ravel(),
+        (starts + maximum).ravel(),
+        tail_start + tail_minimum,
+        tail_start + tail_maximum,
+        np.array([0, count - 1]),
+    ]
+    if has_missing:
+        change = np.flatnonzero(np.any(missing[:, 1:] != missing[:, :-1], axis=0))
+        pieces.extend((change, change + 1))
+    return np.unique(np.concatenate(pieces))
+
+
+def time_indices(t: np.ndarray, times: typing.Iterable[float]) -> np.ndarray:
+    """Returns the sorted indices of the increasing array t at and either side of each of times that is within
+    the range of t, so a line through the kept points is the same as the original at those times."""
+    t = np.asarray(t, dtype=np.float64)
+    times = np.asarray(list(times), dtype=np.float64)
+    times = times[(times >= t[0]) & (times <= t[-1])] if len(t) else times[:0]
+    index = np.searchsorted(t, times)
+    indices = np.concatenate((index - 1, index, index + 1))
+    return np.unique(indices[(indices >= 0) & (indices < len(t))])
+
+
+def downsample(array: np.ndarray,
+               target: int,
+               preserved_times: typing.Iterable[float] = PRESERVED_TIMES) -> np.ndarray:
+    """
+    Returns the rows of the 2D array whose column 0 is increasing time to keep for about target points with
+    min/max decimation of the other columns. Rows around the preserved_times are kept.
+    If the array has no more than target rows it is returned unchanged.
+    """
+    if array.ndim != 2:
+        raise ValueError('Array must be 2D not shape: {}'.format(array.shape))
+    if len(array) <= target:
+        return array
+    indices = np.union1d(
+        min_max_indices(array[:, 1:], target),
+        time_indices(array[:, 0], preserved_times),
+    )
+    return array[indices]
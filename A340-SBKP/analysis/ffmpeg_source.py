@@ -0,0 +1,208 @@
+"""
+Streams frames of a video directly from ffmpeg as numpy arrays without writing image files.
+
+ffmpeg is run with raw video output to a pipe and a background thread reads frames ahead into a bounded
+queue. Frames are numbered the same as the images ffmpeg writes when dumping every frame, see the comparison
+table in video_data: image n is video frame n - video_data.FFMPEG_FRAME_OFFSET and images start at 1, so the
+first frame from the pipe is a duplicate of video frame 0 and is discarded.
+
+This requires the ffmpeg and ffprobe executables.
+"""
+import collections
+import queue
+import subprocess
+import threading
+import typing
+
+import numpy as np
+
+from analysis import video_data
+
+FFMPEG = 'ffmpeg'
+FFPROBE = 'ffprobe'
+#: Raw pixel formats and the number of channels of each.
+PIXEL_FORMATS = {
+    'rgb24': 3,
+    'gray': 1,
+}
+#: Maximum number of frames read ahead by the background thread.
+READ_AHEAD = 8
+#: Video frame number of the first frame from the pipe when ffmpeg is not seeking, ffmpeg image 1.
+FIRST_PIPE_VIDEO_FRAME = 1 - video_data.FFMPEG_FRAME_OFFSET
+
+
+class Frame(collections.namedtuple('Frame', 'video_frame, image')):
+    """A video frame number and the (height, width, channels) uint8 array of the image."""
+    __slots__ = ()
+
+    @property
+    def video_time(self) -> video_data.VideoTime:
+        return video_data.video_frame_to_time(self.video_frame)
+
+
+def video_size(path: str, ffprobe: str = FFPROBE) -> typing.Tuple[int, int]:
+    """Returns the (width, height) of the first video stream in the file using ffprobe."""
+    output = subprocess.run(
+        [
+            ffprobe, '-v', 'error', '-select_streams', 'v:0',
+            '-show_entries', 'stream=width,height', '-of', 'csv=p=0', path,
+        ],
+        check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+    ).stdout
+    width, height = output.strip().split(',')[:2]
+    return int(width), int(height)
+
+
+def ffmpeg_command(path: str,
+                   pixel_format: str = 'rgb24',
+                   seek_time: float = None,
+                   ffmpeg: str = FFMPEG) -> typing.List[str]:
+    """Returns the ffmpeg command that writes the raw frames of the video to stdout.
+    If seek_time is given ffmpeg seeks to that time, in seconds, before decoding."""
+    if pixel_format not in PIXEL_FORMATS:
+        raise ValueError('Pixel format must be one of {} not "{}"'.format(sorted(PIXEL_FORMATS), pixel_format))
+    command = [ffmpeg, '-nostdin', '-loglevel', 'error']
+    if seek_time is not None:
+        command.extend(['-ss', '{:.6f}'.format(seek_time)])
+    command.extend(
+        [
+            '-i', path,
+            # Constant frame rate as when writing images so the frames are the same.
+            '-vsync', 'cfr',
+            '-f', 'rawvideo', '-pix_fmt', pixel_format, '-',
+        ]
+    )
+    return command
+
+
+def read_frames(stream: typing.BinaryIO,
+                shape: typing.Tuple[int, int, int],
+                read_ahead: int = READ_AHEAD) -> typing.Iterator[np.ndarray]:
+    """
+    Yields (height, width, channels) uint8 arrays read from a binary stream of raw frames.
+    A background thread reads up to read_ahead frames ahead. The arrays are read only.
+    A ValueError is raised if the stream ends part way through a frame.
+    Closing the generator stops the thread once it is no longer blocked reading the stream.
+    """
+    frame_size = int(np.prod(shape))
+    frames = queue.Queue(maxsize=read_ahead)
+    stop = threading.Event()
+
+    def reader() -> None:
+        try:
+            while not stop.is_set():
+                data = stream.read(frame_size)
+                if len(data) < frame_size:
+                    if data:
+                        raise ValueError('Incomplete frame of {:d} bytes not {:d}'.format(len(data), frame_size))
+                    break
+                frame = np.frombuffer(data, dtype=np.uint8).reshape(shape)
+                while not stop.is_set():
+                    try:
+                        frames.put(frame, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+            frames.put(None)
+        except Exception as err:
+            frames.put(err)
+
+    thread = threading.Thread(target=reader, name='read_frames', daemon=True)
+    thread.start()
+    try:
+        while True:
+            frame = frames.get()
+            if frame is None:
+                break
+            if isinstance(frame, Exception):
+                raise frame
+            yield frame
+    finally:
+        stop.set()
+        # Unblock the reader if it is waiting to put.
+        while thread.is_alive():
+            try:
+                frames.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def _read_all(stream: typing.BinaryIO, chunks: typing.List[bytes]) -> None:
+    """Reads the stream until it is closed appending the data to chunks."""
+    while True:
+        data = stream.read(1 << 16)
+        if not data:
+            break
+        chunks.append(data)
+
+
+def _video_frame(frame: typing.Union[int, video_data.VideoTime]) -> int:
+    if isinstance(frame, video_data.VideoTime):
+        return video_data.video_time_to_video_frame(frame)
+    return frame
+
+
+def iter_frames(path: str,
+                start: typing.Union[int, video_data.VideoTime] = 0,
+                stop: typing.Union[int, video_data.VideoTime] = None,
+                pixel_format: str = 'rgb24',
+                exact: bool = True,
+                read_ahead: int = READ_AHEAD,
+                size: typing.Tuple[int, int] = None,
+                ffmpeg: str = FFMPEG,
+                ffprobe: str = FFPROBE) -> typing.Iterator[Frame]:
+    """
+    Yields each Frame of the video from the start video frame number or time up to but not including stop.
+
+    If exact is True frames before start are decoded and discarded so the frame numbering always matches the
+    images that ffmpeg writes. Otherwise ffmpeg seeks to the time of the start frame, which is faster for a
+    start well into the video but relies on ffmpeg seeking to that exact frame.
+
+    size is the (width, height) of the video, if None it is found with ffprobe.
+    A subprocess.CalledProcessError is raised if ffmpeg fails.
+    """
+    start = _video_frame(start)
+    if stop is not None:
+        stop = _video_frame(stop)
+    if start < 0:
+        raise ValueError('Start frame must be >= 0 not {:d}'.format(start))
+    if size is None:
+        size = video_size(path, ffprobe)
+    if exact or start == 0:
+        seek_time = None
+        video_frame = FIRST_PIPE_VIDEO_FRAME
+    else:
+        seek_time = start / video_data.FRAMES_PER_SECOND
+        video_frame = start
+    command = ffmpeg_command(path, pixel_format, seek_time, ffmpeg)
+    width, height = size
+    shape = (height, width, PIXEL_FORMATS[pixel_format])
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # stderr is read on its own thread otherwise ffmpeg could block writing to it while we wait on stdout.
+    stderr_chunks = []
+    stderr_thread = threading.Thread(
+        target=_read_all, args=(process.stderr, stderr_chunks), name='ffmpeg_stderr', daemon=True
+    )
+    stderr_thread.start()
+    frames = read_frames(process.stdout, shape, read_ahead)
+    finished = False
+    try:
+        for image in frames:
+            if stop is not None and video_frame >= stop:
+                break
+            if video_frame >= start:
+                yield Frame(video_frame, image)
+            video_frame += 1
+        else:
+            finished = True
+    finally:
+        if not finished:
+            process.kill()
+        frames.close()
+        process.stdout.close()
+        returncode = process.wait()
+        stderr_thread.join()
+        process.stderr.close()
+        stderr = b''.join(stderr_chunks)
+    if finished and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command, stderr=stderr)
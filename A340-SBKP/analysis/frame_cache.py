@@ -0,0 +1,198 @@
+"""
+A bounded least recently used cache of decoded frames in front of any frame source.
+
+The source is a callable that takes a video frame number and returns the image as a numpy array, for example
+png_loader() or store_loader(). The cache is bounded by the total bytes of the frames it holds. When frames are
+requested sequentially the following frames are loaded ahead on a worker thread.
+"""
+import collections
+import os
+import queue
+import threading
+import typing
+
+import numpy as np
+
+from analysis import frame_store
+from analysis import video_data
+
+#: Default maximum total size of the cached frames.
+FRAME_CACHE_MAX_BYTES = 1 << 30
+#: Number of frames loaded ahead when access is sequential.
+PREFETCH_FRAMES = 8
+#: Number of consecutive frame numbers requested before access is regarded as sequential.
+SEQUENTIAL_RUN = 3
+
+
+class FrameCacheStats(collections.namedtuple('FrameCacheStats', 'hits, misses, evictions, prefetches, frames, bytes')):
+    """Counts of requests found in the cache, requests loaded by the caller, frames evicted and frames loaded
+    ahead by the worker thread. Also the number of frames and bytes currently cached."""
+    __slots__ = ()
+
+
+def png_loader(directory: str, mode: str = 'RGB') -> typing.Callable[[int], np.ndarray]:
+    """Returns a frame source that reads the ffmpeg image of the video frame number from the directory."""
+    def load(video_frame: int) -> np.ndarray:
+        name = 'image{:06d}.png'.format(video_frame + video_data.FFMPEG_FRAME_OFFSET)
+        return frame_store.read_frame(os.path.join(directory, name), mode)
+    return load
+
+
+def store_loader(store: frame_store.FrameStore) -> typing.Callable[[int], np.ndarray]:
+    """Returns a frame source that copies the video frame number out of the frame store into memory."""
+    def load(video_frame: int) -> np.ndarray:
+        return np.array(store.frames[store.index(video_frame)])
+    return load
+
+
+class FrameCache:
+    """
+    LRU cache of frames from the load callable bounded by max_bytes.
+    Frames larger than max_bytes are returned but not cached.
+
+    If SEQUENTIAL_RUN consecutive frame numbers have been requested the next prefetch frames are loaded by a
+    worker thread. A request for a frame that is being loaded ahead waits for it. Errors when loading ahead are
+    ignored, the frame is loaded again when it is requested so the error is raised then.
+
+    Cached frames are read only. Call close() when finished to stop the worker thread, the cache is also a
+    context manager that does this.
+    """
+    def __init__(self,
+                 load: typing.Callable[[int], np.ndarray],
+                 max_bytes: int = FRAME_CACHE_MAX_BYTES,
+                 prefetch: int = PREFETCH_FRAMES,
+                 sequential_run: int = SEQUENTIAL_RUN):
+        self.load = load
+        self.max_bytes = max_bytes
+        self.prefetch = prefetch
+        self.sequential_run = sequential_run
+        self._frames: typing.OrderedDict[int, np.ndarray] = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Frames being loaded ahead and the events set when done.
+        self._loading: typing.Dict[int, threading.Event] = {}
+        self._queue: queue.Queue = queue.Queue()
+        self._worker: typing.Optional[threading.Thread] = None
+        self._previous = None
+        self._run = 0
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._prefetches = 0
+
+    def stats(self) -> FrameCacheStats:
+        with self._lock:
+            return FrameCacheStats(
+                self._hits, self._misses, self._evictions, self._prefetches, len(self._frames), self._bytes
+            )
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __contains__(self, video_frame: int) -> bool:
+        return video_frame in self._frames
+
+    def _insert(self, video_frame: int, frame: np.ndarray) -> None:
+        """Adds the frame, evicting the least recently used frames as needed. Call with the lock held."""
+        if video_frame in self._frames or frame.nbytes > self.max_bytes:
+            return
+        frame.setflags(write=False)
+        self._frames[video_frame] = frame
+        self._bytes += frame.nbytes
+        while self._bytes > self.max_bytes:
+            _video_frame, evicted = self._frames.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self._evictions += 1
+
+    def _update_run(self, video_frame: int) -> typing.List[int]:
+        """Records the request and returns the frame numbers to load ahead. Call with the lock held."""
+        if self._previous is not None and video_frame == self._previous + 1:
+            self._run += 1
+        else:
+            self._run = 1
+        self._previous = video_frame
+        result = []
+        if self.prefetch > 0 and self._run >= self.sequential_run:
+            for ahead in range(video_frame + 1, video_frame + 1 + self.prefetch):
+                if ahead not in self._frames and ahead not in self._loading:
+                    self._loading[ahead] = threading.Event()
+                    result.append(ahead)
+        return result
+
+    def _work(self) -> None:
+        while True:
+            video_frame = self._queue.get()
+            if video_frame is None:
+                break
+            try:
+                frame = self.load(video_frame)
+            except Exception:
+                frame = None
+            with self._lock:
+                if frame is not None:
+                    self._insert(video_frame, frame)
+                    self._prefetches += 1
+                self._loading.pop(video_frame).set()
+
+    def _start_prefetch(self, video_frames: typing.List[int]) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._work, name='FrameCache', daemon=True)
+            self._worker.start()
+        for video_frame in video_frames:
+            self._queue.put(video_frame)
+
+    def get(self, video_frame: int) -> np.ndarray:
+        """Returns the frame for the video frame number from the cache or the source."""
+        with self._lock:
+            ahead = self._update_run(video_frame)
+            frame = self._frames.get(video_frame)
+            loading = self._loading.get(video_frame)
+            if frame is not None:
+                self._frames.move_to_end(video_frame)
+                self._hits += 1
+        if ahead:
+            self._start_prefetch(ahead)
+        if frame is not None:
+            return frame
+        if loading is not None:
+            loading.wait()
+            with self._lock:
+                frame = self._frames.get(video_frame)
+                if frame is not None:
+                    self._frames.move_to_end(video_frame)
+                    self._hits += 1
+                    return frame
+        frame = self.load(video_frame)
+        with self._lock:
+            self._misses += 1
+            self._insert(video_frame, frame)
+        return frame
+
+    def __getitem__(self, video_frame: int) -> np.ndarray:
+        return self.get(video_frame)
+
+    def frame(self, vt: video_data.VideoTime) -> np.ndarray:
+        """Returns the frame at the video time."""
+        return self.get(video_data.video_time_to_video_frame(vt))
+
+    def clear(self) -> None:
+        """Discards all the cached frames, the statistics are unchanged."""
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+    def close(self) -> None:
+        """Stops the worker thread after it has finished the frames it is loading ahead."""
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+
+    def __enter__(self) -> 'FrameCache':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
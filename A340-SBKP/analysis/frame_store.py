@@ -0,0 +1,151 @@
+"""
+Converts a directory of frames extracted by ffmpeg into a single memory-mapped array so that any frame can be
+read without decoding an image file.
+
+ffmpeg writes image000001.png, image000002.png etc., image number n is video frame n - 2, see
+video_data.FFMPEG_FRAME_OFFSET. Images before video frame 0 are duplicates of it and are not stored.
+
+A frame store is a directory containing:
+
+* FRAME_STORE_ARRAY: a .npy file of a (frames, height, width, channels) uint8 array that is opened with
+  numpy.load(mmap_mode='r').
+* FRAME_STORE_INDEX: a JSON sidecar of the video frame number of each frame in the array.
+
+Decoding the images requires Pillow.
+"""
+import concurrent.futures
+import itertools
+import json
+import os
+import re
+import typing
+
+import numpy as np
+
+from analysis import video_data
+
+FRAME_STORE_ARRAY = 'frames.npy'
+FRAME_STORE_INDEX = 'index.json'
+RE_FFMPEG_NAME = re.compile(r'^image(\d{6})\.png$')
+
+
+def ffmpeg_frame_paths(directory: str) -> typing.List[typing.Tuple[int, str]]:
+    """
+    Returns a list of (video_frame, path) of the ffmpeg images in the directory ordered by video frame.
+    Images before video frame 0 are excluded.
+    """
+    result = []
+    for name in os.listdir(directory):
+        m = RE_FFMPEG_NAME.match(name)
+        if m is not None:
+            video_frame = int(m.group(1)) - video_data.FFMPEG_FRAME_OFFSET
+            if video_frame >= 0:
+                result.append((video_frame, os.path.join(directory, name)))
+    result.sort()
+    return result
+
+
+def read_frame(path: str, mode: str = 'RGB') -> np.ndarray:
+    """Returns the image as a (height, width, channels) array of uint8 in the Pillow mode such as 'RGB' or 'L'.
+    This requires Pillow."""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        array = np.asarray(image.convert(mode), dtype=np.uint8)
+    if array.ndim == 2:
+        array = array[:, :, np.newaxis]
+    return array
+
+
+def build_frame_store(frames_directory: str,
+                      store_directory: str,
+                      mode: str = 'RGB',
+                      max_workers: int = None) -> 'FrameStore':
+    """
+    Decodes all the ffmpeg images in frames_directory, in parallel, into a frame store in store_directory and
+    returns it opened. All images must be the same size.
+    The index is written last so an interrupted build is not mistaken for a complete store.
+    """
+    paths = ffmpeg_frame_paths(frames_directory)
+    if not paths:
+        raise ValueError('No ffmpeg images in "{}"'.format(frames_directory))
+    os.makedirs(store_directory, exist_ok=True)
+    index_path = os.path.join(store_directory, FRAME_STORE_INDEX)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    first = read_frame(paths[0][1], mode)
+    frames = np.lib.format.open_memmap(
+        os.path.join(store_directory, FRAME_STORE_ARRAY),
+        mode='w+',
+        dtype=np.uint8,
+        shape=(len(paths),) + first.shape,
+    )
+
+    def decode(store: np.memmap, i: int) -> None:
+        array = read_frame(paths[i][1], mode)
+        if array.shape != first.shape:
+            raise ValueError(
+                'Image "{}" has shape {} not {}'.format(paths[i][1], array.shape, first.shape)
+            )
+        store[i] = array
+
+    frames[0] = first
+    # Pillow releases the GIL when decoding so threads decode in parallel.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in executor.map(decode, itertools.repeat(frames), range(1, len(paths))):
+            pass
+    frames.flush()
+    del frames
+    with open(index_path, 'w') as fout:
+        json.dump(
+            {
+                'source': os.path.abspath(frames_directory),
+                'mode': mode,
+                'video_frames': [video_frame for video_frame, _path in paths],
+            },
+            fout,
+        )
+    return FrameStore(store_directory)
+
+
+class FrameStore:
+    """
+    Read only access to a frame store created by build_frame_store().
+    Frames are views of the memory-mapped array so access is O(1) and does not copy.
+    """
+    def __init__(self, store_directory: str):
+        with open(os.path.join(store_directory, FRAME_STORE_INDEX)) as fin:
+            index = json.load(fin)
+        self.source: str = index['source']
+        self.mode: str = index['mode']
+        self.frames: np.ndarray = np.load(os.path.join(store_directory, FRAME_STORE_ARRAY), mmap_mode='r')
+        self.video_frames = np.array(index['video_frames'], dtype=np.int64)
+        if len(self.video_frames) != len(self.frames):
+            raise ValueError(
+                'Index has {:d} frames but the array has {:d}'.format(len(self.video_frames), len(self.frames))
+            )
+        self._index_of_video_frame = {video_frame: i for i, video_frame in enumerate(index['video_frames'])}
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        """Returns the (height, width, channels) array at position i in the store."""
+        return self.frames[i]
+
+    def index(self, video_frame: int) -> int:
+        """Returns the position in the store of the video frame number.
+        A KeyError is raised if it is not there."""
+        return self._index_of_video_frame[video_frame]
+
+    def video_time(self, i: int) -> video_data.VideoTime:
+        """Returns the video time of the frame at position i in the store."""
+        return video_data.video_frame_to_time(int(self.video_frames[i]))
+
+    def frame(self, vt: video_data.VideoTime) -> np.ndarray:
+        """Returns the frame at the video time, a KeyError is raised if it is not in the store."""
+        return self.frames[self.index(video_data.video_time_to_video_frame(vt))]
+
+    def ffmpeg_name(self, i: int) -> str:
+        """Returns the ffmpeg image name of the frame at position i in the store."""
+        return 'image{:06d}.png'.format(int(self.video_frames[i]) + video_data.FFMPEG_FRAME_OFFSET)
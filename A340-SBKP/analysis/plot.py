@@ -5,6 +5,7 @@ import shutil
 import sys
 
 from analysis import plot_acceleration, plot_angle_of_view, video_data
+from analysis import derived
 from analysis import plot_aspect
 from analysis import plot_common
 from analysis import plot_constants
@@ -19,7 +20,7 @@ from analysis import plot_yaw
 
 
 def main():
-    if shutil.which('gnuplot') is None:
+    if plot_constants.PLOT_RENDERER == 'gnuplot' and shutil.which('gnuplot') is None:
         print('ERROR: gnuplot is not installed or not on the PATH')
         return -1
 
@@ -132,6 +133,7 @@ def main():
         print('</center>')
         print()
 
+    print('\n'.join(derived.REGISTRY.stats_lines()))
     print('Bye, bye!')
     return 0
 
@@ -12,14 +12,8 @@ from analysis import video_utils
 
 def gnuplot_acceleration(stream: typing.TextIO=sys.stdout) -> typing.List[str]:
     timebase = video_analysis.ground_speed_timebase()
-    accl_arrays_smoothed = []
-    for err in video_data.ErrorDirection:
-        fit = plot_common.get_gs_fit(err)
-        accl_arrays_smoothed.append(
-            np.array(
-                [(t, video_analysis.ground_speed_differential(t, fit)) for t in timebase]
-            )
-        )
+    accelerations = plot_common.get_trajectory().acceleration[:, plot_common.get_trajectory().index(timebase)]
+    accl_arrays_smoothed = [np.column_stack((timebase, accelerations[i])) for i in range(len(accelerations))]
     result = [
         '# "{}"'.format('Acceleration (m/s**2.')
     ]
@@ -1,3 +1,4 @@
+import io
 import itertools
 import os
 import subprocess
@@ -6,17 +7,27 @@ import typing
 
 import numpy as np
 
+from analysis import derived
+from analysis import downsample
 from analysis import plot_constants, video_data, video_utils, video_analysis
+from analysis import svg_chart
+from analysis import trajectory
 from analysis import video_analysis
 
 
 def gnuplot_write_arrays(stream: typing.TextIO=sys.stdout,
-                         *args: np.ndarray) -> None:
+                         *args: np.ndarray,
+                         max_points: int = None) -> None:
     # Requires arg[:, 0] to be ordered.
+    # Each array with more than max_points rows, default plot_constants.PLOT_MAX_POINTS, is downsampled.
+    if max_points is None:
+        max_points = plot_constants.PLOT_MAX_POINTS
     times = set()
     for arg in args:
         if arg.ndim != 2:
             raise ValueError('Arrays must be 2D not shape: {}'.format(arg.shape))
+    args = [downsample.downsample(arg, max_points) for arg in args]
+    for arg in args:
         times |= set(arg[:,0])
     timebase = sorted(times)
     indices = [0,] * len(args)
@@ -39,28 +50,29 @@ def gnuplot_write_arrays(stream: typing.TextIO=sys.stdout,
         stream.write('\n')
 
 
-__GROUND_SPEED_FITS: typing.Dict[video_data.ErrorDirection, typing.List[float]] = {}
+def _gs_fits() -> typing.List[typing.List[float]]:
+    return [
+        video_analysis.ground_speed_curve_fit_with_offset(offset) for offset in plot_constants.GROUND_SPEED_OFFSETS
+    ]
+
+
+derived.REGISTRY.register('gs_fits', _gs_fits, inputs=(lambda: plot_constants.GROUND_SPEED_OFFSETS,))
 
 
 def get_gs_fit(err: video_data.ErrorDirection) -> typing.List[float]:
-    if err not in __GROUND_SPEED_FITS:
-        if err == video_data.ErrorDirection.MIN:
-            __GROUND_SPEED_FITS[err] = video_analysis.ground_speed_curve_fit_with_offset(
-                plot_constants.GROUND_SPEED_OFFSETS[0]
-            )
-        elif err == video_data.ErrorDirection.MID:
-            __GROUND_SPEED_FITS[err] = video_analysis.ground_speed_curve_fit_with_offset(
-                plot_constants.GROUND_SPEED_OFFSETS[1]
-            )
-        elif err == video_data.ErrorDirection.MAX:
-            __GROUND_SPEED_FITS[err] = video_analysis.ground_speed_curve_fit_with_offset(
-                plot_constants.GROUND_SPEED_OFFSETS[2]
-            )
-        else:
-            assert 0
-    return __GROUND_SPEED_FITS[err]
+    """The ground speed fit with the offset plot_constants.GROUND_SPEED_OFFSETS for the error direction."""
+    return derived.REGISTRY.get('gs_fits')[err.value + 1]
+
+
+derived.REGISTRY.register(
+    'gs_curve_fit_mid', lambda: video_analysis.ground_speed_curve_fit(video_data.ErrorDirection.MID)
+)
 
 
+def get_gs_curve_fit_mid() -> typing.List[float]:
+    """The same as video_analysis.ground_speed_curve_fit(video_data.ErrorDirection.MID) but computed once."""
+    return derived.REGISTRY.get('gs_curve_fit_mid')
+
 
 def plot_file(name: str) -> str:
     if name == '':
@@ -75,10 +87,17 @@ def write_dat_plt_call(name: str, fn_dat: typing.Callable, fn_plt: typing.Callab
     a list of strings, if non-empty then they are written into the plt file as {computed_data}.
     fn_plot is a function that return the 'name.plt' string ready to insert the 'name.dat'
     into the format variable 'file_name'.
+    The SVG is created by plot_constants.PLOT_RENDERER.
     """
     print('Writing "{}"'.format(name))
+    if plot_constants.PLOT_RENDERER not in plot_constants.PLOT_RENDERERS:
+        raise ValueError(
+            'Unknown renderer "{}" not in {}'.format(plot_constants.PLOT_RENDERER, plot_constants.PLOT_RENDERERS)
+        )
+    data_stream = io.StringIO()
+    computed_data_strings = fn_dat(data_stream)
     with open(plot_file('{}.dat'.format(name)), 'w') as outfile:
-        computed_data_strings = fn_dat(outfile)
+        outfile.write(data_stream.getvalue())
     if len(computed_data_strings):
         plot_data = fn_plt().format(
             file_name=name, computed_data='\n'.join(computed_data_strings)
@@ -88,6 +107,14 @@ def write_dat_plt_call(name: str, fn_dat: typing.Callable, fn_plt: typing.Callab
     plt_file_path = plot_file('{}.plt'.format(name))
     with open(plt_file_path, 'w') as outfile:
         outfile.write(plot_data)
+    if plot_constants.PLOT_RENDERER == 'native':
+        # Use the data in memory rather than reading the .dat file.
+        output, svg = svg_chart.render_gnuplot(
+            plot_data, {'{}.dat'.format(name): svg_chart.load_data(data_stream.getvalue())}
+        )
+        with open(plot_file(output or '{}.svg'.format(name)), 'w') as outfile:
+            outfile.write(svg)
+        return
     proc = subprocess.Popen(
         args=['gnuplot', '-p', os.path.basename(plt_file_path)],
         shell=False,
@@ -114,8 +141,7 @@ def observer_xy_with_std_from_aspects():
     )
 
 
-def x_offset():
-    """The x offset at t=0 from the runway start based on integrating the ground speed integral."""
+def _x_offset():
     distance_to_end = video_analysis.ground_speed_integral(
         0,
         video_data.TIME_VIDEO_END_ASPHALT.time,
@@ -125,11 +151,26 @@ def x_offset():
     return result
 
 
+derived.REGISTRY.register('x_offset', _x_offset, depends=('gs_fits',))
+
+
+def x_offset():
+    """The x offset at t=0 from the runway start based on integrating the ground speed integral."""
+    return derived.REGISTRY.get('x_offset')
+
+
+derived.REGISTRY.register('observer_position', video_analysis.observer_position_mean_std_from_full_transits)
+
+
+def observer_position_mean_std() -> typing.Tuple[typing.Tuple[float, float], typing.Tuple[float, float]]:
+    """The same as video_analysis.observer_position_mean_std_from_full_transits() but computed once."""
+    return derived.REGISTRY.get('observer_position')
+
+
 def observer_xy():
     """Returns (x, y) in metres from start of runway."""
     # ((observer_x_mean, observer_x_std), (observer_y_mean, observer_y_std)) = observer_xy_with_std_from_aspects()
-    ((observer_x_mean, observer_x_std), (observer_y_mean, observer_y_std)) = \
-        video_analysis.observer_position_mean_std_from_full_transits()
+    ((observer_x_mean, observer_x_std), (observer_y_mean, observer_y_std)) = observer_position_mean_std()
     observer_xy_start_runway = observer_x_mean, observer_y_mean
     return observer_xy_start_runway
 
@@ -141,18 +182,19 @@ def full_transit_labels_and_arrows(arrow_rgb: str, line_width: float) -> typing.
     """
     ret = []
     observer = video_utils.XY(*observer_xy())
-    for transit_line in video_data.GOOGLE_EARTH_FULL_TRANSITS:
-        # Compute a position past the observer
-        end_point = video_utils.transit_line_past_observer(
-            transit_line.frm.xy, transit_line.to.xy, observer, 250.0
-        )
+    transit_lines = video_utils.TransitLines.from_xy_pairs(
+        (transit_line.frm.xy, transit_line.to.xy) for transit_line in video_data.GOOGLE_EARTH_FULL_TRANSITS
+    )
+    # Compute a position past the observer
+    end_points = transit_lines.line_past_observer(observer.x, observer.y, 250.0)
+    for i, transit_line in enumerate(video_data.GOOGLE_EARTH_FULL_TRANSITS):
         # Line between from/to points
         ret.append(
             'set arrow from {x0:.0f},{y0:.0f} to {x1:.0f},{y1:.0f} nohead lw {lw:0.2f} lc rgb "{arrow_rgb}"'.format(
                 x0=transit_line.frm.xy.x,
                 y0=transit_line.frm.xy.y,
-                x1=end_point.x,
-                y1=end_point.y,
+                x1=end_points.x[i],
+                y1=end_points.y[i],
                 arrow_rgb=arrow_rgb,
                 lw=line_width,
             )
@@ -185,19 +227,18 @@ def full_transit_arrows_with_position_error(arrow_rgb: str,
     """
     ret = []
     observer = video_utils.XY(*observer_xy())
-    for transit_line in video_data.GOOGLE_EARTH_FULL_TRANSITS:
-        new_from, new_to, new_bearing = video_utils.transit_point_with_error(
-            transit_line.frm.xy, transit_line.to.xy, error=error
-        )
-        end_point = video_utils.transit_line_past_observer(
-            new_from, new_to, observer, 250.0
-        )
+    transit_lines = video_utils.TransitLines.from_xy_pairs(
+        (transit_line.frm.xy, transit_line.to.xy) for transit_line in video_data.GOOGLE_EARTH_FULL_TRANSITS
+    )
+    new_lines, _new_bearings = transit_lines.point_with_error(error)
+    end_points = new_lines.line_past_observer(observer.x, observer.y, 250.0)
+    for i in range(len(video_data.GOOGLE_EARTH_FULL_TRANSITS)):
         ret.append(
             'set arrow from {x0:.0f},{y0:.0f} to {x1:.0f},{y1:.0f} nohead lw {lw:0.2f} lc rgb "{arrow_rgb}" dt 4'.format(
-                x0=new_from.x,
-                y0=new_from.y,
-                x1=end_point.x,
-                y1=end_point.y,
+                x0=new_lines.from_x[i],
+                y0=new_lines.from_y[i],
+                x1=end_points.x[i],
+                y1=end_points.y[i],
                 arrow_rgb=arrow_rgb,
                 lw=line_width,
             )
@@ -220,7 +261,7 @@ def observer_position_from_full_transits():
         sum(crossing_y) / len(crossing_y), (max(crossing_y) - min(crossing_y)) / 2.0
 
 
-def get_gs_fits_corrected() -> typing.List[typing.List[float]]:
+def _gs_fits_corrected() -> typing.List[typing.List[float]]:
     # Apply an offset of +5 knots and a tolerance of ±5knots
     gs_fits  = [
         video_analysis.ground_speed_curve_fit_with_offset(
@@ -236,6 +277,42 @@ def get_gs_fits_corrected() -> typing.List[typing.List[float]]:
     return gs_fits
 
 
+derived.REGISTRY.register('gs_fits_corrected', _gs_fits_corrected)
+
+
+def get_gs_fits_corrected() -> typing.List[typing.List[float]]:
+    return list(derived.REGISTRY.get('gs_fits_corrected'))
+
+
+def _trajectory(gs_fits: typing.List[typing.List[float]]) -> trajectory.Trajectory:
+    start_times = trajectory.start_of_take_off_times(gs_fits)
+    ((x_mean, _x_std), (y_mean, _y_std)) = observer_position_mean_std()
+    return trajectory.compute_trajectory(
+        gs_fits,
+        trajectory.timebase(extra_times=start_times + list(video_analysis.ground_speed_timebase())),
+        video_utils.XY(x_mean, y_mean),
+    )
+
+
+derived.REGISTRY.register(
+    'trajectory', lambda: _trajectory(derived.REGISTRY.get('gs_fits')), depends=('gs_fits', 'observer_position')
+)
+derived.REGISTRY.register(
+    'trajectory_corrected',
+    lambda: _trajectory(derived.REGISTRY.get('gs_fits_corrected')),
+    depends=('gs_fits_corrected', 'observer_position'),
+)
+
+
+def get_trajectory(corrected: bool = False) -> trajectory.Trajectory:
+    """
+    Returns the trajectory from the ground speed fits of get_gs_fit() or, if corrected, get_gs_fits_corrected().
+    This is computed once. The time base includes the start of take off of each fit and the times of the ground
+    speed measurements.
+    """
+    return derived.REGISTRY.get('trajectory_corrected' if corrected else 'trajectory')
+
+
 def return_equations_of_motion() -> typing.List[str]:
     ret = []
     gs_fits  = get_gs_fits_corrected()
@@ -321,8 +398,9 @@ def get_distances_min_mid_max(offset_distance_at_t: float) -> typing.Tuple[np.nd
         ]
     else:
         offsets = [0.0] * len(gs_fits)
+    start_times = trajectory.start_of_take_off_times(gs_fits)
     for i, gs_fit in enumerate(gs_fits):
-        t = np.roots(list(reversed(gs_fit)))[-1]
+        t = start_times[i]
         times = []
         while t < plot_constants.EXTRAPOLATED_RANGE.stop:
             times.append(t)
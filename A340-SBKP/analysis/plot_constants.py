@@ -1,6 +1,8 @@
 import collections
 import math
 
+import numpy as np
+
 from analysis import video_data
 from analysis import video_utils
 
@@ -19,6 +21,14 @@ RUNWAY_LEN_PX = math.sqrt((RUNWAY_END.x - RUNWAY_START.x) ** 2 + (RUNWAY_END.y -
 METRE_PER_PIXEL = video_data.RUNWAY_LEN_M / RUNWAY_LEN_PX  # m / pixel
 RUNWAY_DIRECTION = math.atan2(RUNWAY_END.y - RUNWAY_START.y, RUNWAY_END.x - RUNWAY_START.x)
 
+#: How write_dat_plt_call() creates the SVG from the .plt file, 'gnuplot' runs gnuplot, 'native' renders in process
+#: with analysis.svg_chart. 'native' is much faster but is opt in because svg_chart does not support
+#: 'smooth bezier' or the key options such as 'set key box' so its output differs from gnuplot's.
+PLOT_RENDERER = 'gnuplot'
+PLOT_RENDERERS = ('gnuplot', 'native')
+#: Series with more points than this are reduced by analysis.downsample before writing the .dat file.
+PLOT_MAX_POINTS = 2000
+
 EXTRAPOLATED_RANGE = range(-40, 40)
 #: +/- 10 knots
 GROUND_SPEED_OFFSETS = (
@@ -36,18 +46,47 @@ OBSERVER_XY_TIME_RANGE = (0.0, 0.0)
 
 
 
+class MapProjection:
+    """
+    Affine projection between positions in metres and pixel positions on the SVG diagram.
+    The datum of x is the start of video and x is along the runway.
+    The datum of y is the centerline of the runway.
+    This is built from the runway start and end in pixels and the runway length in metres. Positions are
+    (n, 2) arrays, or a single (2,) array or tuple, that are transformed with one matrix multiply.
+    """
+    def __init__(self, start: PosXY, end: PosXY, length_m: float):
+        self.origin = np.array(start, dtype=np.float64)
+        delta = np.array(end, dtype=np.float64) - self.origin
+        self.pixels_per_metre = math.hypot(delta[0], delta[1]) / length_m
+        self.direction = math.atan2(delta[1], delta[0])
+        cos = math.cos(self.direction)
+        sin = math.sin(self.direction)
+        # pixels = metres @ matrix + origin
+        self.matrix = self.pixels_per_metre * np.array([[cos, sin], [-sin, cos]])
+        self.matrix_inverse = np.linalg.inv(self.matrix)
+
+    def to_pixels(self, xy: np.ndarray) -> np.ndarray:
+        """Takes positions in metres and returns the pixel positions."""
+        return np.asarray(xy, dtype=np.float64) @ self.matrix + self.origin
+
+    def to_metres(self, xy: np.ndarray) -> np.ndarray:
+        """Takes pixel positions and returns the positions in metres, the inverse of to_pixels()."""
+        return (np.asarray(xy, dtype=np.float64) - self.origin) @ self.matrix_inverse
+
+    def distance_to_pixels(self, d):
+        """Takes a distance, or an array of them, in metres and returns the distance in pixels."""
+        return d * self.pixels_per_metre
+
+
+MAP_PROJECTION = MapProjection(RUNWAY_START, RUNWAY_END, video_data.RUNWAY_LEN_M)
+
+
 # X_AT_VIDEO_START = video_data.RUNWAY_LEN_M - X_DATUM_T0_TO_RUNWAY_END
 def distance_m_to_pixels(d: float) -> float:
     """
     Takes an distance in metres and returns the distance in pixels.
     """
-    runway_px_len = math.sqrt(
-        (RUNWAY_END.x - RUNWAY_START.x) ** 2
-        +
-        (RUNWAY_END.y - RUNWAY_START.y) ** 2
-    )
-    m_per_pixel = video_data.RUNWAY_LEN_M / runway_px_len # m / pixel
-    return d / m_per_pixel
+    return MAP_PROJECTION.distance_to_pixels(d)
 
 
 def position_m_to_pixels(pos: PosXY) -> PosXY:
@@ -56,9 +95,5 @@ def position_m_to_pixels(pos: PosXY) -> PosXY:
     The datum of x is the start of video.
     The datum of y is the centerline of the runway.
     """
-    # x_px = (pos.x + X_AT_VIDEO_START) / METRE_PER_PIXEL
-    x_px = pos.x / METRE_PER_PIXEL
-    y_px = pos.y / METRE_PER_PIXEL
-    x_px_svg = x_px * math.cos(RUNWAY_DIRECTION) - y_px * math.sin(RUNWAY_DIRECTION)
-    y_px_svg = x_px * math.sin(RUNWAY_DIRECTION) + y_px * math.cos(RUNWAY_DIRECTION)
-    return PosXY(x_px_svg + RUNWAY_START.x, y_px_svg + RUNWAY_START.y)
\ No newline at end of file
+    x_px, y_px = MAP_PROJECTION.to_pixels(pos)
+    return PosXY(float(x_px), float(y_px))
@@ -1,12 +1,11 @@
 import collections
 import typing
 
-import numpy as np
-
-from analysis import video_analysis
+from analysis import derived
+from analysis import trajectory
 from analysis import video_data
 from analysis import video_utils
-from analysis.plot_common import get_gs_fits_corrected
+from analysis.plot_common import get_gs_fits_corrected, get_trajectory
 from analysis.plot_svg import EVENTS_TIMED
 
 
@@ -72,15 +71,8 @@ def gen_event_data() -> ComputedEventData:
     # gs_fits = [plot_common.get_gs_fit(err) for err in video_data.ErrorDirection]
     gs_fits  = get_gs_fits_corrected()
     # Find initial start and distance
-    start_times = [np.roots(list(reversed(v)))[-1] for v in gs_fits]
-    # These are the location of the aircraft from the beginning of the runway at t=0
-    offsets = [
-        video_data.RUNWAY_LEN_M - video_analysis.ground_speed_integral(
-            0, video_data.TIME_VIDEO_END_ASPHALT.time, gs_fit
-        )
-        for gs_fit in gs_fits
-    ]
-    gs_fit_mid = gs_fits[1]
+    start_times = trajectory.start_of_take_off_times(gs_fits)
+    traj = get_trajectory(corrected=True)
     for event in EVENTS_TIMED:
         t_video = event.t
         if t_video is None:
@@ -93,11 +85,11 @@ def gen_event_data() -> ComputedEventData:
             t_start = t_video - start_times[1]
             t_err = None
             gs_err = video_utils.knots_to_m_p_s(5.0)#max([abs(v) for v in GROUND_SPEED_OFFSETS])
-        gs = video_analysis.ground_speed_from_fit(t_video, gs_fit_mid)
-        accl = video_analysis.ground_speed_differential(t_video, gs_fit_mid)
-        d_from_start = offsets[1] + video_analysis.ground_speed_integral(0.0, t_video, gs_fits[1])
-        d_from_start_min = offsets[0] + video_analysis.ground_speed_integral(0.0, t_video, gs_fits[0])
-        d_from_start_max = offsets[2] + video_analysis.ground_speed_integral(0.0, t_video, gs_fits[2])
+        gs = traj.value('speed', t_video)
+        accl = traj.value('acceleration', t_video)
+        d_from_start = traj.value('distance', t_video)
+        d_from_start_min = traj.value('distance', t_video, video_data.ErrorDirection.MIN)
+        d_from_start_max = traj.value('distance', t_video, video_data.ErrorDirection.MAX)
         d_from_start_error = max(
             [
                 abs(d_from_start - d_from_start_min),
@@ -120,11 +112,21 @@ def gen_event_data() -> ComputedEventData:
         )
 
 
+derived.REGISTRY.register(
+    'event_data', lambda: list(gen_event_data()), depends=('gs_fits_corrected', 'trajectory_corrected')
+)
+
+
+def event_data() -> typing.List[ComputedEventData]:
+    """The same as list(gen_event_data()) but computed once."""
+    return derived.REGISTRY.get('event_data')
+
+
 def create_event_table() -> typing.List[typing.List[str]]:
     table = []
     # Take the t_start error at the beginning and propagate it.
     t_start_error = None
-    for event in gen_event_data():
+    for event in event_data():
         # print('TRACE: event', event)
         # 'label, t_video, t_start, ground_speed, acceleration, d_start, d_end, notes'
         if event.t_start.error is not None:
@@ -14,7 +14,6 @@ def gnuplot_ground_speed(stream: typing.TextIO=sys.stdout) -> typing.List[str]:
     gs_arrays = [
         video_analysis.ground_speeds(min_max) for min_max in list(video_data.ErrorDirection)
     ]
-    gs_fits = [plot_common.get_gs_fit(err) for err in video_data.ErrorDirection]
     result = [
         '# "{}"'.format('Grounds speed, mid data and smoothed data.')
     ]
@@ -36,6 +35,7 @@ def gnuplot_ground_speed(stream: typing.TextIO=sys.stdout) -> typing.List[str]:
     for note in notes:
         result.append('# {}'.format(note))
     timebase = gs_arrays[0][:,0]
+    gs_fitted = plot_common.get_trajectory().speed[:, plot_common.get_trajectory().index(timebase)]
     FORMAT = '{:8.3f}'
     factor = video_utils.m_p_s_to_knots(1.0)
     for i in range(len(timebase)):
@@ -50,9 +50,9 @@ def gnuplot_ground_speed(stream: typing.TextIO=sys.stdout) -> typing.List[str]:
         part_line.append(FORMAT.format(gs_arrays[0][i, 1] * factor))
         part_line.append(FORMAT.format(gs_arrays[2][i, 1] * factor))
         # Fitted lines
-        part_line.append(FORMAT.format(video_analysis.ground_speed_from_fit(t, gs_fits[1]) * factor))
-        part_line.append(FORMAT.format(video_analysis.ground_speed_from_fit(t, gs_fits[0]) * factor))
-        part_line.append(FORMAT.format(video_analysis.ground_speed_from_fit(t, gs_fits[2]) * factor))
+        part_line.append(FORMAT.format(gs_fitted[1, i] * factor))
+        part_line.append(FORMAT.format(gs_fitted[0, i] * factor))
+        part_line.append(FORMAT.format(gs_fitted[2, i] * factor))
         # print(part_line)
         result.append(' '.join(part_line))
     stream.write('\n'.join(result))
@@ -126,13 +126,9 @@ def gnuplot_ground_speed_extrapolated(stream: typing.TextIO=sys.stdout) -> typin
         result.append('# Notes:')
         for note in notes:
             result.append('# {}'.format(note))
-    gs_arrays_extrapolated = []
-    for fit in gs_fits:
-        gs_arrays_extrapolated.append(
-            np.array(
-                [(t, video_analysis.ground_speed_from_fit(t, fit)) for t in plot_constants.EXTRAPOLATED_RANGE]
-            )
-        )
+    timebase = np.array(plot_constants.EXTRAPOLATED_RANGE, dtype=np.float64)
+    gs_extrapolated = plot_common.get_trajectory().speed[:, plot_common.get_trajectory().index(timebase)]
+    gs_arrays_extrapolated = [np.column_stack((timebase, gs_extrapolated[i])) for i in range(len(gs_extrapolated))]
     # Convert selected columns to knots
     k = video_utils.m_p_s_to_knots(1.0)
     for i in range(3):
@@ -36,7 +36,7 @@ def gnuplot_observer_time_distance_bearing(stream: typing.TextIO=sys.stdout) ->
             stream.write('# {}\n'.format(note))
 
     FORMAT = '{:8.3f}'
-    gs_fit = video_analysis.ground_speed_curve_fit(video_data.ErrorDirection.MID)
+    gs_fit = plot_common.get_gs_curve_fit_mid()
     # These are ndarrays of (time, distance, aspect, aspect_error)
     # time_dist_brng = video_analysis.observer_time_distance_bearing(gs_fit, video_data.ErrorDirection.MID)
 
@@ -165,7 +165,7 @@ def gnuplot_observer_time_distance_bearing_with_yaw(stream: typing.TextIO=sys.st
             stream.write('# {}\n'.format(note))
     FORMAT = '{:8.3f}'
     x_offset = plot_common.x_offset()
-    gs_fit = video_analysis.ground_speed_curve_fit(video_data.ErrorDirection.MID)
+    gs_fit = plot_common.get_gs_curve_fit_mid()
     # time_dist_brng = video_analysis.observer_time_distance_bearing(gs_fit, video_data.ErrorDirection.MID)
     time_dist_brng = video_analysis.observer_time_distance_bearing_from_wing_tips(gs_fit, video_data.ErrorDirection.MID)
     # time_dist_brng = video_analysis.time_distance_bearing_from_fits(time_interval=1.0)
@@ -174,28 +174,20 @@ def gnuplot_observer_time_distance_bearing_with_yaw(stream: typing.TextIO=sys.st
     #     ignore_first_n=plot_constants.OBSERVER_XY_IGNORE_N_FIRST_BEARINGS,
     #     t_range=plot_constants.OBSERVER_XY_TIME_RANGE,
     # )
-    ((x_mean, x_std), (y_mean, y_std)) = video_analysis.observer_position_mean_std_from_full_transits()
+    ((x_mean, x_std), (y_mean, y_std)) = plot_common.observer_position_mean_std()
     # print('Observer at:', ((x_mean+x_offset, x_std), (y_mean, y_std)))
 
     y_value = -950
     y_0 = 0.0
     arrow_texts = []
     label_texts = []
+    yaw_estimate = video_analysis.yaw_from_observers(np.array([[x_mean, y_mean]]), time_dist_brng, x_offset)
     for i in range(len(time_dist_brng)):
         t = time_dist_brng[i, 0]
         x_0 = time_dist_brng[i, 1] + x_offset
-        bearing = time_dist_brng[i, 2]
-        computed_bearing = math.degrees(math.atan2(y_mean, x_mean - x_0))
-        computed_bearing %= 360
-        distance = math.sqrt(y_mean**2 + (x_mean - x_0)**2)
-        # Allow for assumed yaw of the aircraft from video_date.YAW_PROFILE
+        # Allow for the yaw of the aircraft so the bearing is the computed bearing to the observer.
         # yaw = video_utils.interpolate(video_data.YAW_PROFILE[:, 0], video_data.YAW_PROFILE[:, 1], t)
-        yaw = computed_bearing - bearing
-        y_err = math.sin(math.radians(yaw)) * distance
-        # print('TRACE: t={:6.1f} x_0={:6.1f} bearing={:6.1f} computed_bearing={:6.1f} yaw={:6.1f} y_err={:6.1f}'.format(
-        #     t, x_0, bearing, computed_bearing, yaw, y_err
-        # ))
-        bearing += yaw
+        bearing = yaw_estimate.bearing[0, i]
         if abs(math.sin(math.radians(bearing))) < 0.01:
             radius = abs(y_value - y_0)
         else:
@@ -333,8 +325,9 @@ def gnuplot_observer_xy(stream: typing.TextIO=sys.stdout) -> typing.List[str]:
             t_range=plot_constants.OBSERVER_XY_TIME_RANGE,
         )[0] for error_direction in list(video_data.ErrorDirection)
     ]
+    x_offset = plot_common.x_offset()
     for obs in observations:
-        obs[:,0] += plot_common.x_offset()
+        obs[:,0] += x_offset
     plot_common.gnuplot_write_arrays(stream, *observations)
     # Print header twice, once for x, once for y.
     print('TRACE: gnuplot_observer_xy()')
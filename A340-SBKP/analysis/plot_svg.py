@@ -1,5 +1,7 @@
 import collections
+import functools
 import math
+import re
 import typing
 
 import numpy as np
@@ -11,6 +13,15 @@ from analysis import video_data
 from analysis import video_utils
 
 
+def points_string(xy: np.ndarray) -> str:
+    """
+    Takes an (n, 2) array of positions in metres and returns the string of pixel positions for the points
+    attribute of an SVG polygon or polyline.
+    """
+    pixels = plot_constants.MAP_PROJECTION.to_pixels(xy)
+    return ' '.join(['{:.1f},{:.1f}'.format(x, y) for x, y in pixels.tolist()])
+
+
 def polygon_string(xy: plot_constants.PosXY,
                    dx: float,
                    dy: float,
@@ -21,13 +32,15 @@ def polygon_string(xy: plot_constants.PosXY,
     #             points="350,75  379,161 469,161 397,215
     #                     423,301 350,250 277,301 303,215
     #                     231,161 321,161" />
-    points = [
-        plot_constants.position_m_to_pixels(plot_constants.PosXY(xy.x + dx, xy.y + dy)),
-        plot_constants.position_m_to_pixels(plot_constants.PosXY(xy.x - dx, xy.y + dy)),
-        plot_constants.position_m_to_pixels(plot_constants.PosXY(xy.x - dx, xy.y - dy)),
-        plot_constants.position_m_to_pixels(plot_constants.PosXY(xy.x + dx, xy.y - dy)),
-    ]
-    point_str = ' '.join(['{:.1f},{:.1f}'.format(p.x, p.y) for p in points])
+    points = np.array(
+        [
+            (xy.x + dx, xy.y + dy),
+            (xy.x - dx, xy.y + dy),
+            (xy.x - dx, xy.y - dy),
+            (xy.x + dx, xy.y - dy),
+        ]
+    )
+    point_str = points_string(points)
     result = '<polygon fill="{fill:}" stroke="{stroke:}" stroke-width="{stroke_width:d}" points="{points:}" />'.format(
         fill=fill,
         stroke=stroke,
@@ -85,16 +98,15 @@ def create_svg_observer_xy(d_video_starts: float, d_video_starts_error: float) -
         ignore_first_n = plot_constants.OBSERVER_XY_IGNORE_N_FIRST_BEARINGS,
         t_range=plot_constants.OBSERVER_XY_TIME_RANGE,
     )
-    ((obs_x_transit, _x_std), (obs_y_transit, _y_std)) = video_analysis.observer_position_mean_std_from_full_transits()
+    ((obs_x_transit, _x_std), (obs_y_transit, _y_std)) = plot_common.observer_position_mean_std()
     result = ['<!-- {} -->'.format('create_svg_observer_xy()'.center(75))]
     # =========== Write dots
     dot_radius = plot_constants.distance_m_to_pixels(10)
-    for i in range(len(obs_xy_spects)):
-        pos_xy = plot_constants.PosXY(obs_xy_spects[i, 0] + d_video_starts, obs_xy_spects[i, 1])
-        pos_centre = plot_constants.position_m_to_pixels(pos_xy)
+    centres = plot_constants.MAP_PROJECTION.to_pixels(obs_xy_spects[:, :2] + (d_video_starts, 0.0))
+    for cx, cy in centres.tolist():
         result.append(
             '<circle cx="{cx:.1f}" cy="{cy:.1f}" r="{r:.1f}" stroke="green" stroke-width="0.25" fill="cyan" />'.format(
-                cx=pos_centre.x, cy=pos_centre.y, r=dot_radius,
+                cx=cx, cy=cy, r=dot_radius,
             )
         )
         # pos_xy = plot_constants.PosXY(observer_xy[i, 0] + d_video_starts - d_video_starts_error, observer_xy[i, 1])
@@ -128,7 +140,7 @@ def create_svg_observer_xy(d_video_starts: float, d_video_starts_error: float) -
 
 
 def create_svg_observer_annotation() -> typing.List[str]:
-    ((obs_x_transit, _x_std), (obs_y_transit, _y_std)) = video_analysis.observer_position_mean_std_from_full_transits()
+    ((obs_x_transit, _x_std), (obs_y_transit, _y_std)) = plot_common.observer_position_mean_std()
     result = [
         '<!-- {} -->'.format('create_svg_observer_annotation()'.center(75)),
     ]
@@ -179,49 +191,99 @@ def create_svg_transit_to_observer_xy() -> typing.List[str]:
     result.append('<!-- {} -->'.format('create_svg_transit_to_observer_xy()'.center(75)))
     colour = 'black'
     radius = plot_constants.distance_m_to_pixels(15)
-    for transit_line in video_data.GOOGLE_EARTH_FULL_TRANSITS:
-        x_0, y_0 = transit_line.frm.xy
-        circle_pos_0 = plot_constants.position_m_to_pixels(plot_constants.PosXY(x_0, y_0))
-        result.append(
-            '<circle cx="{cx:.1f}" cy="{cy:.1f}" r="{r:.1f}" stroke="{colour:}" stroke-width="1" fill="none" />'.format(
-                colour=colour,
-                cx=circle_pos_0.x,
-                cy=circle_pos_0.y,
-                r=radius,
+    transits = video_data.GOOGLE_EARTH_FULL_TRANSITS
+    projection = plot_constants.MAP_PROJECTION
+    circle_pos_0 = projection.to_pixels([transit_line.frm.xy for transit_line in transits]).tolist()
+    circle_pos_1 = projection.to_pixels([transit_line.to.xy for transit_line in transits]).tolist()
+    circle_pos_2 = projection.to_pixels(
+        [
+            video_utils.transit_line_past_observer(
+                transit_line.frm.xy, transit_line.to.xy, observer_xy, 250.0
+            ) for transit_line in transits
+        ]
+    ).tolist()
+    for (x_0, y_0), (x_1, y_1), (x_2, y_2) in zip(circle_pos_0, circle_pos_1, circle_pos_2):
+        for cx, cy in ((x_0, y_0), (x_1, y_1)):
+            result.append(
+                '<circle cx="{cx:.1f}" cy="{cy:.1f}" r="{r:.1f}" stroke="{colour:}" stroke-width="1" fill="none" />'.format(
+                    colour=colour,
+                    cx=cx,
+                    cy=cy,
+                    r=radius,
+                )
             )
-        )
-        x_1, y_1 = transit_line.to.xy
-        circle_pos_1 = plot_constants.position_m_to_pixels(plot_constants.PosXY(x_1, y_1))
-        result.append(
-            '<circle cx="{cx:.1f}" cy="{cy:.1f}" r="{r:.1f}" stroke="{colour:}" stroke-width="1" fill="none" />'.format(
-                colour=colour,
-                cx=circle_pos_1.x,
-                cy=circle_pos_1.y,
-                r=radius,
-            )
-        )
-        end_point = video_utils.transit_line_past_observer(
-            transit_line.frm.xy, transit_line.to.xy, observer_xy, 250.0
-        )
-        # print('TRACE: create_svg_transit_to_observer_xy():', end_point)
-        circle_pos_2 = plot_constants.position_m_to_pixels(end_point)
         result.append(
             '<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" stroke="{colour:}" stroke-width="1" />'.format(
                 colour=colour,
-                x1=circle_pos_0.x, y1=circle_pos_0.y,
-                x2=circle_pos_2.x, y2=circle_pos_2.y,
+                x1=x_0, y1=y_0,
+                x2=x_2, y2=y_2,
             )
         )
     result.append('<!-- DONE {} -->'.format('create_svg_transit_to_observer_xy()'.center(75)))
     return result
 
 
-def create_svg() -> typing.List[str]:
+def create_svg_observer_likelihood(likelihood: video_analysis.ObserverLikelihoodMap = None) -> typing.List[str]:
+    """
+    Returns a list of SVG strings that overlay the observer likelihood raster on the map.
+    Each cell in the confidence region is drawn with an opacity proportional to its relative likelihood, contiguous
+    cells in a row are merged into a single rect.
+    The rects are in metres and a transform maps them to pixels the same way as
+    plot_constants.position_m_to_pixels().
+    """
+    if likelihood is None:
+        likelihood = video_analysis.observer_likelihood_map()
+    spacing = likelihood.x[1] - likelihood.x[0]
+    result = ['<!-- {} -->'.format('create_svg_observer_likelihood()'.center(75))]
+    result.append(
+        '<g transform="translate({x:.2f},{y:.2f}) rotate({angle:.4f}) scale({scale:.6f})" fill="magenta"'
+        ' stroke="none">'.format(
+            x=plot_constants.RUNWAY_START.x,
+            y=plot_constants.RUNWAY_START.y,
+            angle=math.degrees(plot_constants.RUNWAY_DIRECTION),
+            scale=1 / plot_constants.METRE_PER_PIXEL,
+        )
+    )
+    # Relative likelihood quantised to tenths so that runs of similar cells merge.
+    opacity = np.round(np.exp(-(likelihood.cost - likelihood.minimum_cost) / 2) * 10) / 20
+    for row in np.flatnonzero(np.any(likelihood.confidence_region, axis=1)):
+        columns = np.flatnonzero(likelihood.confidence_region[row])
+        start = 0
+        for i in range(1, len(columns) + 1):
+            if i == len(columns) \
+                    or columns[i] != columns[i - 1] + 1 \
+                    or opacity[row, columns[i]] != opacity[row, columns[start]]:
+                result.append(
+                    '<rect x="{x:.1f}" y="{y:.1f}" width="{width:.1f}" height="{height:.1f}"'
+                    ' fill-opacity="{opacity:.2f}" />'.format(
+                        x=likelihood.x[columns[start]] - spacing / 2,
+                        y=likelihood.y[row] - spacing / 2,
+                        width=spacing * (i - start),
+                        height=spacing,
+                        opacity=opacity[row, columns[start]],
+                    )
+                )
+                start = i
+    result.append('</g>')
+    pos = plot_constants.position_m_to_pixels(plot_constants.PosXY(likelihood.minimum.x, likelihood.minimum.y))
+    result.append(
+        '<circle cx="{cx:.1f}" cy="{cy:.1f}" r="{r:.1f}" stroke="black" stroke-width="1" fill="magenta" />'.format(
+            cx=pos.x, cy=pos.y, r=3,
+        )
+    )
+    result.append('<!-- DONE {} -->'.format('create_svg_observer_likelihood()'.center(75)))
+    return result
+
+
+def create_svg_events() -> typing.List[str]:
+    """
+    Returns a list of SVG strings for the events along the runway.
+    """
     label_offset = 50
     result = []
     d_video_starts = 1110
     d_video_starts_error = None
-    for event in plot_events.gen_event_data():
+    for event in plot_events.event_data():
         # TODO: Add distance information in metres to labels of the form:
         # 'from_start [from_end]'
         # 'label, t_video, t_start, ground_speed, acceleration, d_start, d_end, notes'
@@ -266,19 +328,139 @@ def create_svg() -> typing.List[str]:
                 cx=pos.x, cy=pos.y, r=3,
             )
         )
+    return result
+
+
+def create_svg_observer_layers(likelihood: bool = False) -> typing.List[str]:
+    """
+    Returns a list of SVG strings for the estimated observer position.
+    If likelihood is True the observer likelihood raster is drawn under the observer position, it is off by
+    default so that the published map is unchanged.
+    """
+    result = []
     # result.extend(create_svg_observer_xy(d_video_starts, d_video_starts_error))
+    if likelihood:
+        result.extend(create_svg_observer_likelihood())
     result.extend(create_svg_observer_annotation())
     result.extend(create_svg_transit_to_observer_xy())
     return result
 
 
-def modify_svg_as_text_and_copy(infile: str, outfile: str):
-    with open(infile) as fin:
-        with open(outfile, 'w') as fout:
-            for line in fin.readlines():
-                if line == '</svg>\n':
-                    # Insert lines
-                    for out_line in create_svg():
+#: Functions that each return a list of SVG strings, in the order that they are drawn over the map.
+SVG_OVERLAY_LAYERS = (
+    create_svg_events,
+    create_svg_observer_layers,
+)
+#: SVG_OVERLAY_LAYERS with the observer likelihood raster, for example:
+#: modify_svg_as_text_and_copy(infile, outfile, gen_svg_overlay(SVG_OVERLAY_LAYERS_WITH_LIKELIHOOD))
+SVG_OVERLAY_LAYERS_WITH_LIKELIHOOD = (
+    create_svg_events,
+    functools.partial(create_svg_observer_layers, likelihood=True),
+)
+
+
+def gen_svg_overlay(
+        layers: typing.Iterable[typing.Callable[[], typing.List[str]]] = SVG_OVERLAY_LAYERS
+) -> typing.Iterator[str]:
+    """Yields the SVG strings of each layer, each layer is only created when the previous one is exhausted."""
+    for layer in layers:
+        yield from layer()
+
+
+def create_svg() -> typing.List[str]:
+    return list(gen_svg_overlay())
+
+
+#: Number of characters read from the base map at a time by modify_svg_as_text_and_copy().
+SVG_COPY_CHUNK_SIZE = 1 << 16
+
+RE_SVG_MARKUP = re.compile(
+    r'''<(?:
+        !--.*?-->                                   # Comment
+        |!\[CDATA\[.*?\]\]>                         # CDATA section
+        |\?.*?\?>                                   # Processing instruction
+        |!(?!--|\[CDATA\[)(?:[^>\[]|\[[^\]]*\])*>   # DOCTYPE, '>' can be in the internal subset
+        |(/?)[^\s/>"'!?]+(?:[^>"'/]|/(?!>)|"[^"]*"|'[^']*')*(/?)>
+                                                    # Element tag, '>' can be in quoted attribute values
+        |                                           # Otherwise incomplete
+    )''',
+    re.DOTALL | re.VERBOSE,
+)
+
+
+class SvgRootCloseScanner:
+    """
+    Incrementally scans SVG text for the end tag of the root element by tracking the element depth.
+    Comments, CDATA sections, processing instructions and the DOCTYPE are skipped so that tags within
+    them are not counted. Text is fed in arbitrary chunks, markup split across chunks is held back until
+    the rest of it arrives so only that needs to be kept in memory.
+    """
+    def __init__(self):
+        self.depth = 0
+        self.found = False
+        self._pending = ''
+
+    def feed(self, chunk: str) -> typing.Tuple[str, typing.Optional[str]]:
+        """
+        Scans the chunk and returns a tuple (before, after).
+        before is the text that has been scanned and precedes the end tag of the root element.
+        after is None if the root end tag has not been found yet, otherwise it is the text from the start of
+        that tag to the end of the chunk. Once found the scanner must not be fed again.
+        An empty chunk marks the end of the text, this raises a ValueError if there is unterminated markup or
+        the root end tag has not been found.
+        """
+        if self.found:
+            raise ValueError('The root end tag has already been found')
+        text = self._pending + chunk
+        pos = len(text)
+        for m in RE_SVG_MARKUP.finditer(text):
+            end_tag, empty_tag = m.group(1, 2)
+            if end_tag:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.found = True
+                    self._pending = ''
+                    return text[:m.start()], text[m.start():]
+            elif end_tag is None:
+                if m.end() - m.start() == 1:
+                    # Incomplete, wait for the rest of it.
+                    pos = m.start()
+                    break
+            elif not empty_tag:
+                self.depth += 1
+        self._pending = text[pos:]
+        if not chunk:
+            if self._pending:
+                raise ValueError('Unterminated markup: {!r}'.format(self._pending[:80]))
+            raise ValueError('No end tag for the root element')
+        return text[:pos], None
+
+
+def modify_svg_as_text_and_copy(infile: str,
+                                outfile: str,
+                                overlay: typing.Iterable[str] = None,
+                                chunk_size: int = SVG_COPY_CHUNK_SIZE) -> None:
+    """
+    Copies the SVG infile to outfile inserting the overlay strings, one per line, just before the end tag of the
+    root element. overlay defaults to gen_svg_overlay().
+    This streams infile in chunks of chunk_size characters so that memory use does not depend on the size of
+    the base map. A ValueError is raised if the root end tag is not found.
+    """
+    if overlay is None:
+        overlay = gen_svg_overlay()
+    scanner = SvgRootCloseScanner()
+    with open(infile, encoding='utf-8', newline='') as fin:
+        with open(outfile, 'w', encoding='utf-8', newline='') as fout:
+            while True:
+                chunk = fin.read(chunk_size)
+                before, after = scanner.feed(chunk)
+                fout.write(before)
+                if after is not None:
+                    for out_line in overlay:
                         fout.write(out_line)
                         fout.write('\n')
-                fout.write(line)
\ No newline at end of file
+                    fout.write(after)
+                    # Copy the rest.
+                    for chunk in iter(lambda: fin.read(chunk_size), ''):
+                        fout.write(chunk)
+                    return
@@ -3,7 +3,6 @@ import sys
 import typing
 
 from analysis import plot_constants, plot_common
-from analysis import video_analysis
 from analysis import video_data
 from analysis import video_utils
 from analysis.video_data import GOOGLE_EARTH_FULL_TRANSITS, GOOGLE_EARTH_POSITIONS_LAT_LONG
@@ -22,10 +21,10 @@ def gnuplot_ground_transits(stream: typing.TextIO=sys.stdout) -> typing.List[str
         for note in notes:
             stream.write('# {}\n'.format(note))
 
-    gs_fit = video_analysis.ground_speed_curve_fit(video_data.ErrorDirection.MID)
+    gs_fit = plot_common.get_gs_curve_fit_mid()
     # time_dist_brng = video_analysis.observer_time_distance_bearing_from_wing_tips(gs_fit, video_data.ErrorDirection.MID)
     # ((obs_x_mean, obs_x_std), (obs_y_mean, obs_y_std)) = plot_common.observer_xy_with_std_from_aspects()
-    ((obs_x_mean, obs_x_std), (obs_y_mean, obs_y_std)) = video_analysis.observer_position_mean_std_from_full_transits()
+    ((obs_x_mean, obs_x_std), (obs_y_mean, obs_y_std)) = plot_common.observer_position_mean_std()
     # observer_xy_start_runway = plot_common.observer_xy()
     computed_data = []
     # Draw runway
@@ -22,7 +22,7 @@ def gnuplot_aircraft_yaw(stream: typing.TextIO=sys.stdout) -> typing.List[str]:
         stream.write('# Notes:\n')
         for note in notes:
             stream.write('# {}\n'.format(note))
-    gs_fit = video_analysis.ground_speed_curve_fit(video_data.ErrorDirection.MID)
+    gs_fit = plot_common.get_gs_curve_fit_mid()
     # time_dist_brng = video_analysis.observer_time_distance_bearing(gs_fit, video_data.ErrorDirection.MID)
     time_dist_brng = video_analysis.observer_time_distance_bearing_from_wing_tips(gs_fit, video_data.ErrorDirection.MID)
     # time_dist_brng = video_analysis.time_distance_bearing_from_fits(time_interval=1.0)
@@ -31,14 +31,14 @@ def gnuplot_aircraft_yaw(stream: typing.TextIO=sys.stdout) -> typing.List[str]:
     # from the observed aspect data.
     # Units are (seconds, metres, degrees).
 
-    time_yaw = []
     # ((x_mean, x_std), (y_mean, y_std)) = video_analysis.observer_position_mean_std_from_aspects(
     #     baseline=plot_constants.OBSERVER_XY_MINIMUM_BASELINE,
     #     ignore_first_n=plot_constants.OBSERVER_XY_IGNORE_N_FIRST_BEARINGS,
     #     t_range=plot_constants.OBSERVER_XY_TIME_RANGE,
     # )
-    ((x_mean, x_std), (y_mean, y_std)) = video_analysis.observer_position_mean_std_from_full_transits()
+    ((x_mean, x_std), (y_mean, y_std)) = plot_common.observer_position_mean_std()
     observer_error = math.sqrt(x_std**2 + y_std**2)
+    x_offset = plot_common.x_offset()
     # Observer from bearings    : x=3480.0 y=-763.0
     # Observer from google earth: x=3457.9 y=-655.5
     #       Diff (bearings - ge): x=  22.1 y=-107.5
@@ -47,26 +47,15 @@ def gnuplot_aircraft_yaw(stream: typing.TextIO=sys.stdout) -> typing.List[str]:
     # y_mean = -744.88
     # y_mean = -754.88
     # y_mean = -764.88
-    for t, x_distance, aspect, aspect_error in time_dist_brng:
-        # Calculate the bearing from the observers assumed position to the aircraft position
-        x_obs_aircraft = x_mean - x_distance - plot_common.x_offset()
-        obs_brng = math.degrees(
-            math.atan2(y_mean, x_obs_aircraft)
-        )
-        obs_brng %= 360
-        yaw = (obs_brng - aspect) % 360
-        if yaw > 180.0:
-            yaw -= 360
-        # Compute error as the angle:
-        # 2.0 * atan(OBSERVER_ASSUMED_POSITION_ERROR / observer-to_aircraft_distance)
-        obs_aircraft_distance = math.sqrt(y_mean**2 + x_obs_aircraft**2)
-        error = 2.0 * math.degrees(math.atan(observer_error / obs_aircraft_distance))
-        error += aspect_error
-        time_yaw.append((t, yaw, yaw - error, yaw + error))
-        # print('TRACE: t={:8.1f} yaw={:6.3f}),'.format(t, yaw))
+    # Calculate the bearing from the observers assumed position to the aircraft position and the error as the angle:
+    # 2.0 * atan(OBSERVER_ASSUMED_POSITION_ERROR / observer-to_aircraft_distance)
+    yaw = video_analysis.yaw_from_observers(
+        np.array([[x_mean, y_mean]]), time_dist_brng, x_offset, observer_error
+    )
+    time_yaw = np.column_stack((time_dist_brng[:, 0], yaw.yaw[0], yaw.yaw_min[0], yaw.yaw_max[0]))
     # print('TRACE: time_yaw:')
     # pprint.pprint(time_yaw)
-    plot_common.gnuplot_write_arrays(stream, np.array(time_yaw))
+    plot_common.gnuplot_write_arrays(stream, time_yaw)
     return ['']
 
 
@@ -0,0 +1,785 @@
+"""
+Renders line, point, error bar and error band charts with arrows and labels from numpy arrays to SVG
+in process, without gnuplot.
+
+Chart is the numpy interface. render_gnuplot() renders the subset of gnuplot scripts that the plot
+modules write, for example::
+
+    set title "..."
+    set xrange [0:3700]
+    set arrow from -30.059,0 to -30.059,-787.468 lt 1 nohead
+    set label "Nose wheel off" at 17.9,-4 font ",12" center
+    plot "name.dat" using 1:2:3:4 title "Estimated" w yerrorbars, "name.dat" using 1:($5-$4) w lines
+
+Missing values (NaN) in a series break lines and are not plotted as points. As with gnuplot, if the script has
+'set datafile missing "NaN"' then lines join across the missing values instead of breaking.
+Smoothing, such as smooth bezier, and the key options other than on/off are not supported, a warning is issued and
+the data is drawn as is.
+"""
+import ast
+import collections
+import io
+import math
+import operator
+import os
+import re
+import typing
+import warnings
+from xml.sax import saxutils
+
+import numpy as np
+
+#: Default size of the chart in pixels.
+CHART_SIZE = (700, 500)
+#: Margins around the plot area in pixels, left, right, top, bottom.
+CHART_MARGINS = (80, 30, 40, 50)
+CHART_FONT_SIZE = 12
+#: Colours of line types 1, 2, 3... the same as gnuplot 'set colorsequence classic'.
+LINE_COLOURS = (
+    '#ff0000', '#00c000', '#0080ff', '#c000ff', '#00eeee', '#c04000', '#eeee00', '#2020c0',
+)
+#: Styles supported by Chart.add_series(), these are the gnuplot names.
+SERIES_STYLES = ('lines', 'points', 'linespoints', 'yerrorbars', 'xyerrorbars', 'boxxyerror', 'filledcurves')
+#: Number of columns needed by each style, after the x column.
+_STYLE_COLUMNS = {
+    'lines': 1, 'points': 1, 'linespoints': 1, 'yerrorbars': 3, 'xyerrorbars': 5, 'boxxyerror': 5, 'filledcurves': 2,
+}
+
+
+def line_colour(line_type: int) -> str:
+    """The colour of gnuplot line type line_type, these start at 1 and -1 is black."""
+    if line_type < 1:
+        return '#000000'
+    return LINE_COLOURS[(line_type - 1) % len(LINE_COLOURS)]
+
+
+class Series(collections.namedtuple(
+        'Series', 'x, y, title, style, colour, line_width, point_size, x_low, x_high, y_low, y_high')):
+    """A data series, x, y and the error arrays are 1D numpy arrays of the same length.
+    The error arrays are None if the style does not use them."""
+    __slots__ = ()
+
+
+class Arrow(collections.namedtuple('Arrow', 'x0, y0, x1, y1, colour, line_width, heads')):
+    """An arrow in data coordinates, heads is the number of heads, 0 (nohead), 1 at x1, y1 or 2."""
+    __slots__ = ()
+
+
+class Label(collections.namedtuple('Label', 'text, x, y, align, rotate, font_size')):
+    """A label in data coordinates, align is 'left', 'center' or 'right' and rotate is degrees anti-clockwise.
+    The text can contain new lines."""
+    __slots__ = ()
+
+
+def _finite(*arrays: typing.Optional[np.ndarray]) -> np.ndarray:
+    """Returns the finite values of all the arrays that are not None as a 1D array."""
+    values = [np.ravel(a) for a in arrays if a is not None]
+    if not values:
+        return np.empty(0)
+    values = np.concatenate(values)
+    return values[np.isfinite(values)]
+
+
+def tic_step(low: float, high: float, count: int = 7) -> float:
+    """Returns a step of 1, 2 or 5 x 10**n that gives about count tics between low and high."""
+    span = abs(high - low)
+    if span == 0 or not math.isfinite(span):
+        return 1.0
+    raw = span / count
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for factor in (1, 2, 5, 10):
+        if raw <= factor * magnitude:
+            return factor * magnitude
+    return 10 * magnitude
+
+
+def _axis_range(values: np.ndarray,
+                fixed: typing.Tuple[typing.Optional[float], typing.Optional[float]],
+                step: typing.Optional[float]) -> typing.Tuple[float, float, float]:
+    """Returns (start, end, tic step) of an axis. fixed is the (start, end) range where None is autoscaled,
+    the autoscaled ends are extended to the next tic as gnuplot does. start can be greater than end to reverse
+    the axis."""
+    start, end = fixed
+    if len(values):
+        data_low, data_high = float(np.min(values)), float(np.max(values))
+    else:
+        data_low, data_high = 0.0, 1.0
+    reverse = start is not None and end is not None and start > end
+    low = data_low if start is None else start
+    high = data_high if end is None else end
+    if reverse:
+        low, high = high, low
+    if low == high:
+        low, high = low - 1.0, high + 1.0
+    if step is None:
+        step = tic_step(low, high)
+    if start is None:
+        low = math.floor(low / step) * step
+    if end is None:
+        high = math.ceil(high / step) * step
+    if reverse:
+        return high, low, step
+    return low, high, step
+
+
+def _tics(start: float, end: float, step: float) -> np.ndarray:
+    low, high = min(start, end), max(start, end)
+    first = math.ceil(low / step - 1e-9) * step
+    count = int(math.floor((high - first) / step + 1e-9)) + 1
+    return first + step * np.arange(max(0, count))
+
+
+def _format_tic(value: float) -> str:
+    return '{:g}'.format(round(value, 10) + 0.0)
+
+
+def _split_finite(*arrays: np.ndarray) -> typing.List[np.ndarray]:
+    """Returns the runs of indices where all the arrays are finite."""
+    ok = np.all([np.isfinite(a) for a in arrays], axis=0)
+    indices = np.flatnonzero(ok)
+    if len(indices) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+    return np.split(indices, breaks)
+
+
+class Chart:
+    """
+    A chart of series, arrows and labels that is rendered as SVG by render().
+
+    xrange and yrange are (start, end), either can be None to autoscale. If start > end the axis is reversed.
+    xtics and ytics are the tic steps, None chooses them automatically.
+    """
+    def __init__(self, width: int = CHART_SIZE[0], height: int = CHART_SIZE[1]):
+        self.width = width
+        self.height = height
+        self.title = ''
+        self.xlabel = ''
+        self.ylabel = ''
+        self.xrange: typing.Tuple[typing.Optional[float], typing.Optional[float]] = (None, None)
+        self.yrange: typing.Tuple[typing.Optional[float], typing.Optional[float]] = (None, None)
+        self.xtics: typing.Optional[float] = None
+        self.ytics: typing.Optional[float] = None
+        self.grid = False
+        self.key = True
+        self.series: typing.List[Series] = []
+        self.arrows: typing.List[Arrow] = []
+        self.labels: typing.List[Label] = []
+
+    def add_series(self, x: np.ndarray, y: np.ndarray, title: str = '', style: str = 'lines',
+                   colour: str = None, line_width: float = 1.0, point_size: float = 1.0,
+                   x_low: np.ndarray = None, x_high: np.ndarray = None,
+                   y_low: np.ndarray = None, y_high: np.ndarray = None) -> None:
+        """Adds a series. yerrorbars needs y_low and y_high, xyerrorbars and boxxyerror need all four and
+        filledcurves draws the band between y_low and y_high, y is ignored.
+        The default colour is that of the next line type."""
+        if style not in SERIES_STYLES:
+            raise ValueError('Unknown style "{}" not in {}'.format(style, SERIES_STYLES))
+        if colour is None:
+            colour = line_colour(len(self.series) + 1)
+
+        def as_array(a: typing.Optional[np.ndarray]) -> typing.Optional[np.ndarray]:
+            return None if a is None else np.asarray(a, dtype=np.float64).ravel()
+
+        x, y, x_low, x_high, y_low, y_high = (as_array(a) for a in (x, y, x_low, x_high, y_low, y_high))
+        if style in ('yerrorbars', 'filledcurves') and (y_low is None or y_high is None):
+            raise ValueError('Style "{}" needs y_low and y_high'.format(style))
+        if style in ('xyerrorbars', 'boxxyerror') and any(a is None for a in (x_low, x_high, y_low, y_high)):
+            raise ValueError('Style "{}" needs x_low, x_high, y_low and y_high'.format(style))
+        for a in (y, x_low, x_high, y_low, y_high):
+            if a is not None and a.shape != x.shape:
+                raise ValueError('Shape {} does not match x {}'.format(a.shape, x.shape))
+        self.series.append(Series(x, y, title, style, colour, line_width, point_size, x_low, x_high, y_low, y_high))
+
+    def add_arrow(self, x0: float, y0: float, x1: float, y1: float,
+                  colour: str = '#000000', line_width: float = 1.0, heads: int = 1) -> None:
+        self.arrows.append(Arrow(x0, y0, x1, y1, colour, line_width, heads))
+
+    def add_label(self, text: str, x: float, y: float, align: str = 'left', rotate: float = 0.0,
+                  font_size: float = CHART_FONT_SIZE) -> None:
+        if align not in ('left', 'center', 'right'):
+            raise ValueError('Unknown alignment "{}"'.format(align))
+        self.labels.append(Label(text, x, y, align, rotate, font_size))
+
+    def _ranges(self) -> typing.Tuple[typing.Tuple[float, float, float], typing.Tuple[float, float, float]]:
+        x_values = _finite(*(a for s in self.series for a in (s.x, s.x_low, s.x_high)))
+        y_values = _finite(
+            *(a for s in self.series for a in ((None if s.style == 'filledcurves' else s.y), s.y_low, s.y_high))
+        )
+        return _axis_range(x_values, self.xrange, self.xtics), _axis_range(y_values, self.yrange, self.ytics)
+
+    def render(self) -> str:
+        """Returns the chart as an SVG document."""
+        (x_start, x_end, x_step), (y_start, y_end, y_step) = self._ranges()
+        left, right, top, bottom = CHART_MARGINS
+        plot_left, plot_right = left, self.width - right
+        plot_top, plot_bottom = top, self.height - bottom
+
+        def px(x):
+            return plot_left + (np.asarray(x, dtype=np.float64) - x_start) / (x_end - x_start) * (plot_right - plot_left)
+
+        def py(y):
+            return plot_bottom - (np.asarray(y, dtype=np.float64) - y_start) / (y_end - y_start) * (plot_bottom - plot_top)
+
+        result = [
+            '<?xml version="1.0" encoding="utf-8" standalone="no"?>',
+            '<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}"'
+            ' font-family="Arial" font-size="{f}">'.format(w=self.width, h=self.height, f=CHART_FONT_SIZE),
+            '<rect x="0" y="0" width="{}" height="{}" fill="white"/>'.format(self.width, self.height),
+            '<defs><clipPath id="plot_area"><rect x="{}" y="{}" width="{}" height="{}"/></clipPath></defs>'.format(
+                plot_left, plot_top, plot_right - plot_left, plot_bottom - plot_top
+            ),
+        ]
+        result.extend(self._render_axes(px, py, (x_start, x_end, x_step), (y_start, y_end, y_step)))
+        result.append('<g clip-path="url(#plot_area)">')
+        for series in self.series:
+            result.extend(_render_series(series, px, py))
+        result.append('</g>')
+        for arrow in self.arrows:
+            result.extend(_render_arrow(arrow, px, py))
+        for label in self.labels:
+            result.append(_render_text(label.text, float(px(label.x)), float(py(label.y)), label.align,
+                                       label.rotate, label.font_size))
+        if self.key:
+            result.extend(self._render_key(plot_right, plot_top))
+        result.append('</svg>')
+        return '\n'.join(result) + '\n'
+
+    def _render_axes(self, px, py, x_axis, y_axis) -> typing.List[str]:
+        left, right, top, bottom = CHART_MARGINS
+        plot_left, plot_right = left, self.width - right
+        plot_top, plot_bottom = top, self.height - bottom
+        result = []
+        for x in _tics(*x_axis):
+            x_px = float(px(x))
+            if self.grid:
+                result.append(_line(x_px, plot_top, x_px, plot_bottom, '#a0a0a0', 0.5, ' stroke-dasharray="2,4"'))
+            result.append(_line(x_px, plot_bottom, x_px, plot_bottom - 6, '#000000', 1.0))
+            result.append(_render_text(_format_tic(x), x_px, plot_bottom + 16, 'center'))
+        for y in _tics(*y_axis):
+            y_px = float(py(y))
+            if self.grid:
+                result.append(_line(plot_left, y_px, plot_right, y_px, '#a0a0a0', 0.5, ' stroke-dasharray="2,4"'))
+            result.append(_line(plot_left, y_px, plot_left + 6, y_px, '#000000', 1.0))
+            result.append(_render_text(_format_tic(y), plot_left - 8, y_px + 4, 'right'))
+        result.append(
+            '<rect x="{:.2f}" y="{:.2f}" width="{:.2f}" height="{:.2f}" fill="none" stroke="black"/>'.format(
+                plot_left, plot_top, plot_right - plot_left, plot_bottom - plot_top
+            )
+        )
+        if self.title:
+            result.append(_render_text(self.title, (plot_left + plot_right) / 2, top - 16, 'center'))
+        if self.xlabel:
+            result.append(_render_text(self.xlabel, (plot_left + plot_right) / 2, self.height - 12, 'center'))
+        if self.ylabel:
+            result.append(_render_text(self.ylabel, 16, (plot_top + plot_bottom) / 2, 'center', 90.0))
+        return result
+
+    def _render_key(self, plot_right: float, plot_top: float) -> typing.List[str]:
+        result = []
+        y = plot_top + 16
+        for series in self.series:
+            if not series.title:
+                continue
+            result.append(_render_text(series.title, plot_right - 50, y + 4, 'right'))
+            if series.style in ('lines', 'linespoints', 'filledcurves'):
+                result.append(_line(plot_right - 42, y, plot_right - 10, y, series.colour, series.line_width))
+            if series.style != 'lines' and series.style != 'filledcurves':
+                result.append(_point(plot_right - 26, y, series.colour, series.point_size))
+            y += 16
+        return result
+
+
+def _line(x0: float, y0: float, x1: float, y1: float, colour: str, width: float, extra: str = '') -> str:
+    return '<line x1="{:.2f}" y1="{:.2f}" x2="{:.2f}" y2="{:.2f}" stroke="{}" stroke-width="{:g}"{}/>'.format(
+        x0, y0, x1, y1, colour, width, extra
+    )
+
+
+def _point(x: float, y: float, colour: str, size: float) -> str:
+    return '<circle cx="{:.2f}" cy="{:.2f}" r="{:.2f}" fill="none" stroke="{}"/>'.format(x, y, 3.0 * size, colour)
+
+
+def _render_text(text: str, x: float, y: float, align: str = 'left', rotate: float = 0.0,
+                 font_size: float = CHART_FONT_SIZE) -> str:
+    anchor = {'left': 'start', 'center': 'middle', 'right': 'end'}[align]
+    attributes = 'x="{:.2f}" y="{:.2f}" text-anchor="{}"'.format(x, y, anchor)
+    if font_size != CHART_FONT_SIZE:
+        attributes += ' font-size="{:g}"'.format(font_size)
+    if rotate:
+        attributes += ' transform="rotate({:g},{:.2f},{:.2f})"'.format(-rotate, x, y)
+    lines = text.split('\n')
+    if len(lines) == 1:
+        return '<text {}>{}</text>'.format(attributes, saxutils.escape(text))
+    spans = ''.join(
+        '<tspan x="{:.2f}" dy="{}">{}</tspan>'.format(x, '0' if i == 0 else '1.2em', saxutils.escape(line))
+        for i, line in enumerate(lines)
+    )
+    return '<text {}>{}</text>'.format(attributes, spans)
+
+
+def _render_series(series: Series, px, py) -> typing.List[str]:
+    result = []
+    if series.style in ('lines', 'linespoints'):
+        for run in _split_finite(series.x, series.y):
+            points = ' '.join('{:.2f},{:.2f}'.format(x, y) for x, y in zip(px(series.x[run]), py(series.y[run])))
+            result.append('<polyline points="{}" fill="none" stroke="{}" stroke-width="{:g}"/>'.format(
+                points, series.colour, series.line_width
+            ))
+    if series.style in ('points', 'linespoints', 'yerrorbars', 'xyerrorbars'):
+        ok = np.isfinite(series.x) & np.isfinite(series.y)
+        for x, y in zip(px(series.x[ok]), py(series.y[ok])):
+            result.append(_point(x, y, series.colour, series.point_size))
+    if series.style in ('yerrorbars', 'xyerrorbars'):
+        ok = np.isfinite(series.x) & np.isfinite(series.y_low) & np.isfinite(series.y_high)
+        for x, y0, y1 in zip(px(series.x[ok]), py(series.y_low[ok]), py(series.y_high[ok])):
+            result.append(_line(x, y0, x, y1, series.colour, series.line_width))
+            result.append(_line(x - 3, y0, x + 3, y0, series.colour, series.line_width))
+            result.append(_line(x - 3, y1, x + 3, y1, series.colour, series.line_width))
+    if series.style == 'xyerrorbars':
+        ok = np.isfinite(series.y) & np.isfinite(series.x_low) & np.isfinite(series.x_high)
+        for y, x0, x1 in zip(py(series.y[ok]), px(series.x_low[ok]), px(series.x_high[ok])):
+            result.append(_line(x0, y, x1, y, series.colour, series.line_width))
+            result.append(_line(x0, y - 3, x0, y + 3, series.colour, series.line_width))
+            result.append(_line(x1, y - 3, x1, y + 3, series.colour, series.line_width))
+    if series.style == 'boxxyerror':
+        ok = np.all([np.isfinite(a) for a in (series.x_low, series.x_high, series.y_low, series.y_high)], axis=0)
+        for x0, x1, y0, y1 in zip(px(series.x_low[ok]), px(series.x_high[ok]),
+                                  py(series.y_low[ok]), py(series.y_high[ok])):
+            result.append(
+                '<rect x="{:.2f}" y="{:.2f}" width="{:.2f}" height="{:.2f}" fill="none" stroke="{}"'
+                ' stroke-width="{:g}"/>'.format(
+                    min(x0, x1), min(y0, y1), abs(x1 - x0), abs(y1 - y0), series.colour, series.line_width
+                )
+            )
+    if series.style == 'filledcurves':
+        for run in _split_finite(series.x, series.y_low, series.y_high):
+            x = px(series.x[run])
+            outline = list(zip(x, py(series.y_low[run]))) + list(zip(x[::-1], py(series.y_high[run])[::-1]))
+            result.append('<polygon points="{}" fill="{}" fill-opacity="0.3" stroke="none"/>'.format(
+                ' '.join('{:.2f},{:.2f}'.format(x, y) for x, y in outline), series.colour
+            ))
+    return result
+
+
+def _render_arrow(arrow: Arrow, px, py) -> typing.List[str]:
+    x0, y0, x1, y1 = float(px(arrow.x0)), float(py(arrow.y0)), float(px(arrow.x1)), float(py(arrow.y1))
+    result = [_line(x0, y0, x1, y1, arrow.colour, arrow.line_width)]
+    ends = [] if arrow.heads == 0 else [(x0, y0, x1, y1)] if arrow.heads == 1 else [(x0, y0, x1, y1),
+                                                                                    (x1, y1, x0, y0)]
+    for xa, ya, xb, yb in ends:
+        angle = math.atan2(yb - ya, xb - xa)
+        head = [
+            (xb - 10 * math.cos(angle + sign * math.radians(15)), yb - 10 * math.sin(angle + sign * math.radians(15)))
+            for sign in (-1, 1)
+        ]
+        result.append('<polygon points="{:.2f},{:.2f} {:.2f},{:.2f} {:.2f},{:.2f}" fill="{}"/>'.format(
+            xb, yb, head[0][0], head[0][1], head[1][0], head[1][1], arrow.colour
+        ))
+    return result
+
+
+#============================== Rendering gnuplot scripts ==========================
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.Pow: operator.pow, ast.Mod: operator.mod,
+}
+_UNARY_OPERATORS = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+#: gnuplot functions that can be used in expressions.
+_FUNCTIONS = {
+    'abs': np.abs, 'sqrt': np.sqrt, 'exp': np.exp, 'log': np.log, 'log10': np.log10,
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'atan': np.arctan, 'atan2': np.arctan2,
+}
+
+
+class _Function(collections.namedtuple('_Function', 'parameters, expression')):
+    """A gnuplot user defined function such as f(x) = a + b * x"""
+    __slots__ = ()
+
+
+def _parse_expression(text: str) -> ast.Expression:
+    """Parses a gnuplot expression, $n is column n."""
+    return ast.parse(re.sub(r'\$(\d+)', r'_column_\1', text.strip()), mode='eval')
+
+
+def _evaluate(node: ast.AST, variables: typing.Dict[str, typing.Any], columns: np.ndarray = None):
+    """Evaluates a parsed expression with the variables and the 2D data array columns.
+    Only numbers, arithmetic, variables, columns and functions are allowed."""
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body, variables, columns)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.Name):
+        if node.id.startswith('_column_') and columns is not None:
+            column = int(node.id[len('_column_'):])
+            return columns[:, column - 1] if column <= columns.shape[1] else math.nan
+        if node.id in variables:
+            return variables[node.id]
+        raise ValueError('Unknown variable "{}"'.format(node.id))
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        return _BINARY_OPERATORS[type(node.op)](
+            _evaluate(node.left, variables, columns), _evaluate(node.right, variables, columns)
+        )
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        return _UNARY_OPERATORS[type(node.op)](_evaluate(node.operand, variables, columns))
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        args = [_evaluate(arg, variables, columns) for arg in node.args]
+        function = variables.get(node.func.id)
+        if isinstance(function, _Function):
+            if len(args) != len(function.parameters):
+                raise ValueError('Function "{}" needs {} arguments'.format(node.func.id, len(function.parameters)))
+            return _evaluate(function.expression, dict(variables, **dict(zip(function.parameters, args))), columns)
+        if node.func.id in _FUNCTIONS:
+            return _FUNCTIONS[node.func.id](*args)
+        raise ValueError('Unknown function "{}"'.format(node.func.id))
+    raise ValueError('Unsupported expression "{}"'.format(ast.dump(node)))
+
+
+def evaluate(text: str, variables: typing.Dict[str, typing.Any] = None, columns: np.ndarray = None):
+    """Evaluates the gnuplot expression text, such as '0.5*($5-$4)', with the 2D data array columns."""
+    return _evaluate(_parse_expression(text), variables or {}, columns)
+
+
+def _strip_comment(line: str) -> str:
+    """Removes a # comment that is not inside quotes."""
+    quote = None
+    for i, c in enumerate(line):
+        if quote:
+            if c == '\\' and quote == '"':
+                continue
+            if c == quote and (i == 0 or line[i - 1] != '\\'):
+                quote = None
+        elif c in '"\'':
+            quote = c
+        elif c == '#':
+            return line[:i]
+    return line
+
+
+def _split_top_level(text: str, separator: str) -> typing.List[str]:
+    """Splits text on separator outside of quotes and brackets."""
+    result = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, c in enumerate(text):
+        if quote:
+            if c == quote and text[i - 1] != '\\':
+                quote = None
+        elif c in '"\'':
+            quote = c
+        elif c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        elif c == separator and depth == 0:
+            result.append(text[start:i])
+            start = i + 1
+    result.append(text[start:])
+    return result
+
+
+def _tokens(text: str) -> typing.List[str]:
+    """Splits a command into words on white space outside of quotes and brackets so a quoted string or an
+    expression such as 1:($5 - $4) is one token."""
+    result = []
+    for word in _split_top_level(text.replace('\t', ' '), ' '):
+        if word:
+            result.append(word)
+    return result
+
+
+def _unquote(token: str) -> str:
+    if token.startswith('"'):
+        return token[1:-1].replace('\\n', '\n').replace('\\"', '"')
+    if token.startswith("'"):
+        return token[1:-1]
+    return token
+
+
+def _commands(script: str) -> typing.List[str]:
+    """Returns the commands in a script, joining continuation lines and removing comments."""
+    commands = []
+    pending = ''
+    for line in script.splitlines():
+        line = _strip_comment(line).rstrip()
+        if line.endswith('\\'):
+            pending += line[:-1] + ' '
+            continue
+        line = (pending + line).strip()
+        pending = ''
+        if line:
+            commands.extend(c.strip() for c in _split_top_level(line, ';') if c.strip())
+    return commands
+
+
+def _range(text: str, variables) -> typing.Tuple[typing.Optional[float], typing.Optional[float]]:
+    """Parses a gnuplot range such as [0:3700] or [*:100]."""
+    match = re.match(r'\[\s*([^:]*?)\s*:\s*([^\]]*?)\s*\]', text)
+    if match is None:
+        raise ValueError('Can not parse range "{}"'.format(text))
+    return tuple(
+        None if value in ('', '*') else float(evaluate(value, variables)) for value in match.groups()
+    )
+
+
+def _style_name(token: str) -> str:
+    """Expands a gnuplot style abbreviation such as 'l', 'line' or 'p'."""
+    if token in ('l', 'line'):
+        return 'lines'
+    for name in SERIES_STYLES:
+        if name.startswith(token):
+            return name
+    raise ValueError('Unsupported plot style "{}"'.format(token))
+
+
+def _line_options(tokens: typing.List[str], line_styles, variables) -> typing.Dict[str, typing.Any]:
+    """Parses lt, ls, lc rgb, lw and ps options, unknown options are ignored."""
+    options = {}
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in ('lt', 'linetype') and i + 1 < len(tokens):
+            options['colour'] = line_colour(int(evaluate(tokens[i + 1], variables)))
+            i += 1
+        elif token in ('ls', 'linestyle') and i + 1 < len(tokens):
+            number = int(evaluate(tokens[i + 1], variables))
+            options.update(line_styles.get(number, {'colour': line_colour(number)}))
+            i += 1
+        elif token in ('lc', 'linecolor') and i + 2 < len(tokens) and tokens[i + 1] == 'rgb':
+            options['colour'] = _unquote(tokens[i + 2])
+            i += 2
+        elif token in ('lw', 'linewidth') and i + 1 < len(tokens):
+            options['line_width'] = float(evaluate(tokens[i + 1], variables))
+            i += 1
+        elif token in ('ps', 'pointsize') and i + 1 < len(tokens):
+            options['point_size'] = float(evaluate(tokens[i + 1], variables))
+            i += 1
+        i += 1
+    return options
+
+
+def load_data(text: str) -> np.ndarray:
+    """Reads gnuplot whitespace separated data with # comments and NaN as a 2D array."""
+    rows = []
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].split()
+        if line:
+            rows.append([float(v) for v in line])
+    if not rows:
+        return np.empty((0, 0))
+    width = max(len(row) for row in rows)
+    return np.array([row + [math.nan] * (width - len(row)) for row in rows], dtype=np.float64)
+
+
+def _plot_element(text: str, chart: Chart, data: typing.Callable[[str], np.ndarray], line_styles,
+                  variables, point_size: float, missing: bool = False) -> None:
+    """Adds a series for the element of a plot command.
+    If missing is True, from 'set datafile missing "NaN"', lines join across missing points as they do in gnuplot."""
+    tokens = _tokens(text)
+    if not tokens or not tokens[0].startswith(('"', "'")):
+        raise ValueError('Only data files can be plotted, not "{}"'.format(text))
+    columns = data(_unquote(tokens[0]))
+    if columns.size == 0:
+        return
+    using = ['1', '2']
+    title = None
+    style = 'points'
+    rest = []
+    i = 1
+    while i < len(tokens):
+        token = tokens[i]
+        if token in ('using', 'u') and i + 1 < len(tokens):
+            using = _split_top_level(tokens[i + 1], ':')
+            i += 1
+        elif token in ('title', 't') and i + 1 < len(tokens):
+            title = _unquote(tokens[i + 1])
+            i += 1
+        elif token == 'notitle':
+            title = ''
+        elif token in ('with', 'w') and i + 1 < len(tokens):
+            style = _style_name(tokens[i + 1])
+            i += 1
+        elif token == 'smooth' and i + 1 < len(tokens):
+            warnings.warn('Smoothing "smooth {}" is not supported, the data is drawn as is'.format(tokens[i + 1]))
+            i += 1
+        elif token in ('axes', 'axis') and i + 1 < len(tokens):
+            i += 1
+        else:
+            rest.append(token)
+        i += 1
+    values = []
+    for item in using:
+        item = item.strip()
+        if item.startswith('('):
+            value = evaluate(item, variables, columns)
+        elif int(item) <= columns.shape[1]:
+            value = columns[:, int(item) - 1]
+        else:
+            # gnuplot plots nothing for a missing column.
+            value = math.nan
+        values.append(np.broadcast_to(np.asarray(value, dtype=np.float64), (len(columns),)))
+    if len(using) < 1 + _STYLE_COLUMNS[style]:
+        raise ValueError('Style "{}" needs {} columns not {}'.format(style, 1 + _STYLE_COLUMNS[style], len(using)))
+    if title is None:
+        title = '"{}" using {}'.format(_unquote(tokens[0]), ':'.join(using))
+    options = {'point_size': point_size}
+    options.update(_line_options(rest, line_styles, variables))
+    if missing and style in ('lines', 'linespoints'):
+        ok = np.isfinite(values[0]) & np.isfinite(values[1])
+        values = [value[ok] for value in values]
+    x = values[0]
+    if style in ('xyerrorbars', 'boxxyerror'):
+        chart.add_series(x, values[1], title, style, x_low=values[2], x_high=values[3],
+                         y_low=values[4], y_high=values[5], **options)
+    elif style == 'yerrorbars':
+        chart.add_series(x, values[1], title, style, y_low=values[2], y_high=values[3], **options)
+    elif style == 'filledcurves':
+        chart.add_series(x, values[1], title, style, y_low=values[1], y_high=values[2], **options)
+    else:
+        chart.add_series(x, values[1], title, style, **options)
+
+
+def gnuplot_chart(script: str,
+                  data: typing.Union[typing.Dict[str, np.ndarray], typing.Callable[[str], np.ndarray]],
+                  ) -> typing.Tuple[str, Chart]:
+    """
+    Creates a Chart from a gnuplot script. data is either a dictionary of data file name to 2D array or a
+    function that takes a data file name and returns a 2D array.
+    Returns the output file name from 'set output' and the chart.
+    """
+    if isinstance(data, dict):
+        data = data.__getitem__
+    chart = Chart()
+    output = ''
+    variables: typing.Dict[str, typing.Any] = {}
+    line_styles: typing.Dict[int, typing.Dict[str, typing.Any]] = {}
+    point_size = 1.0
+    missing = False
+    for command in _commands(script):
+        tokens = _tokens(command)
+        match = re.match(r'^([A-Za-z_]\w*)\s*(\(([^)]*)\))?\s*=(?!=)\s*(.+)$', command)
+        if match:
+            name, _, parameters, expression = match.groups()
+            if parameters is None:
+                variables[name] = evaluate(expression, variables)
+            else:
+                variables[name] = _Function(
+                    tuple(p.strip() for p in parameters.split(',')), _parse_expression(expression)
+                )
+        elif tokens[0] == 'plot':
+            for element in _split_top_level(command[len('plot'):], ','):
+                _plot_element(element, chart, data, line_styles, variables, point_size, missing)
+        elif tokens[0] == 'set' and len(tokens) > 1:
+            _set(chart, tokens[1], tokens[2:], variables, line_styles)
+            if tokens[1] == 'output' and len(tokens) > 2:
+                output = _unquote(tokens[2])
+            elif tokens[1] == 'pointsize' and len(tokens) > 2:
+                point_size = float(evaluate(tokens[2], variables))
+            elif tokens[1] == 'datafile' and len(tokens) > 2 and tokens[2] == 'missing':
+                missing = len(tokens) > 3 and _unquote(tokens[3]).lower() == 'nan'
+        elif tokens[0] == 'reset' or tokens[0] == 'unset' and len(tokens) > 1 and tokens[1] == 'datafile':
+            missing = False
+        # Other commands such as unset are ignored.
+    return output, chart
+
+
+def _set(chart: Chart, name: str, args: typing.List[str], variables, line_styles) -> None:
+    """Applies a gnuplot set command, unsupported ones are ignored."""
+    if name in ('title', 'xlabel', 'ylabel') and args:
+        setattr(chart, name, _unquote(args[0]))
+    elif name in ('xrange', 'yrange') and args:
+        setattr(chart, name, _range(args[0], variables))
+    elif name in ('xtics', 'ytics'):
+        step = None
+        if args and args[0] not in ('autofreq', 'auto'):
+            try:
+                step = float(evaluate(args[0], variables))
+            except (ValueError, SyntaxError):
+                step = None
+        setattr(chart, name, step)
+    elif name == 'grid':
+        chart.grid = True
+    elif name == 'key':
+        chart.key = not (args and args[0] == 'off')
+        unsupported = [arg for arg in args if arg not in ('on', 'off')]
+        if unsupported:
+            warnings.warn('Key options "{}" are not supported'.format(' '.join(unsupported)))
+    elif name == 'terminal' and 'size' in args:
+        size = args[args.index('size') + 1]
+        width, height = size.split(',')
+        chart.width, chart.height = int(float(width)), int(float(height))
+    elif name == 'style' and len(args) > 1 and args[0] == 'line':
+        line_styles[int(args[1])] = _line_options(args[2:], line_styles, variables)
+    elif name == 'arrow':
+        _set_arrow(chart, args, variables, line_styles)
+    elif name == 'label':
+        _set_label(chart, args, variables)
+
+
+def _coordinates(text: str, variables) -> typing.Tuple[float, float]:
+    x, y = _split_top_level(text, ',')
+    return float(evaluate(x, variables)), float(evaluate(y, variables))
+
+
+def _set_arrow(chart: Chart, args: typing.List[str], variables, line_styles) -> None:
+    if 'from' not in args or 'to' not in args:
+        return
+    x0, y0 = _coordinates(args[args.index('from') + 1], variables)
+    x1, y1 = _coordinates(args[args.index('to') + 1], variables)
+    heads = 0 if 'nohead' in args else 2 if 'heads' in args else 1
+    options = _line_options(args, line_styles, variables)
+    chart.add_arrow(x0, y0, x1, y1, options.get('colour', '#000000'), options.get('line_width', 1.0), heads)
+
+
+def _set_label(chart: Chart, args: typing.List[str], variables) -> None:
+    if args and re.match(r'^\d+$', args[0]):
+        args = args[1:]
+    if not args or 'at' not in args:
+        return
+    text = _unquote(args[0])
+    x, y = _coordinates(args[args.index('at') + 1], variables)
+    align = 'left'
+    for option in ('left', 'center', 'centre', 'right'):
+        if option in args:
+            align = 'center' if option == 'centre' else option
+    rotate = 0.0
+    if 'rotate' in args:
+        i = args.index('rotate')
+        rotate = 90.0
+        if i + 2 < len(args) and args[i + 1] == 'by':
+            rotate = float(evaluate(args[i + 2], variables))
+    font_size = CHART_FONT_SIZE
+    if 'font' in args:
+        font = _unquote(args[args.index('font') + 1])
+        if ',' in font and font.split(',')[1].strip():
+            font_size = float(font.split(',')[1])
+    chart.add_label(text, x, y, align, rotate, font_size)
+
+
+def render_gnuplot(script: str,
+                   data: typing.Union[typing.Dict[str, np.ndarray], typing.Callable[[str], np.ndarray]],
+                   ) -> typing.Tuple[str, str]:
+    """Renders a gnuplot script as SVG, see gnuplot_chart(). Returns the output file name and the SVG."""
+    output, chart = gnuplot_chart(script, data)
+    return output, chart.render()
+
+
+def render_gnuplot_file(path: str) -> str:
+    """Renders the gnuplot script at path, reading data files relative to it, and writes the output SVG file.
+    Returns the path of the SVG file."""
+    directory = os.path.dirname(path)
+
+    def read_data(name: str) -> np.ndarray:
+        with open(os.path.join(directory, name)) as infile:
+            return load_data(infile.read())
+
+    with open(path) as infile:
+        output, svg = render_gnuplot(infile.read(), read_data)
+    if not output:
+        output = os.path.splitext(os.path.basename(path))[0] + '.svg'
+    output_path = os.path.join(directory, output)
+    with io.open(output_path, 'w') as outfile:
+        outfile.write(svg)
+    return output_path
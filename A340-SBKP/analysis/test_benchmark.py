@@ -0,0 +1,173 @@
+"""
+Benchmarks of the numeric kernels, these need pytest-benchmark and are skipped if it is not installed.
+Each kernel is run at a realistic input size and that size scaled by BENCHMARK_SCALE.
+
+Save a baseline:
+PYTHONPATH=. pytest analysis/test_benchmark.py --benchmark-only --benchmark-sort=name --benchmark-save=benchmark_00
+
+Compare against the saved baseline, failing if any kernel is slower by more than the threshold:
+PYTHONPATH=. pytest analysis/test_benchmark.py --benchmark-only --benchmark-sort=name --benchmark-compare=0001 --benchmark-compare-fail=mean:10%
+
+Benchmark data is in .benchmarks
+Use --benchmark-skip to skip these when running the other tests.
+"""
+import math
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from analysis import video_analysis
+from analysis import video_data
+from analysis import video_utils
+
+#: Realistic input size, one sample per video frame.
+BENCHMARK_SIZE = video_data.FRAMES_PER_SECOND * video_data.TIME_VIDEO_MAX_AS_INT
+#: Scale factors of BENCHMARK_SIZE, realistic and scaled up.
+BENCHMARK_SCALES = (1, 100)
+
+#: A representative cubic ground speed fit.
+BENCHMARK_GS_FIT = video_analysis.ground_speed_curve_fit(video_data.ErrorDirection.MID)
+
+
+def _times(scale: int) -> np.ndarray:
+    return np.linspace(0.0, video_data.TIME_VIDEO_END.time, BENCHMARK_SIZE * scale)
+
+
+def _xy(scale: int) -> np.ndarray:
+    """Returns a (n, 2) array of x/y positions around the runway."""
+    rng = np.random.default_rng(0)
+    return np.column_stack(
+        (rng.uniform(-1000, 4000, BENCHMARK_SIZE * scale), rng.uniform(-2000, 1000, BENCHMARK_SIZE * scale))
+    )
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_interpolate(benchmark, scale):
+    xS = list(range(BENCHMARK_SIZE * scale))
+    yS = [2.0 * x for x in xS]
+    x_values = list(np.linspace(-1.0, BENCHMARK_SIZE * scale, BENCHMARK_SIZE * scale))
+
+    def run():
+        return [video_utils.interpolate(xS, yS, x) for x in x_values]
+
+    result = benchmark(run)
+    assert len(result) == len(x_values)
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_aspect_intersection(benchmark, scale):
+    d0 = np.zeros(BENCHMARK_SIZE * scale)
+    d1 = np.linspace(100.0, 3000.0, BENCHMARK_SIZE * scale)
+    b0 = np.full_like(d0, 30.0)
+    b1 = np.full_like(d0, 60.0)
+
+    def run():
+        return [video_utils.aspect_intersection(*args) for args in zip(d0, b0, d1, b1)]
+
+    result = benchmark(run)
+    assert len(result) == len(d0)
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_aspect_intersection_array(benchmark, scale):
+    d0 = np.zeros(BENCHMARK_SIZE * scale)
+    d1 = np.linspace(100.0, 3000.0, BENCHMARK_SIZE * scale)
+    b0 = np.full_like(d0, 30.0)
+    b1 = np.full_like(d0, 60.0)
+    d, y, status = benchmark(video_utils.aspect_intersection_array, d0, b0, d1, b1)
+    assert np.all(status == video_utils.TriangleStatus.OK)
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_lat_long_to_xy(benchmark, scale):
+    # This is used on the Google Earth positions rather than every frame.
+    positions = list(video_data.GOOGLE_EARTH_POSITIONS_LAT_LONG.values()) * scale
+    datum = video_data.GOOGLE_EARTH_DATUM_LAT_LONG
+
+    def run():
+        return [video_utils.lat_long_to_xy(datum, video_data.GOOGLE_EARTH_X_AXIS, pos) for pos in positions]
+
+    result = benchmark(run)
+    assert len(result) == len(positions)
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_xy_to_lat_long(benchmark, scale):
+    xy = _xy(scale)
+    lat, long = benchmark(
+        video_utils.xy_to_lat_long,
+        video_data.GOOGLE_EARTH_DATUM_LAT_LONG,
+        video_data.GOOGLE_EARTH_X_AXIS,
+        video_utils.XY(xy[:, 0], xy[:, 1]),
+    )
+    assert len(lat) == len(xy)
+
+
+@pytest.mark.parametrize(
+    'function',
+    (
+        video_utils.polynomial_3,
+        video_utils.polynomial_3_integral_from_zero,
+        video_utils.polynomial_3_differential,
+    )
+)
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_polynomial_3(benchmark, function, scale):
+    t = _times(scale)
+    result = benchmark(function, t, *BENCHMARK_GS_FIT)
+    assert result.shape == t.shape
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_polynomial_3_integral(benchmark, scale):
+    t = _times(scale)
+    result = benchmark(video_utils.polynomial_3_integral, 0.0, t, *BENCHMARK_GS_FIT)
+    assert result.shape == t.shape
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_intersect_all_pairs(benchmark, scale):
+    # Pairs grow as the square so scale the number of lines by the root to scale the work.
+    count = int(len(video_analysis.full_transit_lines()[0]) * math.sqrt(scale))
+    xy = _xy(1)
+    lines = video_utils.TransitLines(xy[:count, 0], np.zeros(count), xy[:count, 0] + 100.0, xy[:count, 1])
+    i, j, intersections = benchmark(video_utils.intersect_all_pairs, lines)
+    assert len(i) == count * (count - 1) // 2
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_observer_position_combinations_from_aspects(benchmark, monkeypatch, scale):
+    # Pairs grow as the square so repeat the aspects by the root of the scale.
+    from_wing_tips = video_analysis.observer_time_distance_bearing_from_wing_tips
+    monkeypatch.setattr(
+        video_analysis, 'observer_time_distance_bearing_from_wing_tips',
+        lambda *args: np.tile(from_wing_tips(*args), (int(math.sqrt(scale)), 1)),
+    )
+    result, count = benchmark(video_analysis.observer_position_combinations_from_aspects)
+    assert len(result) <= count
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_aspect_intersections(benchmark, scale):
+    # Pairs grow as the square so repeat the aspects by the root of the scale.
+    time_distance_aspect_array = video_analysis.observer_time_distance_bearing_from_wing_tips(
+        BENCHMARK_GS_FIT, video_data.ErrorDirection.MID
+    )
+    time_distance_aspect_array = np.tile(time_distance_aspect_array, (int(math.sqrt(scale)), 1))
+    result, count = benchmark(video_analysis._aspect_intersections, time_distance_aspect_array, 0.0)
+    assert len(result) <= count
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_observer_position_combinations_from_fits(benchmark, scale):
+    # Pairs grow as the square of the number of samples.
+    result, count = benchmark(
+        video_analysis.observer_position_combinations_from_fits, 0.0, 1.0 / math.sqrt(scale)
+    )
+    assert len(result) <= count
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from analysis import derived
+from analysis import plot_common
+from analysis import plot_constants
+from analysis import video_analysis
+from analysis import video_data
+
+
+class Counter:
+    def __init__(self, fn):
+        self.fn = fn
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.fn()
+
+
+def test_registry_computes_once():
+    registry = derived.Registry()
+    fn = Counter(lambda: 42)
+    registry.register('a', fn)
+    assert registry.get('a') == 42
+    assert registry.get('a') == 42
+    assert fn.calls == 1
+    assert registry.stats() == {'a': derived.DerivedStats(1, 1)}
+
+
+def test_registry_dependency_recomputed():
+    registry = derived.Registry()
+    values = {'x': 1}
+    fn_a = Counter(lambda: values['x'])
+    fn_b = Counter(lambda: registry.get('a') * 10)
+    registry.register('a', fn_a, inputs=(lambda: values['x'],))
+    registry.register('b', fn_b, depends=('a',))
+    assert registry.get('b') == 10
+    assert registry.get('b') == 10
+    assert (fn_a.calls, fn_b.calls) == (1, 1)
+    # Change an input of the dependency.
+    values['x'] = 2
+    assert registry.get('b') == 20
+    assert (fn_a.calls, fn_b.calls) == (2, 2)
+
+
+def test_registry_input_unchanged():
+    registry = derived.Registry()
+    values = {'x': (1, 2)}
+    fn = Counter(lambda: sum(values['x']))
+    registry.register('a', fn, inputs=(lambda: values['x'],))
+    registry.get('a')
+    # Equal but not the same object.
+    values['x'] = (1, 2)
+    registry.get('a')
+    assert fn.calls == 1
+
+
+def test_registry_invalidate():
+    registry = derived.Registry()
+    fn_a = Counter(lambda: 1)
+    fn_b = Counter(lambda: registry.get('a') + 1)
+    registry.register('a', fn_a)
+    registry.register('b', fn_b, depends=('a',))
+    registry.get('b')
+    registry.invalidate('a')
+    assert registry.get('b') == 2
+    assert (fn_a.calls, fn_b.calls) == (2, 2)
+    registry.invalidate()
+    registry.get('b')
+    assert (fn_a.calls, fn_b.calls) == (3, 3)
+
+
+def test_registry_register_errors():
+    registry = derived.Registry()
+    registry.register('a', lambda: 1)
+    with pytest.raises(ValueError):
+        registry.register('a', lambda: 1)
+    with pytest.raises(ValueError):
+        registry.register('b', lambda: 1, depends=('c',))
+    with pytest.raises(KeyError):
+        registry.get('c')
+
+
+def test_registry_stats_lines():
+    registry = derived.Registry()
+    registry.register('a', lambda: 1)
+    registry.get('a')
+    registry.get('a')
+    registry.get('a')
+    lines = registry.stats_lines()
+    assert len(lines) == 2
+    assert lines[1].split() == ['a', '2', '1']
+    registry.reset_stats()
+    assert registry.stats() == {'a': derived.DerivedStats(0, 0)}
+
+
+@pytest.mark.parametrize('err', list(video_data.ErrorDirection))
+def test_get_gs_fit(err):
+    offset = plot_constants.GROUND_SPEED_OFFSETS[err.value + 1]
+    assert np.all(plot_common.get_gs_fit(err) == video_analysis.ground_speed_curve_fit_with_offset(offset))
+
+
+def test_get_gs_fit_follows_offsets(monkeypatch):
+    offsets = tuple(v + 1.0 for v in plot_constants.GROUND_SPEED_OFFSETS)
+    monkeypatch.setattr(plot_constants, 'GROUND_SPEED_OFFSETS', offsets)
+    expected = video_analysis.ground_speed_curve_fit_with_offset(offsets[1])
+    assert np.all(plot_common.get_gs_fit(video_data.ErrorDirection.MID) == expected)
+    x_offset = video_data.RUNWAY_LEN_M - video_analysis.ground_speed_integral(
+        0, video_data.TIME_VIDEO_END_ASPHALT.time, expected
+    )
+    assert plot_common.x_offset() == x_offset
+
+
+def test_observer_position_mean_std():
+    expected = video_analysis.observer_position_mean_std_from_full_transits()
+    assert plot_common.observer_position_mean_std() == expected
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,120 @@
+import io
+import time
+
+import numpy as np
+import pytest
+
+from analysis import downsample
+from analysis import plot_common
+
+
+@pytest.mark.parametrize('count', (0, 1, 10, 100))
+def test_min_max_indices_small(count):
+    assert list(downsample.min_max_indices(np.arange(float(count)), 100)) == list(range(count))
+
+
+def test_min_max_indices_keeps_extremes():
+    values = np.zeros(10000)
+    values[1234] = 5.0
+    values[8765] = -7.0
+    indices = downsample.min_max_indices(values, 100)
+    assert len(indices) <= 104
+    assert 1234 in indices
+    assert 8765 in indices
+    assert indices[0] == 0
+    assert indices[-1] == len(values) - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_min_max_indices_keeps_nan_gaps():
+    values = np.sin(np.linspace(0.0, 20.0, 10000))
+    values[2000:3000] = np.nan
+    values[5001] = np.nan
+    indices = downsample.min_max_indices(values, 100)
+    for index in (1999, 2000, 2999, 3000, 5000, 5001, 5002):
+        assert index in indices
+    # NaN runs in the result are where they are in the original.
+    result = values[indices]
+    assert np.all(np.isnan(result) == np.isnan(values[indices]))
+
+
+def test_min_max_indices_columns():
+    values = np.zeros((10000, 2))
+    values[100, 0] = 1.0
+    values[9000, 1] = -1.0
+    indices = downsample.min_max_indices(values, 100)
+    assert 100 in indices
+    assert 9000 in indices
+
+
+def test_min_max_indices_no_columns():
+    assert list(downsample.min_max_indices(np.empty((1000, 0)), 100)) == [0, 999]
+
+
+def test_downsample_time_only():
+    t = np.linspace(0.0, 40.0, 1001)
+    result = downsample.downsample(t.reshape(-1, 1), 100)
+    assert result[0, 0] == t[0]
+    assert result[-1, 0] == t[-1]
+    for preserved in downsample.PRESERVED_TIMES:
+        assert np.any(np.isclose(result[:, 0], preserved, atol=t[1] - t[0]))
+
+
+@pytest.mark.parametrize(
+    'times, expected',
+    (
+        ((5.0,), [4, 5, 6]),
+        ((5.5,), [5, 6, 7]),
+        ((0.0,), [0, 1]),
+        ((9.0,), [8, 9]),
+        ((-1.0, 10.0), []),
+    )
+)
+def test_time_indices(times, expected):
+    t = np.arange(10.0)
+    assert list(downsample.time_indices(t, times)) == expected
+
+
+def test_downsample_preserved_times():
+    t = np.linspace(0.0, 40.0, 100001)
+    array = np.column_stack((t, np.sin(t)))
+    result = downsample.downsample(array, 200)
+    assert len(result) < 250
+    for preserved in downsample.PRESERVED_TIMES:
+        index = np.searchsorted(result[:, 0], preserved)
+        # The preserved time is bracketed by adjacent original samples.
+        assert result[index - 1, 0] < preserved <= result[index, 0]
+        assert result[index, 0] - result[index - 1, 0] <= t[1] - t[0] + 1e-9
+
+
+def test_downsample_unchanged():
+    array = np.arange(20.0).reshape(10, 2)
+    assert downsample.downsample(array, 10) is array
+
+
+def test_downsample_1d_raises():
+    with pytest.raises(ValueError):
+        downsample.downsample(np.arange(10.0), 5)
+
+
+def test_downsample_large_is_fast():
+    count = 10_000_000
+    array = np.column_stack((np.linspace(0.0, 40.0, count), np.random.default_rng(0).normal(size=count)))
+    tim_start = time.perf_counter()
+    result = downsample.downsample(array, 2000)
+    assert time.perf_counter() - tim_start < 2.0
+    assert len(result) <= 2020
+
+
+def test_gnuplot_write_arrays_max_points():
+    array = np.column_stack((np.arange(1000.0), np.arange(1000.0) % 7))
+    stream = io.StringIO()
+    plot_common.gnuplot_write_arrays(stream, array, max_points=100)
+    assert len(stream.getvalue().splitlines()) <= 110
+    stream = io.StringIO()
+    plot_common.gnuplot_write_arrays(stream, array)
+    assert len(stream.getvalue().splitlines()) == 1000
+
+
+if __name__ == '__main__':
+    pytest.main()
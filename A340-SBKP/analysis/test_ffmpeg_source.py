@@ -0,0 +1,167 @@
+import io
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+
+from analysis import ffmpeg_source
+from analysis import video_data
+
+WIDTH = 4
+HEIGHT = 2
+IMAGE_COUNT = 40
+
+# A stand in for ffmpeg that writes raw rgb24 frames with every byte the ffmpeg image number, starting at
+# image 1 or, with -ss, at the image of that time. It exits with 1 if the input file does not exist.
+# If FAKE_FFMPEG_STDERR is set it first writes that many bytes to stderr.
+FAKE_FFMPEG = textwrap.dedent(
+    """\
+    import os
+    import sys
+
+    args = sys.argv[1:]
+    sys.stderr.write('w' * int(os.environ.get('FAKE_FFMPEG_STDERR', '0')))
+    sys.stderr.flush()
+    path = args[args.index('-i') + 1]
+    if not os.path.exists(path):
+        sys.stderr.write('No such file')
+        sys.exit(1)
+    first = 1
+    if '-ss' in args:
+        first = round(float(args[args.index('-ss') + 1]) * {fps}) + {offset}
+    try:
+        for image in range(first, {count} + 1):
+            sys.stdout.buffer.write(bytes([image]) * {size})
+        sys.stdout.flush()
+    except BrokenPipeError:
+        pass
+    """
+).format(fps=video_data.FRAMES_PER_SECOND, offset=video_data.FFMPEG_FRAME_OFFSET, count=IMAGE_COUNT,
+         size=WIDTH * HEIGHT * 3)
+
+
+def _raw(count, shape=(HEIGHT, WIDTH, 3)):
+    return b''.join(bytes([i]) * int(np.prod(shape)) for i in range(count))
+
+
+@pytest.mark.parametrize('read_ahead', (1, 3, 100))
+def test_read_frames(read_ahead):
+    frames = list(ffmpeg_source.read_frames(io.BytesIO(_raw(10)), (HEIGHT, WIDTH, 3), read_ahead))
+    assert len(frames) == 10
+    for i, frame in enumerate(frames):
+        assert frame.shape == (HEIGHT, WIDTH, 3)
+        assert np.all(frame == i)
+
+
+def test_read_frames_incomplete():
+    with pytest.raises(ValueError):
+        list(ffmpeg_source.read_frames(io.BytesIO(_raw(3)[:-1]), (HEIGHT, WIDTH, 3)))
+
+
+def test_read_frames_close_early():
+    frames = ffmpeg_source.read_frames(io.BytesIO(_raw(100)), (HEIGHT, WIDTH, 3), 2)
+    assert np.all(next(frames) == 0)
+    frames.close()
+
+
+@pytest.mark.parametrize(
+    'seek_time, expected',
+    (
+        (None, ['ffmpeg', '-nostdin', '-loglevel', 'error', '-i', 'v.mp4']),
+        (1.5, ['ffmpeg', '-nostdin', '-loglevel', 'error', '-ss', '1.500000', '-i', 'v.mp4']),
+    )
+)
+def test_ffmpeg_command(seek_time, expected):
+    command = ffmpeg_source.ffmpeg_command('v.mp4', seek_time=seek_time)
+    assert command[:len(expected)] == expected
+    assert command[-5:] == ['-f', 'rawvideo', '-pix_fmt', 'rgb24', '-']
+
+
+def test_ffmpeg_command_pixel_format():
+    with pytest.raises(ValueError):
+        ffmpeg_source.ffmpeg_command('v.mp4', pixel_format='yuv420p')
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    path = tmp_path / 'ffmpeg'
+    path.write_text('#!{}\n{}'.format(sys.executable, FAKE_FFMPEG))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    video = tmp_path / 'video.mp4'
+    video.write_bytes(b'')
+    return str(path), str(video)
+
+
+@pytest.mark.parametrize(
+    'start, stop, exact',
+    (
+        (0, None, True),
+        (0, 5, True),
+        (10, 20, True),
+        (10, 20, False),
+        (video_data.VideoTime(0, 1, 0), None, True),
+        (video_data.VideoTime(0, 1, 0), video_data.VideoTime(0, 1, 2), False),
+    )
+)
+def test_iter_frames(fake_ffmpeg, start, stop, exact):
+    ffmpeg, video = fake_ffmpeg
+    frames = list(
+        ffmpeg_source.iter_frames(video, start, stop, exact=exact, size=(WIDTH, HEIGHT), ffmpeg=ffmpeg)
+    )
+    first = video_data.video_time_to_video_frame(start) if isinstance(start, video_data.VideoTime) else start
+    if stop is None:
+        last = IMAGE_COUNT - video_data.FFMPEG_FRAME_OFFSET + 1
+    else:
+        last = video_data.video_time_to_video_frame(stop) if isinstance(stop, video_data.VideoTime) else stop
+    assert [f.video_frame for f in frames] == list(range(first, last))
+    for frame in frames:
+        # Matches the ffmpeg image name for the frame.
+        assert video_data.video_time_to_ffmpeg_name(frame.video_time) == 'image{:06d}.png'.format(frame.image[0, 0, 0])
+
+
+def test_iter_frames_close_early(fake_ffmpeg):
+    ffmpeg, video = fake_ffmpeg
+    frames = ffmpeg_source.iter_frames(video, size=(WIDTH, HEIGHT), ffmpeg=ffmpeg, read_ahead=1)
+    assert next(frames).video_frame == 0
+    frames.close()
+
+
+def test_iter_frames_ffmpeg_fails(fake_ffmpeg):
+    ffmpeg, video = fake_ffmpeg
+    os.remove(video)
+    with pytest.raises(subprocess.CalledProcessError) as err:
+        list(ffmpeg_source.iter_frames(video, size=(WIDTH, HEIGHT), ffmpeg=ffmpeg))
+    assert err.value.stderr == b'No such file'
+
+
+def test_iter_frames_large_stderr(fake_ffmpeg, monkeypatch):
+    # More than a pipe buffer of stderr before any frames, this must not block ffmpeg.
+    monkeypatch.setenv('FAKE_FFMPEG_STDERR', str(1 << 20))
+    ffmpeg, video = fake_ffmpeg
+    frames = list(ffmpeg_source.iter_frames(video, size=(WIDTH, HEIGHT), ffmpeg=ffmpeg))
+    assert len(frames) == IMAGE_COUNT - video_data.FFMPEG_FRAME_OFFSET + 1
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='Requires ffmpeg')
+def test_iter_frames_ffmpeg(tmp_path):
+    video = str(tmp_path / 'test.mp4')
+    subprocess.run(
+        [
+            'ffmpeg', '-nostdin', '-loglevel', 'error', '-f', 'lavfi',
+            '-i', 'testsrc=size=64x48:rate={:d}:duration=2'.format(video_data.FRAMES_PER_SECOND), video,
+        ],
+        check=True,
+    )
+    assert ffmpeg_source.video_size(video) == (64, 48)
+    frames = list(ffmpeg_source.iter_frames(video, 5, 10))
+    assert [f.video_frame for f in frames] == list(range(5, 10))
+    assert frames[0].image.shape == (48, 64, 3)
+
+
+if __name__ == '__main__':
+    pytest.main()
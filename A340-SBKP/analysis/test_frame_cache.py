@@ -0,0 +1,129 @@
+import threading
+
+import numpy as np
+import pytest
+
+from analysis import frame_cache
+from analysis import frame_store
+from analysis import video_data
+
+#: Bytes in each frame from Loader.
+FRAME_BYTES = 4 * 4 * 3
+
+
+class Loader:
+    """A frame source that records the frames it loads, each frame is filled with its frame number."""
+    def __init__(self, count=100, delay=0.0):
+        self.count = count
+        self.delay = delay
+        self.loaded = []
+        self.lock = threading.Lock()
+
+    def __call__(self, video_frame):
+        if not 0 <= video_frame < self.count:
+            raise KeyError(video_frame)
+        if self.delay:
+            threading.Event().wait(self.delay)
+        with self.lock:
+            self.loaded.append(video_frame)
+        return np.full((4, 4, 3), video_frame, dtype=np.uint8)
+
+
+def test_hit_and_miss():
+    loader = Loader()
+    with frame_cache.FrameCache(loader, prefetch=0) as cache:
+        assert np.all(cache.get(5) == 5)
+        assert np.all(cache[5] == 5)
+        assert cache.frame(video_data.VideoTime(0, 0, 5))[0, 0, 0] == 5
+        assert loader.loaded == [5]
+        assert cache.stats() == frame_cache.FrameCacheStats(2, 1, 0, 0, 1, FRAME_BYTES)
+
+
+def test_frames_are_read_only():
+    with frame_cache.FrameCache(Loader(), prefetch=0) as cache:
+        with pytest.raises(ValueError):
+            cache.get(1)[0, 0, 0] = 0
+
+
+def test_lru_eviction():
+    loader = Loader()
+    with frame_cache.FrameCache(loader, max_bytes=3 * FRAME_BYTES, prefetch=0) as cache:
+        for video_frame in (10, 20, 30):
+            cache.get(video_frame)
+        # 10 becomes the most recently used so 20 is evicted.
+        cache.get(10)
+        cache.get(40)
+        assert 20 not in cache
+        assert all(video_frame in cache for video_frame in (10, 30, 40))
+        stats = cache.stats()
+        assert (stats.evictions, stats.frames, stats.bytes) == (1, 3, 3 * FRAME_BYTES)
+
+
+def test_frame_larger_than_cache():
+    with frame_cache.FrameCache(Loader(), max_bytes=FRAME_BYTES - 1, prefetch=0) as cache:
+        assert cache.get(1)[0, 0, 0] == 1
+        assert len(cache) == 0
+
+
+def test_random_access_does_not_prefetch():
+    loader = Loader()
+    with frame_cache.FrameCache(loader, prefetch=4) as cache:
+        for video_frame in (50, 10, 70, 30, 31):
+            cache.get(video_frame)
+    assert sorted(loader.loaded) == [10, 30, 31, 50, 70]
+    assert cache.stats().prefetches == 0
+
+
+def test_sequential_access_prefetches():
+    loader = Loader(delay=0.001)
+    with frame_cache.FrameCache(loader, prefetch=4, sequential_run=3) as cache:
+        for video_frame in range(20):
+            assert cache.get(video_frame)[0, 0, 0] == video_frame
+    stats = cache.stats()
+    # The first three are loaded by the caller, after that they are loaded ahead.
+    assert (stats.misses, stats.hits) == (3, 17)
+    assert stats.prefetches >= 17
+    assert len(loader.loaded) == len(set(loader.loaded))
+
+
+def test_prefetch_past_end_is_ignored():
+    loader = Loader(count=10)
+    with frame_cache.FrameCache(loader, prefetch=4, sequential_run=2) as cache:
+        for video_frame in range(10):
+            cache.get(video_frame)
+        with pytest.raises(KeyError):
+            cache.get(10)
+
+
+def test_clear():
+    with frame_cache.FrameCache(Loader(), prefetch=0) as cache:
+        cache.get(1)
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.stats().bytes == 0
+        cache.reset_stats()
+        assert cache.stats() == frame_cache.FrameCacheStats(0, 0, 0, 0, 0, 0)
+
+
+def test_png_loader(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    array = np.full((2, 3, 3), 7, dtype=np.uint8)
+    Image.fromarray(array).save(str(tmp_path / 'image000012.png'))
+    assert np.all(frame_cache.png_loader(str(tmp_path))(10) == array)
+
+
+def test_store_loader(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    frames_directory = tmp_path / 'frames'
+    frames_directory.mkdir()
+    for ffmpeg_number in range(2, 6):
+        Image.fromarray(np.full((2, 3, 3), ffmpeg_number, dtype=np.uint8)).save(
+            str(frames_directory / 'image{:06d}.png'.format(ffmpeg_number))
+        )
+    store = frame_store.build_frame_store(str(frames_directory), str(tmp_path / 'store'))
+    with frame_cache.FrameCache(frame_cache.store_loader(store)) as cache:
+        assert cache.get(3)[0, 0, 0] == 5
+
+
+if __name__ == '__main__':
+    pytest.main()
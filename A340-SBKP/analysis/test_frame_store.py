@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pytest
+
+from analysis import frame_store
+from analysis import video_data
+
+Image = pytest.importorskip('PIL.Image')
+
+HEIGHT = 6
+WIDTH = 8
+
+
+def _frame(ffmpeg_number: int) -> np.ndarray:
+    """A distinct RGB frame for each ffmpeg image number."""
+    array = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    array[:, :, 0] = ffmpeg_number
+    array[:, :, 1] = np.arange(WIDTH, dtype=np.uint8)
+    array[:, :, 2] = np.arange(HEIGHT, dtype=np.uint8)[:, np.newaxis]
+    return array
+
+
+@pytest.fixture
+def frames_directory(tmp_path):
+    directory = tmp_path / 'frames'
+    directory.mkdir()
+    for ffmpeg_number in range(1, 40):
+        Image.fromarray(_frame(ffmpeg_number)).save(str(directory / 'image{:06d}.png'.format(ffmpeg_number)))
+    # Not an ffmpeg image.
+    (directory / 'notes.txt').write_text('Notes')
+    return str(directory)
+
+
+def test_ffmpeg_frame_paths(frames_directory):
+    paths = frame_store.ffmpeg_frame_paths(frames_directory)
+    # image000001.png is before video frame 0
+    assert len(paths) == 38
+    assert paths[0] == (0, os.path.join(frames_directory, 'image000002.png'))
+    assert paths[-1] == (37, os.path.join(frames_directory, 'image000039.png'))
+
+
+@pytest.mark.parametrize('max_workers', (1, 4))
+def test_build_frame_store(frames_directory, tmp_path, max_workers):
+    store = frame_store.build_frame_store(frames_directory, str(tmp_path / 'store'), max_workers=max_workers)
+    assert len(store) == 38
+    assert store.frames.shape == (38, HEIGHT, WIDTH, 3)
+    assert store.frames.dtype == np.uint8
+    for i in range(len(store)):
+        assert np.all(store[i] == _frame(i + 2))
+
+
+def test_frame_store_reopen(frames_directory, tmp_path):
+    frame_store.build_frame_store(frames_directory, str(tmp_path / 'store'))
+    store = frame_store.FrameStore(str(tmp_path / 'store'))
+    assert isinstance(store.frames, np.memmap)
+    assert store.mode == 'RGB'
+    assert store.source == os.path.abspath(frames_directory)
+
+
+def test_frame_store_video_time(frames_directory, tmp_path):
+    store = frame_store.build_frame_store(frames_directory, str(tmp_path / 'store'))
+    vt = video_data.VideoTime(0, 1, 2)
+    frame = store.frame(vt)
+    assert np.all(frame == _frame(32 + video_data.FFMPEG_FRAME_OFFSET))
+    # A view, not a copy.
+    assert np.shares_memory(frame, store.frames)
+    assert store.video_time(store.index(32)) == vt
+    assert store.ffmpeg_name(store.index(32)) == video_data.video_time_to_ffmpeg_name(vt)
+    with pytest.raises(KeyError):
+        store.frame(video_data.VideoTime(0, 2, 0))
+
+
+def test_frame_store_greyscale(frames_directory, tmp_path):
+    store = frame_store.build_frame_store(frames_directory, str(tmp_path / 'store'), mode='L')
+    assert store.frames.shape == (38, HEIGHT, WIDTH, 1)
+
+
+def test_build_frame_store_shape_mismatch(frames_directory, tmp_path):
+    Image.fromarray(np.zeros((HEIGHT + 1, WIDTH, 3), dtype=np.uint8)).save(
+        os.path.join(frames_directory, 'image000010.png')
+    )
+    with pytest.raises(ValueError):
+        frame_store.build_frame_store(frames_directory, str(tmp_path / 'store'))
+    assert not os.path.exists(str(tmp_path / 'store' / frame_store.FRAME_STORE_INDEX))
+
+
+def test_build_frame_store_empty(tmp_path):
+    with pytest.raises(ValueError):
+        frame_store.build_frame_store(str(tmp_path), str(tmp_path / 'store'))
+
+
+if __name__ == '__main__':
+    pytest.main()
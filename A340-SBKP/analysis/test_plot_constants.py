@@ -0,0 +1,62 @@
+import math
+
+import numpy as np
+import pytest
+
+from analysis import plot_constants
+from analysis import video_data
+
+
+def _position_m_to_pixels(x, y):
+    """The scalar projection that MapProjection replaces."""
+    x_px = x / plot_constants.METRE_PER_PIXEL
+    y_px = y / plot_constants.METRE_PER_PIXEL
+    direction = plot_constants.RUNWAY_DIRECTION
+    return (
+        x_px * math.cos(direction) - y_px * math.sin(direction) + plot_constants.RUNWAY_START.x,
+        x_px * math.sin(direction) + y_px * math.cos(direction) + plot_constants.RUNWAY_START.y,
+    )
+
+
+@pytest.mark.parametrize(
+    'x, y',
+    (
+        (0.0, 0.0),
+        (1000.0, 0.0),
+        (-500.0, 250.0),
+        (2000.0, -1000.0),
+    )
+)
+def test_position_m_to_pixels(x, y):
+    result = plot_constants.position_m_to_pixels(plot_constants.PosXY(x, y))
+    expected = _position_m_to_pixels(x, y)
+    assert math.isclose(result.x, expected[0], abs_tol=1e-9)
+    assert math.isclose(result.y, expected[1], abs_tol=1e-9)
+
+
+def test_runway_end():
+    result = plot_constants.MAP_PROJECTION.to_pixels((video_data.RUNWAY_LEN_M, 0.0))
+    assert np.allclose(result, plot_constants.RUNWAY_END)
+
+
+def test_to_pixels_array():
+    xy = np.random.default_rng(0).uniform(-3000.0, 3000.0, size=(1000, 2))
+    result = plot_constants.MAP_PROJECTION.to_pixels(xy)
+    assert result.shape == (1000, 2)
+    expected = np.array([_position_m_to_pixels(x, y) for x, y in xy])
+    assert np.allclose(result, expected)
+
+
+def test_to_metres_inverse():
+    xy = np.random.default_rng(1).uniform(-3000.0, 3000.0, size=(100, 2))
+    projection = plot_constants.MAP_PROJECTION
+    assert np.allclose(projection.to_metres(projection.to_pixels(xy)), xy)
+
+
+@pytest.mark.parametrize('d', (0.0, 10.0, 25.0, video_data.RUNWAY_LEN_M))
+def test_distance_m_to_pixels(d):
+    assert math.isclose(plot_constants.distance_m_to_pixels(d), d / plot_constants.METRE_PER_PIXEL)
+
+
+if __name__ == '__main__':
+    pytest.main()
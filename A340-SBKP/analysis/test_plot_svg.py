@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from analysis import plot_constants
+# plot_events must be imported before plot_svg as they import each other.
+from analysis import plot_events  # noqa: F401
+from analysis import plot_svg
+
+BASE_MAP = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN" "http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd" [
+  <!ENTITY ent "<svg></svg>">
+]>
+<!-- </svg> in a comment -->
+<svg xmlns="http://www.w3.org/2000/svg" width="800" height="600">
+<g id="map" title="a > b"><path d="M0,0 L10,10"/></g>
+<style><![CDATA[ path { stroke: red; } </svg> ]]></style>
+<?processing </svg> ?>
+<text x="1" y="2">Text</text>
+</svg>
+<!-- Trailing comment -->
+"""
+
+OVERLAY = ['<circle cx="1" cy="2" r="3" />', '<!-- Overlay -->']
+
+
+def _split(text, chunk_size):
+    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+
+@pytest.mark.parametrize('chunk_size', (1, 2, 3, 7, 64, 1 << 16))
+def test_scanner_finds_root_end_tag(chunk_size):
+    scanner = plot_svg.SvgRootCloseScanner()
+    before = []
+    after = None
+    for chunk in _split(BASE_MAP, chunk_size) + ['']:
+        text, after = scanner.feed(chunk)
+        before.append(text)
+        if after is not None:
+            break
+    assert after is not None
+    assert ''.join(before) == BASE_MAP[:BASE_MAP.rindex('</svg>')]
+    assert after.startswith('</svg>')
+    assert scanner.depth == 0
+
+
+@pytest.mark.parametrize(
+    'text, message',
+    (
+        ('<svg><g></g>', 'No end tag'),
+        ('<svg><g', 'Unterminated'),
+        ('<svg><!-- </svg>', 'Unterminated'),
+    )
+)
+def test_scanner_raises(text, message):
+    scanner = plot_svg.SvgRootCloseScanner()
+    scanner.feed(text)
+    with pytest.raises(ValueError) as err:
+        scanner.feed('')
+    assert message in str(err.value)
+
+
+@pytest.mark.parametrize('chunk_size', (1, 5, 1 << 16))
+def test_modify_svg_as_text_and_copy(tmp_path, chunk_size):
+    infile = tmp_path / 'map.svg'
+    outfile = tmp_path / 'map_annotated.svg'
+    infile.write_text(BASE_MAP)
+    plot_svg.modify_svg_as_text_and_copy(str(infile), str(outfile), iter(OVERLAY), chunk_size)
+    index = BASE_MAP.rindex('</svg>')
+    expected = BASE_MAP[:index] + ''.join(line + '\n' for line in OVERLAY) + BASE_MAP[index:]
+    assert outfile.read_text() == expected
+
+
+def test_modify_svg_as_text_and_copy_end_tag_not_on_own_line(tmp_path):
+    infile = tmp_path / 'map.svg'
+    outfile = tmp_path / 'map_annotated.svg'
+    infile.write_text('<svg><g/></svg>')
+    plot_svg.modify_svg_as_text_and_copy(str(infile), str(outfile), ['<g/>'])
+    assert outfile.read_text() == '<svg><g/><g/>\n</svg>'
+
+
+def test_modify_svg_as_text_and_copy_no_end_tag(tmp_path):
+    infile = tmp_path / 'map.svg'
+    infile.write_text('<svg><g/>')
+    with pytest.raises(ValueError):
+        plot_svg.modify_svg_as_text_and_copy(str(infile), str(tmp_path / 'out.svg'), [])
+
+
+def test_gen_svg_overlay_is_lazy():
+    calls = []
+
+    def layer(name):
+        def fn():
+            calls.append(name)
+            return [name]
+        return fn
+
+    overlay = plot_svg.gen_svg_overlay((layer('a'), layer('b')))
+    assert next(overlay) == 'a'
+    assert calls == ['a']
+    assert list(overlay) == ['b']
+    assert calls == ['a', 'b']
+
+
+def test_svg_overlay_likelihood_is_opt_in(monkeypatch):
+    monkeypatch.setattr(plot_svg, 'create_svg_events', lambda: ['events'])
+    monkeypatch.setattr(plot_svg, 'create_svg_observer_likelihood', lambda: ['likelihood'])
+    monkeypatch.setattr(plot_svg, 'create_svg_observer_annotation', lambda: ['annotation'])
+    monkeypatch.setattr(plot_svg, 'create_svg_transit_to_observer_xy', lambda: ['transits'])
+    assert 'likelihood' not in plot_svg.create_svg_observer_layers()
+    assert plot_svg.create_svg_observer_layers(likelihood=True) == ['likelihood', 'annotation', 'transits']
+    assert list(plot_svg.gen_svg_overlay((plot_svg.SVG_OVERLAY_LAYERS_WITH_LIKELIHOOD[1],))) == [
+        'likelihood', 'annotation', 'transits'
+    ]
+
+
+def test_points_string():
+    xy = np.array([[0.0, 0.0], [100.0, 50.0]])
+    expected = ' '.join(
+        '{:.1f},{:.1f}'.format(*plot_constants.position_m_to_pixels(plot_constants.PosXY(x, y))) for x, y in xy
+    )
+    assert plot_svg.points_string(xy) == expected
+
+
+if __name__ == '__main__':
+    pytest.main()
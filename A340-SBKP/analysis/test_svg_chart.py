@@ -0,0 +1,196 @@
+import math
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+
+from analysis import svg_chart
+
+SVG_NAMESPACE = '{http://www.w3.org/2000/svg}'
+
+SCRIPT = """# A comment
+set colorsequence classic
+set grid
+set title "Title with # in it"
+set xlabel "Video Time (s)"
+set ylabel "Distance (m)"
+set xrange [0:40]
+set yrange [100:-100]
+set xtics 10
+set datafile separator whitespace#"	"
+set terminal svg size 800,600           # choose the file format
+set output "test.svg"   # choose the output device
+offset = 25
+set style line 1 lc rgb "blue" lw 0.5
+set arrow from 10,0 to 10,50 lt 2 nohead
+set arrow from 20,0 to 20,50 ls 1
+set label 3 "Nose wheel off\\nt=17.9" at 17.9,-4 font ",9" center rotate by 60
+plot "test.dat" using 1:2 title "Mid values" lt 2 lw 2 w lines, \\
+    "test.dat" using 1:($3-$2) title "Difference" w points ps 1.5, \\
+    "test.dat" using 1:2:($2-offset):($2+offset) title "Error" w yerrorbars
+reset
+"""
+
+DATA = """# Comment
+0.0 1.0 2.0
+1.0 NaN 4.0 # "Tower 1"
+2.0 3.0 8.0
+3.0 4.0 NaN
+"""
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    (
+        ('1 + 2 * 3', 7),
+        ('2**3', 8),
+        ('-(4 - 1)', -3),
+        ('0.5*(6-2)+25', 27.0),
+        ('sqrt(16)', 4.0),
+    )
+)
+def test_evaluate(text, expected):
+    assert svg_chart.evaluate(text) == expected
+
+
+def test_evaluate_columns_and_variables():
+    columns = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+    result = svg_chart.evaluate('0.5*($3-$1) + offset', {'offset': 10.0}, columns)
+    assert list(result) == [11.0, 11.0]
+
+
+def test_evaluate_missing_column_is_nan():
+    columns = np.array([[1.0, 2.0]])
+    assert math.isnan(svg_chart.evaluate('$5', {}, columns))
+
+
+@pytest.mark.parametrize('text', ('__import__("os")', 'x.y', 'unknown', '[1, 2]', '"abc"'))
+def test_evaluate_rejects(text):
+    with pytest.raises(ValueError):
+        svg_chart.evaluate(text)
+
+
+def test_user_function():
+    output, chart = svg_chart.gnuplot_chart(
+        'f(t) = 2.0 + 3.0 * t\nplot "a.dat" using 1:(f($1)) w lines', {'a.dat': np.array([[1.0], [2.0]])}
+    )
+    assert list(chart.series[0].y) == [5.0, 8.0]
+
+
+def test_load_data():
+    result = svg_chart.load_data(DATA)
+    assert result.shape == (4, 3)
+    assert math.isnan(result[1, 1])
+    assert result[2, 2] == 8.0
+
+
+@pytest.mark.parametrize(
+    'low, high, expected',
+    (
+        (0.0, 35.0, 5.0),
+        (-1500.0, 4000.0, 1000.0),
+        (0.0, 1.0, 0.2),
+        (-5.0, 5.0, 2.0),
+    )
+)
+def test_tic_step(low, high, expected):
+    assert math.isclose(svg_chart.tic_step(low, high), expected)
+
+
+def test_gnuplot_chart():
+    output, chart = svg_chart.gnuplot_chart(SCRIPT, {'test.dat': svg_chart.load_data(DATA)})
+    assert output == 'test.svg'
+    assert chart.title == 'Title with # in it'
+    assert (chart.width, chart.height) == (800, 600)
+    assert chart.xrange == (0.0, 40.0)
+    assert chart.yrange == (100.0, -100.0)
+    assert chart.xtics == 10.0
+    assert chart.ytics is None
+    assert chart.grid
+    assert [s.style for s in chart.series] == ['lines', 'points', 'yerrorbars']
+    assert chart.series[0].colour == svg_chart.line_colour(2)
+    assert chart.series[0].line_width == 2.0
+    assert chart.series[1].point_size == 1.5
+    assert list(chart.series[2].y_high[[0, 2]]) == [26.0, 28.0]
+    assert [a.heads for a in chart.arrows] == [0, 1]
+    assert chart.arrows[1].colour == 'blue'
+    assert chart.arrows[1].line_width == 0.5
+    assert len(chart.labels) == 1
+    label = chart.labels[0]
+    assert label.text == 'Nose wheel off\nt=17.9'
+    assert (label.x, label.y, label.align, label.rotate, label.font_size) == (17.9, -4.0, 'center', 60.0, 9.0)
+
+
+def test_render_is_valid_svg():
+    _output, svg = svg_chart.render_gnuplot(SCRIPT, {'test.dat': svg_chart.load_data(DATA)})
+    root = ET.fromstring(svg.split('\n', 1)[1])
+    assert root.tag == SVG_NAMESPACE + 'svg'
+    assert root.get('width') == '800'
+    # NaN in the line series splits it into two.
+    assert len(root.findall('.//{0}g/{0}polyline'.format(SVG_NAMESPACE))) == 2
+
+
+def _polylines(svg):
+    return ET.fromstring(svg.split('\n', 1)[1]).findall('.//{0}g/{0}polyline'.format(SVG_NAMESPACE))
+
+
+def test_datafile_missing_joins_lines():
+    script = 'set datafile missing "NaN"\n' + SCRIPT
+    _output, svg = svg_chart.render_gnuplot(script, {'test.dat': svg_chart.load_data(DATA)})
+    polylines = _polylines(svg)
+    assert len(polylines) == 1
+    assert len(polylines[0].get('points').split()) == 3
+
+
+def test_datafile_missing_real_merged_data():
+    # distance.dat is written by gnuplot_write_arrays() which pads the merged series with NaN.
+    directory = os.path.join(os.path.dirname(__file__), os.pardir, 'plots')
+    with open(os.path.join(directory, 'distance.plt')) as infile:
+        script = infile.read()
+    with open(os.path.join(directory, 'distance.dat')) as infile:
+        data = svg_chart.load_data(infile.read())
+    assert np.isnan(data).any()
+    assert 'set datafile missing "NaN"' in script
+    _output, svg = svg_chart.render_gnuplot(script, {'distance.dat': data})
+    # One line for each of the three series as gnuplot draws it.
+    polylines = _polylines(svg)
+    assert len(polylines) == 3
+    for polyline, column in zip(polylines, (1, 2, 3)):
+        assert len(polyline.get('points').split()) == np.sum(np.isfinite(data[:, column]) & np.isfinite(data[:, 0]))
+
+
+@pytest.mark.parametrize(
+    'plot_command, message',
+    (
+        ('set key box', 'Key options'),
+        ('plot "test.dat" using 1:2 w lines smooth bezier', 'smooth bezier'),
+    )
+)
+def test_unsupported_options_warn(plot_command, message):
+    with pytest.warns(UserWarning, match=message):
+        svg_chart.gnuplot_chart(plot_command, {'test.dat': svg_chart.load_data(DATA)})
+
+
+def test_chart_filledcurves_and_key_off():
+    chart = svg_chart.Chart()
+    chart.key = False
+    x = np.arange(5.0)
+    chart.add_series(x, x, 'Band', 'filledcurves', y_low=x - 1, y_high=x + 1)
+    svg = chart.render()
+    assert svg.count('<polygon') == 1
+    assert 'Band' not in svg
+
+
+def test_chart_add_series_errors():
+    chart = svg_chart.Chart()
+    with pytest.raises(ValueError):
+        chart.add_series([1.0], [1.0], style='histogram')
+    with pytest.raises(ValueError):
+        chart.add_series([1.0], [1.0], style='yerrorbars')
+    with pytest.raises(ValueError):
+        chart.add_series([1.0, 2.0], [1.0])
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,109 @@
+import math
+
+import numpy as np
+import pytest
+
+from analysis import plot_constants
+from analysis import trajectory
+from analysis import video_analysis
+from analysis import video_data
+
+
+GS_FITS = [video_analysis.ground_speed_curve_fit_with_offset(offset) for offset in plot_constants.GROUND_SPEED_OFFSETS]
+
+
+def test_timebase():
+    t = trajectory.timebase((-1.0, 1.0), 60)
+    assert len(t) == 121
+    assert t[0] == -1.0
+    assert t[-1] == 1.0
+    assert t[60] == 0.0
+
+
+def test_timebase_extra_times():
+    t = trajectory.timebase((-1.0, 1.0), 60, extra_times=(0.5, 0.123, 0.5 + 1e-9))
+    assert len(t) == 122
+    assert 0.123 in t
+
+
+@pytest.mark.parametrize('err', list(video_data.ErrorDirection))
+@pytest.mark.parametrize('t', (-10.0, 0.0, 1.5, video_data.TIME_VIDEO_END_ASPHALT.time))
+def test_compute_trajectory_matches_fits(err, t):
+    result = trajectory.compute_trajectory(
+        GS_FITS, trajectory.timebase(extra_times=(video_data.TIME_VIDEO_END_ASPHALT.time,))
+    )
+    fit = GS_FITS[trajectory.ERROR_DIRECTION_ROW[err]]
+    assert math.isclose(result.value('speed', t, err), video_analysis.ground_speed_from_fit(t, fit))
+    assert math.isclose(
+        result.value('acceleration', t, err), video_analysis.ground_speed_differential(t, fit), abs_tol=1e-12
+    )
+    offset = video_data.RUNWAY_LEN_M - video_analysis.ground_speed_integral(
+        0.0, video_data.TIME_VIDEO_END_ASPHALT.time, fit
+    )
+    assert math.isclose(result.value('distance', t, err), offset + video_analysis.ground_speed_integral(0.0, t, fit))
+
+
+def test_trajectory_index_not_on_timebase():
+    result = trajectory.compute_trajectory(GS_FITS, trajectory.timebase((0.0, 1.0)))
+    with pytest.raises(ValueError):
+        result.index(0.5 + 1 / 120)
+
+
+def test_trajectory_slice():
+    result = trajectory.compute_trajectory(GS_FITS, trajectory.timebase((0.0, 10.0)))
+    part = result.slice(2.0, 3.0)
+    assert len(part.t) == trajectory.SAMPLES_PER_SECOND
+    for values in part[1:]:
+        assert values.shape == (3, len(part.t))
+    assert np.all(part.speed == result.speed[:, result.index(part.t)])
+
+
+
+def test_polynomial_crossing_times_matches_roots():
+    # (t - 1)(t - 2)(t + 3) = t**3 - 7 * t + 6
+    coefficients = [6.0, -7.0, 0.0, 1.0]
+    result = trajectory.polynomial_crossing_times(coefficients, np.array([0.0, 0.0]), (-10.0, 10.0))
+    assert result.shape == (2,)
+    assert math.isclose(result[0], -3.0)
+    # First crossing in the range
+    result = trajectory.polynomial_crossing_times(coefficients, 0.0, (0.0, 10.0))
+    assert math.isclose(result, 1.0)
+
+
+def test_polynomial_crossing_times_no_crossing():
+    result = trajectory.polynomial_crossing_times([1.0, 1.0], np.array([0.0, 100.0]), (0.0, 10.0))
+    assert np.all(np.isnan(result))
+
+
+def test_polynomial_crossing_times_many_targets():
+    # The start of take off is about 500m from the start of the runway.
+    targets = np.linspace(600.0, 3000.0, 1001)
+    result = trajectory.fit_event_times(GS_FITS, 'distance', targets)
+    polynomial = trajectory._column_polynomial(GS_FITS[1], 'distance')
+    assert np.allclose(trajectory._polynomial(polynomial, result.time), targets, rtol=0.0, atol=1e-6)
+    assert np.all(result.error >= 0.0)
+
+
+def test_start_of_take_off_times():
+    result = trajectory.start_of_take_off_times(GS_FITS)
+    for t, gs_fit in zip(result, GS_FITS):
+        assert math.isclose(video_analysis.ground_speed_from_fit(t, gs_fit), 0.0, abs_tol=1e-9)
+        assert trajectory.TIME_RANGE[0] < t < 0.0
+
+
+def test_trajectory_event_times_matches_fit_event_times():
+    targets = np.array([50.0, 80.0])
+    traj = trajectory.compute_trajectory(GS_FITS)
+    sampled = trajectory.trajectory_event_times(traj, 'speed', targets)
+    fitted = trajectory.fit_event_times(GS_FITS, 'speed', targets)
+    assert np.allclose(sampled.time, fitted.time, atol=1e-4)
+    assert np.allclose(sampled.error, fitted.error, atol=1e-4)
+
+
+def test_fit_event_times_unknown_column():
+    with pytest.raises(ValueError):
+        trajectory.fit_event_times(GS_FITS, 'bearing', [0.0])
+
+
+if __name__ == '__main__':
+    pytest.main()
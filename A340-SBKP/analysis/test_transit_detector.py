@@ -0,0 +1,140 @@
+import math
+import re
+import time
+
+import numpy as np
+import pytest
+
+from analysis import transit_detector
+from analysis import video_data
+
+HEIGHT = 24
+WIDTH = 64
+#: Aircraft speed in pixels per frame and length in pixels.
+SPEED = 0.5
+LENGTH = 12.0
+#: Position of the nose at frame 0.
+NOSE_START = -20.0
+
+
+def _frames(count=200, noise=0.0, height=HEIGHT, width=WIDTH):
+    """Frames of a static random background with a dark aircraft moving to the right at SPEED, pixel columns
+    partly covered by the aircraft are blended."""
+    rng = np.random.default_rng(0)
+    background = rng.uniform(100.0, 200.0, size=(height, width, 3))
+    nose = NOSE_START + SPEED * np.arange(count)
+    columns = np.arange(width)
+    # (frames, width) coverage of each pixel column [c, c + 1) by the aircraft [nose - LENGTH, nose).
+    coverage = np.clip(
+        np.minimum(columns + 1, nose[:, np.newaxis]) - np.maximum(columns, nose[:, np.newaxis] - LENGTH), 0.0, 1.0
+    )
+    coverage = coverage[:, np.newaxis, :, np.newaxis]
+    frames = background * (1.0 - coverage) + 20.0 * coverage
+    if noise:
+        frames += rng.normal(0.0, noise, size=frames.shape)
+    return np.clip(np.round(frames), 0, 255).astype(np.uint8)
+
+
+def _expected(column):
+    """Fractional frames when the nose and tail are half way across the column."""
+    return (column + 0.5 - NOSE_START) / SPEED, (column + 0.5 + LENGTH - NOSE_START) / SPEED
+
+
+@pytest.mark.parametrize('column', (5, 20, 40))
+@pytest.mark.parametrize('noise', (0.0, 2.0))
+def test_transit_edges(column, noise):
+    frames = _frames(noise=noise)
+    profile = transit_detector.occupancy(transit_detector.RegionOfInterest.column(column).crop(frames))
+    entry, exit_ = transit_detector.transit_edges(profile)
+    expected_entry, expected_exit = _expected(column)
+    assert math.isclose(entry, expected_entry, abs_tol=0.1)
+    assert math.isclose(exit_, expected_exit, abs_tol=0.1)
+
+
+def test_transit_edges_incomplete():
+    profile = np.zeros(20)
+    profile[15:] = 1.0
+    with pytest.raises(ValueError):
+        transit_detector.transit_edges(profile)
+
+
+def test_transit_edges_no_occupancy():
+    with pytest.raises(ValueError):
+        transit_detector.transit_edges(np.zeros(20))
+
+
+@pytest.mark.parametrize(
+    'video_frame, expected',
+    (
+        (0.0, video_data.VideoTime(0, 0, 0)),
+        (50.5, video_data.VideoTime(0, 1, 20.5)),
+        (1800.25, video_data.VideoTime(1, 0, 0.25)),
+        (465.369999999999997, video_data.VideoTime(0, 15, 15.37)),
+        (59.999, video_data.VideoTime(0, 2, 0)),
+    )
+)
+def test_video_frame_to_time(video_frame, expected):
+    result = transit_detector.video_frame_to_time(video_frame)
+    assert result == expected
+    assert (result.min, result.sec, result.frame) == (expected.min, expected.sec, expected.frame)
+
+
+def test_detect_transits():
+    frames = _frames()
+    objects = [
+        transit_detector.TransitObject(transit_detector.RegionOfInterest.column(10), 'Lamp post 1.'),
+        transit_detector.TransitObject(transit_detector.RegionOfInterest(4, 20, 30, 31), 'Lamp post 2.'),
+    ]
+    transits = transit_detector.detect_transits(frames, objects, first_video_frame=30)
+    assert [t.note for t in transits] == ['Lamp post 1.', 'Lamp post 2.']
+    for transit, column in zip(transits, (10, 30)):
+        assert isinstance(transit, video_data.AircraftTransit)
+        expected_entry, expected_exit = _expected(column)
+        assert math.isclose(transit.video_from.time, (30 + expected_entry) / video_data.FRAMES_PER_SECOND, abs_tol=0.01)
+        assert math.isclose(transit.dt, LENGTH / SPEED / video_data.FRAMES_PER_SECOND, abs_tol=0.01)
+
+
+def test_format_detected_transit():
+    objects = [transit_detector.TransitObject(transit_detector.RegionOfInterest.column(10), 'Lamp post 1.')]
+    transit = transit_detector.detect_transits(_frames(), objects, first_video_frame=30)[0]
+    # Detected frames are floats which can not be formatted as integers.
+    assert isinstance(transit.video_from.frame, float)
+    text = '{} {}'.format(transit.video_from, transit.video_to)
+    assert re.fullmatch(r'VideoTime\(\d\d:\d\d:\d\d(\.\d\d)?\) VideoTime\(\d\d:\d\d:\d\d(\.\d\d)?\)', text)
+
+
+def test_detect_transits_from_source():
+    frames = _frames()
+    objects = [transit_detector.TransitObject(transit_detector.RegionOfInterest.column(10), 'Lamp post 1.')]
+    expected = transit_detector.detect_transits(frames[10:], objects, first_video_frame=10)
+    result = transit_detector.detect_transits_from_source(lambda n: frames[n], range(10, len(frames)), objects)
+    assert result == expected
+    with pytest.raises(ValueError):
+        transit_detector.detect_transits_from_source(lambda n: frames[n], range(0, len(frames), 2), objects)
+
+
+def test_detect_transits_not_found():
+    frames = _frames(count=30)
+    objects = [transit_detector.TransitObject(transit_detector.RegionOfInterest.column(50), 'Far tower.')]
+    with pytest.raises(ValueError) as err:
+        transit_detector.detect_transits(frames, objects)
+    assert 'Far tower.' in str(err.value)
+
+
+def test_detect_transits_whole_video_is_fast():
+    # A whole video of frames, the regions are a small part of each frame.
+    count = int(video_data.TIME_VIDEO_END.time * video_data.FRAMES_PER_SECOND)
+    frames = np.zeros((count, 120, 160, 3), dtype=np.uint8)
+    frames[500:530, :, 40:] = 200
+    objects = [
+        transit_detector.TransitObject(transit_detector.RegionOfInterest.column(c, 10, 110), str(c))
+        for c in range(40, 160, 20)
+    ]
+    tim_start = time.perf_counter()
+    transits = transit_detector.detect_transits(frames, objects)
+    assert time.perf_counter() - tim_start < 5.0
+    assert len(transits) == len(objects)
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -1,7 +1,11 @@
+import math
+
+import numpy as np
 import pytest
 
 from analysis import video_data
 from analysis import video_analysis
+from analysis import video_utils
 
 
 @pytest.mark.parametrize(
@@ -17,6 +21,109 @@ def test_ground_sped_raw(t, dt, min_mid_max, expected):
     assert expected == gs
 
 
+def test_observer_grid_cost_chunk_size_invariant():
+    transit_lines = video_utils.TransitLines.from_xy_pairs(
+        (transit_line.frm.xy, transit_line.to.xy) for transit_line in video_data.GOOGLE_EARTH_FULL_TRANSITS
+    )
+    x = np.linspace(3000.0, 4000.0, 21)
+    y = np.linspace(-1000.0, -500.0, 11)
+    expected = video_analysis.observer_grid_cost(transit_lines, x, y)
+    assert expected.shape == (len(y), len(x))
+    assert np.all(video_analysis.observer_grid_cost(transit_lines, x, y, chunk_size=1) == expected)
+
+
+def test_observer_likelihood_map_agrees_with_full_transits():
+    likelihood = video_analysis.observer_likelihood_map()
+    ((x_mean, _x_std), (y_mean, _y_std)) = video_analysis.observer_position_mean_std_from_full_transits()
+    assert abs(likelihood.minimum.x - x_mean) <= video_data.GOOGLE_EARTH_ERROR
+    assert abs(likelihood.minimum.y - y_mean) <= video_data.GOOGLE_EARTH_ERROR
+    row = np.searchsorted(likelihood.y, likelihood.minimum.y)
+    column = np.searchsorted(likelihood.x, likelihood.minimum.x)
+    assert likelihood.confidence_region[row, column]
+    assert not likelihood.confidence_region[0, 0]
+
+
+@pytest.mark.parametrize('method', video_analysis.OBSERVER_ROBUST_METHODS)
+def test_observer_position_robust_rejects_outlier(method):
+    lines = video_analysis.full_transit_lines()
+    expected = video_analysis.observer_position_robust(lines, method=method).position
+    # Add a transit line that misses the observer by 500m
+    outlier = video_utils.TransitLines(
+        *(np.append(v, w) for v, w in zip(lines, (0.0, 0.0, expected.x, expected.y + 500.0)))
+    )
+    result = video_analysis.observer_position_robust(outlier, method=method)
+    assert list(result.inliers) == [True] * len(lines.from_x) + [False]
+    assert abs(result.position.x - expected.x) < 1e-6
+    assert abs(result.position.y - expected.y) < 1e-6
+
+
+def test_observer_position_robust_sampled_hypotheses():
+    result = video_analysis.observer_position_robust(video_analysis.aspect_lines(), hypotheses=100, seed=1)
+    assert result.hypotheses <= 100
+    assert np.count_nonzero(result.inliers) > len(result.inliers) // 2
+
+
+@pytest.mark.parametrize('method', video_analysis.OBSERVER_ROBUST_METHODS)
+def test_observer_position_robust_from_transits_and_aspects(method):
+    result = video_analysis.observer_position_robust_from_transits_and_aspects(method=method)
+    sources = video_analysis.observer_position_robust_sources()
+    assert result.inliers.shape == sources.shape
+    assert np.count_nonzero(sources == 'transit') == len(video_analysis.full_transit_lines().from_x)
+    # Both kinds of line vote in the one solve.
+    assert np.any(result.inliers[sources == 'transit'])
+    assert np.any(result.inliers[sources == 'aspect'])
+    transits = video_analysis.observer_position_robust_from_full_transits(method=method).position
+    assert abs(result.position.x - transits.x) < 100.0
+    assert abs(result.position.y - transits.y) < 100.0
+
+
+def test_observer_position_robust_unknown_method():
+    with pytest.raises(ValueError):
+        video_analysis.observer_position_robust(video_analysis.full_transit_lines(), method='mean')
+
+
+def test_observer_candidates():
+    result = video_analysis.observer_candidates([1.0, 2.0, 3.0], [10.0, 20.0])
+    assert result.shape == (6, 2)
+    assert set(map(tuple, result)) == {(x, y) for x in (1.0, 2.0, 3.0) for y in (10.0, 20.0)}
+
+
+@pytest.mark.parametrize('observer', ((3400.0, -700.0), (3480.0, -763.0), (1000.0, 500.0)))
+def test_yaw_from_observers_matches_scalar(observer):
+    gs_fit = video_analysis.ground_speed_curve_fit(video_data.ErrorDirection.MID)
+    time_dist_brng = video_analysis.observer_time_distance_bearing_from_wing_tips(gs_fit, video_data.ErrorDirection.MID)
+    x_offset = 1200.0
+    observer_error = 30.0
+    result = video_analysis.yaw_from_observers(np.array([observer]), time_dist_brng, x_offset, observer_error)
+    assert result.yaw.shape == (1, len(time_dist_brng))
+    for i, (_t, x_distance, aspect, aspect_error) in enumerate(time_dist_brng):
+        x_obs_aircraft = observer[0] - x_distance - x_offset
+        obs_brng = math.degrees(math.atan2(observer[1], x_obs_aircraft)) % 360
+        yaw = (obs_brng - aspect) % 360
+        if yaw > 180.0:
+            yaw -= 360
+        distance = math.sqrt(observer[1]**2 + x_obs_aircraft**2)
+        error = 2.0 * math.degrees(math.atan(observer_error / distance)) + aspect_error
+        assert math.isclose(result.bearing[0, i], obs_brng, abs_tol=1e-9)
+        assert math.isclose(result.yaw[0, i], yaw, abs_tol=1e-9)
+        assert math.isclose(result.yaw_min[0, i], yaw - error, abs_tol=1e-9)
+        assert math.isclose(result.yaw_max[0, i], yaw + error, abs_tol=1e-9)
+
+
+def test_yaw_from_observers_candidates():
+    gs_fit = video_analysis.ground_speed_curve_fit(video_data.ErrorDirection.MID)
+    time_dist_brng = video_analysis.observer_time_distance_bearing_from_wing_tips(gs_fit, video_data.ErrorDirection.MID)
+    observers = video_analysis.observer_candidates(np.linspace(3300, 3500, 5), np.linspace(-800, -600, 3))
+    errors = np.arange(len(observers), dtype=np.float64)
+    result = video_analysis.yaw_from_observers(observers, time_dist_brng, 0.0, errors)
+    assert result.yaw.shape == (len(observers), len(time_dist_brng))
+    assert np.all((result.yaw > -180.0) & (result.yaw <= 180.0))
+    # Each row is the same as that candidate alone.
+    for k in (0, 7, len(observers) - 1):
+        single = video_analysis.yaw_from_observers(observers[k], time_dist_brng, 0.0, errors[k])
+        assert np.all(single.yaw[0] == result.yaw[k])
+        assert np.all(single.yaw_max[0] == result.yaw_max[k])
+
 
 if __name__ == '__main__':
     pytest.main()
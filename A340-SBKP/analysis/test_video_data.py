@@ -15,6 +15,11 @@ from analysis import video_data
 def test_video_frame_to_time(frame, expected):
     assert expected == video_data.video_frame_to_time(frame)
 
+
+@pytest.mark.parametrize('frame', (0, 1, 29, 30, 1061, 30 * 60, 30 * 60 * 59 + 29))
+def test_video_time_to_video_frame(frame):
+    assert video_data.video_time_to_video_frame(video_data.video_frame_to_time(frame)) == frame
+
 VIDEO_TIME_TO_FFMPEG_TIME_DATA = (
     (video_data.VideoTime(0, 0, 0), video_data.VideoTime(0, 0, 2)),
     (video_data.VideoTime(0, 1, 0), video_data.VideoTime(0, 1, 2)),
@@ -98,3 +103,17 @@ def test_aircraft_aspect_wing_tips_error(video_time, span, length, note, expecte
     aawt = video_data.AircraftAspectWingTips(video_time, span, length, note)
     assert math.isclose(expected, aawt.error, rel_tol=0.001)
     # assert expected == aawt.error
+
+
+@pytest.mark.parametrize(
+    'video_time, format_spec, expected',
+    (
+        (video_data.VideoTime(0, 16, 18), '', 'VideoTime(00:16:18)'),
+        (video_data.VideoTime(0, 16, 18.5), '', 'VideoTime(00:16:18.50)'),
+        (video_data.VideoTime(0, 16, 5.37), '', 'VideoTime(00:16:05.37)'),
+        (video_data.VideoTime(0, 16, 18.0), '', 'VideoTime(00:16:18)'),
+        (video_data.VideoTime(0, 16, 18.5), '4.1f', 'VideoTime( 0.0:16.0:18.5)'),
+    ),
+)
+def test_video_time_format(video_time, format_spec, expected):
+    assert format(video_time, format_spec) == expected
@@ -1,5 +1,6 @@
 import math
 
+import numpy as np
 import pytest
 from hypothesis import given
 import hypothesis.strategies as hst
@@ -446,5 +447,198 @@ def test_transit_point_with_error(line_from, line_to, error, expected_from, expe
     assert math.isclose(expected_bearing, new_bearing)
 
 
+
+TRANSIT_LINES_VALUES = (
+    (2.0, 1.0, 8.0, -2.0),
+    (6.0, -1.0, 8.0, -2.0),
+    (-1051.3, 834.6, 1274.1, -3327.8),
+    (2473.2, 517.9, 1009.3, -782.4),
+)
+
+
+def test_transit_lines_shape():
+    px = np.array([v[0] for v in TRANSIT_LINES_VALUES])
+    py = np.array([v[1] for v in TRANSIT_LINES_VALUES])
+    ox = np.linspace(900.0, 1100.0, 7)
+    oy = np.linspace(-800.0, -700.0, 7)
+    lines = video_utils.TransitLines.from_points_to_observers(px, py, ox, oy)
+    result = lines.x_axis_intercept()
+    assert result.shape == (7, len(TRANSIT_LINES_VALUES))
+    for i in range(len(ox)):
+        for j in range(len(px)):
+            assert result[i, j] == video_utils.transit_x_axis_intercept(px[j], py[j], ox[i], oy[i])
+
+
+def test_transit_lines_from_xy_pairs():
+    pairs = [(video_utils.XY(v[0], v[1]), video_utils.XY(v[2], v[3])) for v in TRANSIT_LINES_VALUES]
+    lines = video_utils.TransitLines.from_xy_pairs(pairs)
+    assert np.all(np.column_stack(lines) == np.array(TRANSIT_LINES_VALUES))
+
+
+def test_transit_lines_matches_scalar():
+    lines = video_utils.TransitLines(*np.array(TRANSIT_LINES_VALUES).T)
+    x_axis_intercept = lines.x_axis_intercept()
+    bearing = lines.bearing()
+    distance = lines.distance()
+    distance_to_x = lines.distance_to_x()
+    x_axis_error = lines.x_axis_error(0.6, 0.3)
+    for i, (px, py, ox, oy) in enumerate(TRANSIT_LINES_VALUES):
+        assert x_axis_intercept[i] == video_utils.transit_x_axis_intercept(px, py, ox, oy)
+        assert bearing[i] == video_utils.transit_bearing(px, py, ox, oy)
+        assert distance[i] == video_utils.transit_distance(px, py, ox, oy)
+        assert distance_to_x[i] == video_utils.transit_distance_to_x(px, py, ox, oy)
+        assert x_axis_error[i] == video_utils.transit_x_axis_error(px, py, ox, oy, 0.6, 0.3)
+
+
+@pytest.mark.parametrize('error', (-25.0, 0.0, 25.0))
+def test_transit_lines_point_with_error_and_past_observer_matches_scalar(error):
+    observer = video_utils.XY(1000.0, -750.0)
+    lines = video_utils.TransitLines(*np.array(TRANSIT_LINES_VALUES).T)
+    new_lines, new_bearings = lines.point_with_error(error)
+    end_points = new_lines.line_past_observer(observer.x, observer.y, 250.0)
+    for i, (px, py, ox, oy) in enumerate(TRANSIT_LINES_VALUES):
+        new_from, new_to, new_bearing = video_utils.transit_point_with_error(
+            video_utils.XY(px, py), video_utils.XY(ox, oy), error
+        )
+        assert (new_lines.from_x[i], new_lines.from_y[i]) == tuple(new_from)
+        assert (new_lines.to_x[i], new_lines.to_y[i]) == tuple(new_to)
+        assert new_bearings[i] == new_bearing
+        end_point = video_utils.transit_line_past_observer(new_from, new_to, observer, 250.0)
+        assert (end_points.x[i], end_points.y[i]) == tuple(end_point)
+
+
+
+#: Tolerance of TransitLines against the scalar transit_* functions in ULP of the largest magnitude in the batch.
+#: numpy and math can round atan2, sin, cos and sqrt differently, the extended end points of
+#: line_past_observer() are sums of terms larger than the result so they need the most.
+TRANSIT_LINES_MAX_ULP = 8
+
+
+def _assert_within_ulp(array, scalars):
+    scalars = np.array(scalars, dtype=np.float64)
+    tolerance = TRANSIT_LINES_MAX_ULP * np.spacing(np.max(np.abs(scalars)))
+    assert np.max(np.abs(array - scalars)) <= tolerance
+
+
+def test_transit_lines_matches_scalar_random():
+    values = np.random.default_rng(0).uniform(-4000.0, 4000.0, (5000, 4))
+    lines = video_utils.TransitLines(*values.T)
+    _assert_within_ulp(lines.x_axis_intercept(), [video_utils.transit_x_axis_intercept(*v) for v in values])
+    _assert_within_ulp(lines.bearing(), [video_utils.transit_bearing(*v) for v in values])
+    _assert_within_ulp(lines.distance(), [video_utils.transit_distance(*v) for v in values])
+    _assert_within_ulp(lines.distance_to_x(), [video_utils.transit_distance_to_x(*v) for v in values])
+    _assert_within_ulp(lines.x_axis_error(0.6, 0.3), [video_utils.transit_x_axis_error(*v, 0.6, 0.3) for v in values])
+    pairs = [(video_utils.XY(*v[:2]), video_utils.XY(*v[2:])) for v in values]
+    new_lines, new_bearings = lines.point_with_error(25.0)
+    scalars = [video_utils.transit_point_with_error(line_from, line_to, 25.0) for line_from, line_to in pairs]
+    _assert_within_ulp(new_lines.from_x, [new_from.x for new_from, _new_to, _bearing in scalars])
+    _assert_within_ulp(new_lines.from_y, [new_from.y for new_from, _new_to, _bearing in scalars])
+    _assert_within_ulp(new_lines.to_x, [new_to.x for _new_from, new_to, _bearing in scalars])
+    _assert_within_ulp(new_lines.to_y, [new_to.y for _new_from, new_to, _bearing in scalars])
+    _assert_within_ulp(new_bearings, [bearing for _new_from, _new_to, bearing in scalars])
+    observer = video_utils.XY(1000.0, -750.0)
+    end_points = lines.line_past_observer(observer.x, observer.y, 250.0)
+    scalars = [video_utils.transit_line_past_observer(line_from, line_to, observer, 250.0)
+               for line_from, line_to in pairs]
+    _assert_within_ulp(end_points.x, [end_point.x for end_point in scalars])
+    _assert_within_ulp(end_points.y, [end_point.y for end_point in scalars])
+
+
+def test_transit_lines_perpendicular_and_along_distance():
+    lines = video_utils.TransitLines(0.0, 0.0, 8.0, 0.0)
+    assert lines.perpendicular_distance(4.0, 3.0) == 3.0
+    assert lines.perpendicular_distance(4.0, -3.0) == -3.0
+    assert lines.along_distance(4.0, 3.0) == 4.0
+    assert lines.along_distance(-2.0, 3.0) == -2.0
+
+
+
+def test_intersect_two_lines_vertical():
+    result = video_utils.intersect_two_lines(
+        video_utils.XY(1.0, 0.0), video_utils.XY(1.0, 2.0),
+        video_utils.XY(0.0, 1.0), video_utils.XY(6.0, 1.0),
+    )
+    assert result == video_utils.XY(1.0, 1.0)
+
+
+def test_intersect_two_lines_parallel_raises():
+    with pytest.raises(ValueError):
+        video_utils.intersect_two_lines(
+            video_utils.XY(0.0, 0.0), video_utils.XY(1.0, 1.0),
+            video_utils.XY(0.0, 1.0), video_utils.XY(1.0, 2.0),
+        )
+
+
+def test_intersect_lines_near_parallel_not_valid():
+    lines1 = video_utils.TransitLines(0.0, 0.0, 1000.0, 0.0)
+    # 0.5 and 2 degrees from lines1
+    lines2 = video_utils.TransitLines(
+        np.array([0.0, 0.0]), np.array([10.0, 10.0]),
+        1000.0 * np.cos(np.radians([0.5, 2.0])), 10.0 - 1000.0 * np.sin(np.radians([0.5, 2.0])),
+    )
+    result = video_utils.intersect_lines(lines1, lines2)
+    assert list(result.valid) == [False, True]
+    assert np.isnan(result.x[0]) and np.isnan(result.y[0])
+    assert math.isclose(result.sin_angle[1], math.sin(math.radians(2.0)))
+    assert math.isclose(result.y[1], 0.0, abs_tol=1e-9)
+
+
+def test_intersect_all_pairs_matches_scalar():
+    lines = video_utils.TransitLines(*np.array(TRANSIT_LINES_VALUES).T)
+    i, j, result = video_utils.intersect_all_pairs(lines, min_angle=0.0)
+    assert len(i) == len(TRANSIT_LINES_VALUES) * (len(TRANSIT_LINES_VALUES) - 1) // 2
+    # The first two lines are the same line.
+    assert not result.valid[0]
+    for k in range(1, len(i)):
+        expected = video_utils.intersect_two_lines(
+            video_utils.XY(lines.from_x[i[k]], lines.from_y[i[k]]), video_utils.XY(lines.to_x[i[k]], lines.to_y[i[k]]),
+            video_utils.XY(lines.from_x[j[k]], lines.from_y[j[k]]), video_utils.XY(lines.to_x[j[k]], lines.to_y[j[k]]),
+        )
+        assert video_utils.XY(result.x[k], result.y[k]) == expected
+
+
+
+@pytest.mark.parametrize(
+    'alpha, c, beta, expected_status',
+    (
+        (math.pi / 4, 1.0, math.pi / 4, video_utils.TriangleStatus.OK),
+        (0.0, 1.0, math.pi / 4, video_utils.TriangleStatus.ALPHA_NOT_POSITIVE),
+        (math.pi / 4, -1.0, math.pi / 4, video_utils.TriangleStatus.SIDE_NOT_POSITIVE),
+        (math.pi / 4, 1.0, 0.0, video_utils.TriangleStatus.BETA_NOT_POSITIVE),
+        (math.pi / 2, 1.0, math.pi / 2, video_utils.TriangleStatus.NO_TRIANGLE),
+    ),
+)
+def test_triangle_ASA_array_status(alpha, c, beta, expected_status):
+    b, gamma, a, status = video_utils.triangle_ASA_array(alpha, c, beta)
+    assert status == expected_status
+    if expected_status == video_utils.TriangleStatus.OK:
+        assert (b, gamma, a) == video_utils.triangle_ASA(alpha, c, beta)
+    else:
+        assert np.isnan(b) and np.isnan(gamma) and np.isnan(a)
+
+
+def test_aspect_intersection_array_matches_scalar():
+    d0 = np.array([0.0, 1.0, 0.0, 0.0, 0.0, 0.0])
+    b0 = np.array([45.0, 135.0, 315.0, 45.0, 90.0, 45.0])
+    d1 = np.array([1.0, 0.0, 1.0, 1.0, 1.0, 1.0])
+    b1 = np.array([135.0, 45.0, 270.0, 225.0, 45.0, 90.0])
+    d, y, status = video_utils.aspect_intersection_array(d0, b0, d1, b1)
+    assert list(status) == [
+        video_utils.TriangleStatus.OK,
+        video_utils.TriangleStatus.OK,
+        video_utils.TriangleStatus.OK,
+        video_utils.TriangleStatus.OPPOSITE_SIDES,
+        video_utils.TriangleStatus.BEARINGS_DIVERGE,
+        video_utils.TriangleStatus.OK,
+    ]
+    for k in range(len(d0)):
+        if status[k] == video_utils.TriangleStatus.OK:
+            assert (d[k], y[k]) == video_utils.aspect_intersection(d0[k], b0[k], d1[k], b1[k])
+        else:
+            assert np.isnan(d[k]) and np.isnan(y[k])
+            with pytest.raises(ValueError):
+                video_utils.aspect_intersection(d0[k], b0[k], d1[k], b1[k])
+
+
 if __name__ == '__main__':
     pytest.main()
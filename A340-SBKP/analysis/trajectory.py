@@ -0,0 +1,261 @@
+"""
+The trajectory of the aircraft computed once on a dense time base.
+
+Each quantity is a (3, n) array, one row for each of the min/mid/max ground speed fits in the order of
+video_data.ErrorDirection, and n is the length of the time base. Plots and tables read slices of this rather than
+evaluating the ground speed fits per sample.
+"""
+import collections
+import typing
+
+import numpy as np
+
+from analysis import video_analysis
+from analysis import video_data
+from analysis import video_utils
+
+#: Samples per second of the default time base. This is twice the frame rate as the ground speed measurements are
+#: between frames.
+SAMPLES_PER_SECOND = 2 * video_data.FRAMES_PER_SECOND
+#: Default time range in video time (s), this covers the start of the take off and the end of the video.
+TIME_RANGE = (-40.0, 40.0)
+
+#: Times closer than this (s) are the same sample, this is much less than a frame.
+TIME_TOLERANCE = 1e-6
+
+#: Row of each ErrorDirection in the trajectory arrays.
+ERROR_DIRECTION_ROW = {err: row for row, err in enumerate(video_data.ErrorDirection)}
+
+
+class Trajectory(collections.namedtuple(
+        'Trajectory', 't, distance, speed, acceleration, bearing, x, y, lat, long')):
+    """
+    The aircraft trajectory.
+    t is the time base in video time (s), the other fields are (3, n) arrays with rows of
+    min/mid/max (see ERROR_DIRECTION_ROW):
+
+    - distance from the start of the runway (m).
+    - speed (m/s).
+    - acceleration (m/s^2).
+    - bearing (degrees) from the aircraft to the observer in the same sense as the aspects.
+    - x, y position of the aircraft (m), y is zero, the runway centre line.
+    - lat, long of the aircraft (degrees).
+    """
+    __slots__ = ()
+
+    def index(self, t: typing.Union[float, np.ndarray]) -> typing.Union[int, np.ndarray]:
+        """Returns the index of the time(s) t in the time base.
+        This raises a ValueError if t is not on the time base."""
+        t = np.asarray(t, dtype=np.float64)
+        index = np.clip(np.searchsorted(self.t, t), 1, len(self.t) - 1)
+        # Nearest of the neighbours
+        index = np.where(np.abs(self.t[index - 1] - t) <= np.abs(self.t[index] - t), index - 1, index)
+        if not np.all(np.abs(self.t[index] - t) <= TIME_TOLERANCE):
+            raise ValueError('Time(s) {} are not on the time base.'.format(t))
+        if index.ndim == 0:
+            return int(index)
+        return index
+
+    def value(self, column: str, t: typing.Union[float, np.ndarray],
+              err: video_data.ErrorDirection = video_data.ErrorDirection.MID) -> typing.Union[float, np.ndarray]:
+        """The value(s) of the named column at the time(s) t for the given error direction."""
+        result = getattr(self, column)[ERROR_DIRECTION_ROW[err], self.index(t)]
+        if np.ndim(result) == 0:
+            return float(result)
+        return result
+
+    def slice(self, t_start: float, t_stop: float) -> 'Trajectory':
+        """A trajectory with the time base t_start <= t < t_stop."""
+        mask = (self.t >= t_start) & (self.t < t_stop)
+        return Trajectory(self.t[mask], *(v[:, mask] for v in self[1:]))
+
+
+def timebase(time_range: typing.Tuple[float, float] = TIME_RANGE,
+             samples_per_second: float = SAMPLES_PER_SECOND,
+             extra_times: typing.Iterable[float] = ()) -> np.ndarray:
+    """Returns a time base from time_range[0] to time_range[1] inclusive at samples_per_second.
+    extra_times, for example events that are not on a sample, are merged into the time base."""
+    start = int(round(time_range[0] * samples_per_second))
+    stop = int(round(time_range[1] * samples_per_second))
+    result = np.arange(start, stop + 1) / samples_per_second
+    extra_times = np.asarray(list(extra_times), dtype=np.float64)
+    if len(extra_times):
+        # Exclude extra times that are already samples.
+        index = np.clip(np.searchsorted(result, extra_times), 1, len(result) - 1)
+        existing = (np.abs(result[index] - extra_times) <= TIME_TOLERANCE) \
+            | (np.abs(result[index - 1] - extra_times) <= TIME_TOLERANCE)
+        result = np.union1d(result, extra_times[~existing])
+    return result
+
+
+def compute_trajectory(gs_fits: typing.Sequence[typing.Sequence[float]],
+                       t: typing.Optional[np.ndarray] = None,
+                       observer: typing.Optional[video_utils.XY] = None) -> Trajectory:
+    """
+    Computes the trajectory from the min/mid/max ground speed fits on the time base t, default timebase().
+    The distance is from the start of the runway by taking the end of the asphalt at the end of the runway as
+    the datum, the same as plot_common.get_distances_min_mid_max(video_data.TIME_VIDEO_END_ASPHALT.time).
+    observer is the position of the observer, default the mean from the full transits.
+    """
+    if t is None:
+        t = timebase()
+    if observer is None:
+        ((x_mean, _x_std), (y_mean, _y_std)) = video_analysis.observer_position_mean_std_from_full_transits()
+        observer = video_utils.XY(x_mean, y_mean)
+    # Coefficients as (4, 3, 1) so each broadcasts against the time base to (3, n)
+    fits = np.array(gs_fits, dtype=np.float64).T[:, :, np.newaxis]
+    offsets = video_data.RUNWAY_LEN_M - video_utils.polynomial_3_integral(
+        0.0, video_data.TIME_VIDEO_END_ASPHALT.time, *fits
+    )
+    distance = offsets + video_utils.polynomial_3_integral(0.0, t, *fits)
+    speed = video_utils.polynomial_3(t, *fits)
+    acceleration = video_utils.polynomial_3_differential(t, *fits)
+    bearing = np.degrees(np.arctan2(observer.y, observer.x - distance)) % 360
+    x = distance
+    y = np.zeros_like(distance)
+    lat, long = video_utils.xy_to_lat_long(
+        video_data.GOOGLE_EARTH_DATUM_LAT_LONG, video_data.GOOGLE_EARTH_X_AXIS, video_utils.XY(x, y)
+    )
+    return Trajectory(t, distance, speed, acceleration, bearing, x, y, np.asarray(lat), np.asarray(long))
+
+
+#: Number of samples over the time range used to bracket the first crossing by polynomial_crossing_times().
+BRACKET_SAMPLES = 256
+#: Maximum number of safeguarded Newton iterations.
+NEWTON_ITERATIONS = 50
+#: Crossing times are converged when the bracket or the Newton step is less than this (s).
+CROSSING_TOLERANCE = 1e-12
+
+
+class EventTimes(collections.namedtuple('EventTimes', 'time, error')):
+    """The mid time of each event and the error, the greatest difference from the min or max time."""
+    __slots__ = ()
+
+
+def _polynomial(coefficients: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """Evaluates the polynomial with coefficients in increasing order by Horner's method."""
+    result = np.zeros_like(t, dtype=np.float64)
+    for c in reversed(coefficients):
+        result = result * t + c
+    return result
+
+
+def polynomial_crossing_times(coefficients: typing.Sequence[float],
+                              targets: np.ndarray,
+                              t_range: typing.Tuple[float, float] = TIME_RANGE,
+                              samples: int = BRACKET_SAMPLES) -> np.ndarray:
+    """
+    Returns the first time in t_range that the polynomial with coefficients in increasing order, as used by
+    video_utils.polynomial_3() etc., equals each of the targets. NaN where there is no crossing in t_range.
+
+    The crossing is bracketed on a grid of samples then refined by Newton's method, falling back to bisection if a
+    step leaves the bracket. All targets are solved together.
+    """
+    coefficients = np.asarray(coefficients, dtype=np.float64)
+    derivative = coefficients[1:] * np.arange(1, len(coefficients))
+    targets = np.asarray(targets, dtype=np.float64)
+    shape = targets.shape
+    targets = targets.ravel()
+    grid = np.linspace(t_range[0], t_range[1], samples)
+    difference = _polynomial(coefficients, grid)[np.newaxis, :] - targets[:, np.newaxis]
+    sign = np.sign(difference)
+    crosses = (sign[:, :-1] * sign[:, 1:] <= 0)
+    found = np.any(crosses, axis=1)
+    first = np.argmax(crosses, axis=1)
+    lo = grid[first]
+    hi = grid[first + 1]
+    lo_sign = sign[np.arange(len(targets)), first]
+    # An exact hit on a grid point.
+    exact = lo_sign == 0
+    t = np.where(exact, lo, (lo + hi) / 2)
+    active = found & ~exact
+    for _i in range(NEWTON_ITERATIONS):
+        if not np.any(active):
+            break
+        value = _polynomial(coefficients, t) - targets
+        value_sign = np.sign(value)
+        # Shrink the bracket
+        lo = np.where(active & (value_sign == lo_sign), t, lo)
+        hi = np.where(active & (value_sign != lo_sign), t, hi)
+        slope = _polynomial(derivative, t)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = t - value / slope
+        in_bracket = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        t_next = np.where(in_bracket, newton, (lo + hi) / 2)
+        converged = (value == 0) | (np.abs(t_next - t) <= CROSSING_TOLERANCE) | (hi - lo <= CROSSING_TOLERANCE)
+        t = np.where(active & (value != 0), t_next, t)
+        active &= ~converged
+    return np.where(found, t, np.nan).reshape(shape)
+
+
+def sampled_crossing_times(t: np.ndarray, values: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Returns the first time that the sampled values equal each of the targets by linear interpolation between the
+    samples at t. NaN where there is no crossing.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    targets = np.asarray(targets, dtype=np.float64)
+    shape = targets.shape
+    targets = targets.ravel()
+    difference = np.asarray(values, dtype=np.float64)[np.newaxis, :] - targets[:, np.newaxis]
+    crosses = np.sign(difference[:, :-1]) * np.sign(difference[:, 1:]) <= 0
+    found = np.any(crosses, axis=1)
+    first = np.argmax(crosses, axis=1)
+    rows = np.arange(len(targets))
+    d0 = difference[rows, first]
+    d1 = difference[rows, first + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.where(d0 == d1, 0.0, d0 / (d0 - d1))
+    result = t[first] + fraction * (t[first + 1] - t[first])
+    return np.where(found, result, np.nan).reshape(shape)
+
+
+#: Columns that fit_event_times() and trajectory_event_times() can solve for.
+EVENT_COLUMNS = ('distance', 'speed', 'acceleration')
+
+
+def _column_polynomial(gs_fit: typing.Sequence[float], column: str) -> np.ndarray:
+    """The coefficients in increasing order of the column as a polynomial in time, see compute_trajectory()."""
+    gs_fit = np.asarray(gs_fit, dtype=np.float64)
+    if column == 'speed':
+        return gs_fit
+    if column == 'acceleration':
+        return gs_fit[1:] * np.arange(1, len(gs_fit))
+    if column == 'distance':
+        offset = video_data.RUNWAY_LEN_M - video_utils.polynomial_3_integral(
+            0.0, video_data.TIME_VIDEO_END_ASPHALT.time, *gs_fit
+        )
+        return np.concatenate(([offset], gs_fit / np.arange(1, len(gs_fit) + 1)))
+    raise ValueError('Column must be one of {}, not {}'.format(EVENT_COLUMNS, column))
+
+
+def _event_times(times: typing.List[np.ndarray]) -> EventTimes:
+    """Given the min/mid/max times return the mid and the error."""
+    error = np.maximum(np.abs(times[1] - times[0]), np.abs(times[1] - times[2]))
+    return EventTimes(times[1], error)
+
+
+def fit_event_times(gs_fits: typing.Sequence[typing.Sequence[float]],
+                    column: str,
+                    targets: np.ndarray,
+                    t_range: typing.Tuple[float, float] = TIME_RANGE) -> EventTimes:
+    """
+    Given the min/mid/max ground speed fits this returns the first time that the column, one of EVENT_COLUMNS, has
+    each of the target values. For example the time the aircraft passed distance X from the start of the runway or
+    reached speed V.
+    """
+    return _event_times(
+        [polynomial_crossing_times(_column_polynomial(gs_fit, column), targets, t_range) for gs_fit in gs_fits]
+    )
+
+
+def trajectory_event_times(traj: Trajectory, column: str, targets: np.ndarray) -> EventTimes:
+    """As fit_event_times() but for a sampled trajectory using linear interpolation."""
+    values = getattr(traj, column)
+    return _event_times([sampled_crossing_times(traj.t, values[row], targets) for row in range(len(values))])
+
+
+def start_of_take_off_times(gs_fits: typing.Sequence[typing.Sequence[float]],
+                            t_range: typing.Tuple[float, float] = TIME_RANGE) -> typing.List[float]:
+    """The time of zero ground speed, the start of take off, for each fit."""
+    return [float(polynomial_crossing_times(gs_fit, 0.0, t_range)) for gs_fit in gs_fits]
@@ -0,0 +1,141 @@
+"""
+Detects the aircraft passing fixed objects in the video frames so that AircraftTransit records, as in
+video_data.AIRCRAFT_TRANSITS, can be generated rather than timed by hand.
+
+For each object a region of interest in the frame, typically a narrow column through the object, is given.
+The background of the region is the median over all frames, the aircraft is in the region for only a short
+part of the video. The occupancy of the region in each frame is the mean absolute difference from the
+background and the nose and tail are where the occupancy crosses half way between the background level and
+the maximum. These are interpolated between frames to sub-frame precision.
+
+The regions are in frame pixels so the frames must be stabilised if the camera moves.
+"""
+import collections
+import typing
+
+import numpy as np
+
+from analysis import video_data
+
+#: Fraction of the way from the background occupancy to the maximum occupancy that is the nose or tail.
+OCCUPANCY_THRESHOLD = 0.5
+#: Decimal places that fractional frames are rounded to, the interpolation is not more precise than this.
+FRAME_DECIMALS = 2
+
+
+class RegionOfInterest(collections.namedtuple('RegionOfInterest', 'top, bottom, left, right')):
+    """Rows top to bottom and columns left to right, exclusive of bottom and right, of a frame.
+    bottom or right can be None for the rest of the frame."""
+    __slots__ = ()
+
+    @classmethod
+    def column(cls, column: int, top: int = 0, bottom: int = None) -> 'RegionOfInterest':
+        """A region of a single pixel column."""
+        return cls(top, bottom, column, column + 1)
+
+    def crop(self, frames: np.ndarray) -> np.ndarray:
+        """Takes a (frames, height, width, channels) or (height, width, channels) array and returns the region."""
+        return frames[..., self.top:self.bottom, self.left:self.right, :]
+
+
+class TransitObject(collections.namedtuple('TransitObject', 'roi, note')):
+    """A fixed object that the aircraft passes, the RegionOfInterest and the note for the AircraftTransit."""
+    __slots__ = ()
+
+
+def occupancy(crops: np.ndarray) -> np.ndarray:
+    """
+    Takes a (frames, height, width, channels) array of a region and returns the (frames,) array of the mean
+    absolute difference of each frame from the median of all frames.
+    """
+    crops = np.asarray(crops, dtype=np.float32)
+    background = np.median(crops, axis=0)
+    return np.mean(np.abs(crops - background), axis=(1, 2, 3))
+
+
+def transit_edges(profile: np.ndarray, threshold: float = OCCUPANCY_THRESHOLD) -> typing.Tuple[float, float]:
+    """
+    Takes an occupancy profile and returns the (entry, exit) fractional frame indices of the longest run above
+    the threshold. These are linearly interpolated between the frames either side of each crossing.
+    A ValueError is raised if there is no such run or it is at the start or end of the profile.
+    """
+    low = np.median(profile)
+    high = np.max(profile)
+    if not high > low:
+        raise ValueError('No occupancy above the background')
+    level = low + threshold * (high - low)
+    above = np.concatenate(([False], profile > level, [False]))
+    changes = np.flatnonzero(above[1:] != above[:-1])
+    starts, stops = changes[0::2], changes[1::2]
+    longest = np.argmax(stops - starts)
+    start, stop = starts[longest], stops[longest]
+    if start == 0 or stop == len(profile):
+        raise ValueError('Transit is not complete within the frames')
+    # Crossings between frames start - 1, start and stop - 1, stop.
+    entry = start - 1 + (level - profile[start - 1]) / (profile[start] - profile[start - 1])
+    exit_ = stop - 1 + (profile[stop - 1] - level) / (profile[stop - 1] - profile[stop])
+    return float(entry), float(exit_)
+
+
+def video_frame_to_time(video_frame: float) -> video_data.VideoTime:
+    """Converts a fractional video frame number to a VideoTime with the frame rounded to FRAME_DECIMALS."""
+    video_frame = round(video_frame, FRAME_DECIMALS)
+    seconds = int(video_frame // video_data.FRAMES_PER_SECOND)
+    return video_data.VideoTime(
+        seconds // 60,
+        seconds % 60,
+        round(video_frame - seconds * video_data.FRAMES_PER_SECOND, FRAME_DECIMALS),
+    )
+
+
+def _transit(crops: np.ndarray,
+             transit_object: TransitObject,
+             first_video_frame: int,
+             threshold: float) -> video_data.AircraftTransit:
+    try:
+        entry, exit_ = transit_edges(occupancy(crops), threshold)
+    except ValueError as err:
+        raise ValueError('{} {}'.format(transit_object.note, err)) from err
+    return video_data.AircraftTransit(
+        video_frame_to_time(first_video_frame + entry),
+        video_frame_to_time(first_video_frame + exit_),
+        transit_object.note,
+    )
+
+
+def detect_transits(frames: np.ndarray,
+                    objects: typing.Iterable[TransitObject],
+                    first_video_frame: int = 0,
+                    threshold: float = OCCUPANCY_THRESHOLD) -> typing.List[video_data.AircraftTransit]:
+    """
+    Takes a (frames, height, width, channels) array, such as frame_store.FrameStore.frames, of consecutive frames
+    starting at first_video_frame and returns an AircraftTransit for each object.
+    Only the regions are read from the array so this is efficient with a memory-mapped array.
+    A ValueError is raised if a transit is not found.
+    """
+    return [
+        _transit(transit_object.roi.crop(frames), transit_object, first_video_frame, threshold)
+        for transit_object in objects
+    ]
+
+
+def detect_transits_from_source(load: typing.Callable[[int], np.ndarray],
+                                video_frames: range,
+                                objects: typing.Sequence[TransitObject],
+                                threshold: float = OCCUPANCY_THRESHOLD) -> typing.List[video_data.AircraftTransit]:
+    """
+    As detect_transits() but the frames come from a frame source, such as a frame_cache.FrameCache, that takes a
+    video frame number and returns the image. Each of the consecutive video_frames is loaded once and all the
+    regions are taken from it.
+    """
+    if video_frames.step != 1:
+        raise ValueError('Video frames must be consecutive not step {}'.format(video_frames.step))
+    crops = [[] for _ in objects]
+    for video_frame in video_frames:
+        frame = load(video_frame)
+        for i, transit_object in enumerate(objects):
+            crops[i].append(transit_object.roi.crop(frame))
+    return [
+        _transit(np.stack(crop), transit_object, video_frames.start, threshold)
+        for crop, transit_object in zip(crops, objects)
+    ]
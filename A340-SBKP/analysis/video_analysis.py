@@ -1,6 +1,5 @@
 # import enum
 import collections
-import itertools
 import math
 import sys
 import typing
@@ -144,6 +143,27 @@ def create_time_distance_aspect_array(min_mid_max: video_data.ErrorDirection=vid
     return result
 
 
+def _aspect_intersections(time_distance_aspect_array: np.ndarray, baseline: float) -> typing.Tuple[np.ndarray, int]:
+    """
+    Given an array with distance and aspect in columns 1 and 2 this returns a 2D array of the x/y intersections of
+    all pairs of rows whose distances differ by > baseline and the number of pairs, in itertools.combinations() order.
+    Pairs that do not intersect are excluded.
+    """
+    i, j = np.triu_indices(len(time_distance_aspect_array), k=1)
+    possible_count = len(i)
+    use = np.abs(time_distance_aspect_array[i, 1] - time_distance_aspect_array[j, 1]) > baseline
+    i = i[use]
+    j = j[use]
+    d, y, status = video_utils.aspect_intersection_array(
+        time_distance_aspect_array[i, 1],
+        time_distance_aspect_array[i, 2],
+        time_distance_aspect_array[j, 1],
+        time_distance_aspect_array[j, 2]
+    )
+    ok = status == video_utils.TriangleStatus.OK
+    return np.column_stack((d[ok], y[ok])), possible_count
+
+
 def observer_position_combinations_from_aspects(
         min_mid_max: video_data.ErrorDirection=video_data.ErrorDirection.MID,
         baseline: float=0.0,
@@ -181,22 +201,7 @@ def observer_position_combinations_from_aspects(
             # Match criteria
             time_distance_aspect_array[:,0] < t_range[1]
         ]
-    temp: typing.List[typing.Tuple[float, float]] = []
-    possible_count = 0
-    for i, j in itertools.combinations(range(len(time_distance_aspect_array)), 2):
-        d0 = time_distance_aspect_array[i, 1]
-        d1 = time_distance_aspect_array[j, 1]
-        if abs(d0 - d1) > baseline:
-            temp.append(
-                video_utils.aspect_intersection(
-                    time_distance_aspect_array[i, 1],
-                    time_distance_aspect_array[i, 2],
-                    time_distance_aspect_array[j, 1],
-                    time_distance_aspect_array[j, 2]
-                )
-            )
-        possible_count += 1
-    result = np.asarray(temp)
+    result, possible_count = _aspect_intersections(time_distance_aspect_array, baseline)
     result.sort(axis=0)
     return result, possible_count
 
@@ -250,22 +255,7 @@ def observer_position_combinations_from_fits(
     array has all possible positions.
     """
     time_distance_aspect_array = time_distance_bearing_from_fits(time_interval)
-    temp: typing.List[typing.Tuple[float, float]] = []
-    possible_count = 0
-    for i, j in itertools.combinations(range(len(time_distance_aspect_array)), 2):
-        d0 = time_distance_aspect_array[i, 1]
-        d1 = time_distance_aspect_array[j, 1]
-        if abs(d0 - d1) > baseline:
-            temp.append(
-                video_utils.aspect_intersection(
-                    time_distance_aspect_array[i, 1],
-                    time_distance_aspect_array[i, 2],
-                    time_distance_aspect_array[j, 1],
-                    time_distance_aspect_array[j, 2]
-                )
-            )
-        possible_count += 1
-    result = np.asarray(temp)
+    result, possible_count = _aspect_intersections(time_distance_aspect_array, baseline)
     return result, possible_count
 
 
@@ -384,6 +374,49 @@ def observer_time_distance_bearing_from_wing_tips(
     return array
 
 
+class YawEstimate(collections.namedtuple('YawEstimate', 'yaw, yaw_min, yaw_max, bearing, distance')):
+    """The result of yaw_from_observers(), each is a (K, N) array for K observer candidates and N aspects.
+    yaw is in degrees in the range (-180, 180], +ve right, yaw_min and yaw_max are the error band.
+    bearing is the bearing in degrees [0, 360) and distance the distance in metres from the aircraft to the
+    observer."""
+    __slots__ = ()
+
+
+def observer_candidates(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Returns a (len(x) * len(y), 2) array of all the combinations of observer x and y positions."""
+    xx, yy = np.meshgrid(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    return np.column_stack((xx.ravel(), yy.ravel()))
+
+
+def yaw_from_observers(observers: np.ndarray,
+                       time_distance_aspect_array: np.ndarray,
+                       x_offset: float = 0.0,
+                       observer_error: typing.Union[float, np.ndarray] = 0.0) -> YawEstimate:
+    """
+    Computes the yaw of the aircraft for every observer candidate and every aspect in one call.
+
+    observers is a (K, 2) array of observer x, y positions.
+    time_distance_aspect_array is a (N, 4) array of (time, distance, aspect, aspect_error) such as from
+    observer_time_distance_bearing_from_wing_tips(). x_offset is added to the distance to give the x position
+    of the aircraft.
+    observer_error is the position error of the observer, either a scalar or one for each candidate, and this
+    adds 2 * atan(observer_error / distance) to the aspect error.
+    """
+    observers = np.asarray(observers, dtype=np.float64).reshape(-1, 2)
+    time_distance_aspect_array = np.asarray(time_distance_aspect_array, dtype=np.float64)
+    # Shapes (K, 1) against (N,) broadcast to (K, N).
+    obs_x = observers[:, 0, np.newaxis]
+    obs_y = observers[:, 1, np.newaxis]
+    dx = obs_x - (time_distance_aspect_array[:, 1] + x_offset)
+    bearing = np.degrees(np.arctan2(obs_y, dx)) % 360
+    yaw = (bearing - time_distance_aspect_array[:, 2]) % 360
+    yaw = np.where(yaw > 180.0, yaw - 360, yaw)
+    distance = np.sqrt(np.square(obs_y) + np.square(dx))
+    observer_error = np.asarray(observer_error, dtype=np.float64).reshape(-1, 1)
+    error = 2.0 * np.degrees(np.arctan(observer_error / distance)) + time_distance_aspect_array[:, 3]
+    return YawEstimate(yaw, yaw - error, yaw + error, bearing, distance)
+
+
 """Returns a three columns array of (time, distance, aspect) where time
     is the time of grounds speed measurements, distance the integral of the
     ground speed curve fit and aspect the interpolated aspect at that time."""
@@ -397,37 +430,31 @@ def transit_x_axis_distances(observer_x: float, observer_y: float) -> typing.Lis
     Returns a list of TimeXaxisDistanceLabel of the observed transits for a give observer position
     where the .distance is the x axis value in metres from the start of the runway.
     """
+    positions = np.array([video_data.GOOGLE_EARTH_POSITIONS_XY[label] for _t, label in video_data.GOOGLE_EARTH_EVENTS])
+    x_intercepts = video_utils.TransitLines.from_points_to_observers(
+        positions[:, 0], positions[:, 1], observer_x, observer_y
+    ).x_axis_intercept()
     result = []
-    for t, label in video_data.GOOGLE_EARTH_EVENTS:
-        # lat, lon = video_data.GOOGLE_EARTH_POSITIONS_LAT_LONG[k]
-        # event_time = video_data.GOOGLE_EARTH_EVENT_MAP[k]
-        # x, y = video_utils.lat_long_to_xy(
-        #     video_data.GOOGLE_EARTH_DATUM_LAT_LONG[0],
-        #     video_data.GOOGLE_EARTH_DATUM_LAT_LONG[1],
-        #     video_data.GOOGLE_EARTH_X_AXIS,
-        #     lat,
-        #     lon,
-        # )
-        x, y = video_data.GOOGLE_EARTH_POSITIONS_XY[label]
-        x_intercept = video_utils.transit_x_axis_intercept(x, y, observer_x, observer_y)
-        result.append(TimeXaxisDistanceLabel(t, x_intercept, label))
+    for (t, label), x_intercept in zip(video_data.GOOGLE_EARTH_EVENTS, x_intercepts):
+        result.append(TimeXaxisDistanceLabel(t, float(x_intercept), label))
     return result
 
 
+def full_transit_lines() -> video_utils.TransitLines:
+    """The full transit lines from GOOGLE_EARTH_FULL_TRANSITS."""
+    return video_utils.TransitLines.from_xy_pairs(
+        (transit_line.frm.xy, transit_line.to.xy) for transit_line in video_data.GOOGLE_EARTH_FULL_TRANSITS
+    )
+
+
 def observer_position_from_full_transits() -> np.ndarray:
     """
     Returns the observers position(s) from the intersection of full transit lines as
     a 2-D numpy array of x,y.
+    Pairs of lines that are nearly parallel are excluded, see video_utils.intersect_lines().
     """
-    crossing_xy = []
-    for i, j in itertools.combinations(range(len(video_data.GOOGLE_EARTH_FULL_TRANSITS)), 2):
-        transit1: video_data.FullTransitLine = video_data.GOOGLE_EARTH_FULL_TRANSITS[i]
-        transit2: video_data.FullTransitLine = video_data.GOOGLE_EARTH_FULL_TRANSITS[j]
-        crossing = video_utils.intersect_two_lines(
-            transit1.frm.xy, transit1.to.xy, transit2.frm.xy, transit2.to.xy,
-        )
-        crossing_xy.append((crossing.x, crossing.y))
-    ret = np.array(crossing_xy)
+    _i, _j, crossings = video_utils.intersect_all_pairs(full_transit_lines())
+    ret = np.column_stack((crossings.x, crossings.y))[crossings.valid]
     return ret
 
 
@@ -441,6 +468,277 @@ def observer_position_mean_std_from_full_transits() -> typing.Tuple[typing.Tuple
 
 
 
+#: Grid search for the observer position, 10m spacing over a 5 x 3 km area around the runway and observer.
+OBSERVER_GRID_X_RANGE = (-1000.0, 4000.0)
+OBSERVER_GRID_Y_RANGE = (-2000.0, 1000.0)
+OBSERVER_GRID_SPACING = 10.0
+#: Confidence level of the region returned by observer_likelihood_map()
+OBSERVER_GRID_CONFIDENCE = 0.95
+#: Maximum number of cells x transits evaluated at once, this bounds the memory used.
+OBSERVER_GRID_CHUNK_SIZE = 1 << 20
+
+class ObserverLikelihoodMap(collections.namedtuple(
+        'ObserverLikelihoodMap', 'x, y, cost, minimum, minimum_cost, confidence_region, confidence')):
+    """The result of observer_likelihood_map().
+    x and y are the 1D grid coordinates, cost is a (len(y), len(x)) array of the chi-squared cost of the observer
+    being at each cell. minimum is the video_utils.XY of the lowest cost cell and minimum_cost its cost.
+    confidence_region is a boolean array the same shape as cost that is True for cells within the confidence
+    level."""
+    __slots__ = ()
+
+
+def observer_grid_cost(transit_lines: video_utils.TransitLines,
+                       x: np.ndarray,
+                       y: np.ndarray,
+                       error: float = video_data.GOOGLE_EARTH_ERROR,
+                       chunk_size: int = OBSERVER_GRID_CHUNK_SIZE) -> np.ndarray:
+    """
+    Returns a (len(y), len(x)) array of the chi-squared cost of an observer at each x, y grid cell given the transit
+    lines. The cost is the sum over transit lines of the square of the perpendicular distance of the cell from the line
+    divided by the uncertainty of the line at that point.
+
+    The uncertainty assumes independent errors of size error in the from and to positions so at a fraction f along
+    the line from -> to the uncertainty is error * sqrt((1 - f)**2 + f**2).
+
+    The grid is evaluated in tiles of rows so that no more than chunk_size cells x transits are held at once.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    length = transit_lines.distance()
+    cost = np.empty((len(y), len(x)))
+    rows_per_tile = max(1, chunk_size // max(1, len(x) * len(length)))
+    for row in range(0, len(y), rows_per_tile):
+        cell_y = y[row:row + rows_per_tile, np.newaxis, np.newaxis]
+        cell_x = x[np.newaxis, :, np.newaxis]
+        fraction = transit_lines.along_distance(cell_x, cell_y) / length
+        sigma = error * np.sqrt((1 - fraction)**2 + fraction**2)
+        cost[row:row + rows_per_tile] = np.sum(
+            (transit_lines.perpendicular_distance(cell_x, cell_y) / sigma)**2, axis=-1
+        )
+    return cost
+
+
+def observer_likelihood_map(x_range: typing.Tuple[float, float] = OBSERVER_GRID_X_RANGE,
+                            y_range: typing.Tuple[float, float] = OBSERVER_GRID_Y_RANGE,
+                            spacing: float = OBSERVER_GRID_SPACING,
+                            error: float = video_data.GOOGLE_EARTH_ERROR,
+                            confidence: float = OBSERVER_GRID_CONFIDENCE,
+                            chunk_size: int = OBSERVER_GRID_CHUNK_SIZE) -> ObserverLikelihoodMap:
+    """
+    Evaluates the cost of the observer position on a dense grid against all the full transit lines at once.
+    Unlike observer_position_from_full_transits() this does not depend on pairwise intersections and takes the
+    Google Earth position error into account.
+
+    The confidence region is the cells whose cost is within the chi-squared value for two degrees of freedom at the
+    given confidence level of the minimum cost, that is -2 * ln(1 - confidence).
+    """
+    x = np.arange(x_range[0], x_range[1] + spacing / 2, spacing)
+    y = np.arange(y_range[0], y_range[1] + spacing / 2, spacing)
+    cost = observer_grid_cost(full_transit_lines(), x, y, error, chunk_size)
+    row, column = np.unravel_index(np.argmin(cost), cost.shape)
+    minimum_cost = cost[row, column]
+    confidence_region = cost <= minimum_cost - 2 * math.log(1 - confidence)
+    return ObserverLikelihoodMap(
+        x, y, cost, video_utils.XY(x[column], y[row]), minimum_cost, confidence_region, confidence
+    )
+
+
+def print_observer_likelihood_map() -> None:
+    likelihood = observer_likelihood_map()
+    region_x = likelihood.x[np.any(likelihood.confidence_region, axis=0)]
+    region_y = likelihood.y[np.any(likelihood.confidence_region, axis=1)]
+    print('Observer grid minimum: x={:8.1f} y={:8.1f} cost={:.2f}'.format(
+        likelihood.minimum.x, likelihood.minimum.y, likelihood.minimum_cost
+    ))
+    print('{:.0%} confidence region: x={:8.1f} to {:8.1f} y={:8.1f} to {:8.1f} cells={:d}'.format(
+        likelihood.confidence, region_x.min(), region_x.max(), region_y.min(), region_y.max(),
+        np.count_nonzero(likelihood.confidence_region),
+    ))
+
+
+#: Robust observer position, residuals below this (metres) are inliers.
+OBSERVER_ROBUST_THRESHOLD = 2.0 * video_data.GOOGLE_EARTH_ERROR
+#: Maximum number of RANSAC hypotheses, if the number of pairs is less than this all pairs are used.
+OBSERVER_ROBUST_HYPOTHESES = 4096
+OBSERVER_ROBUST_METHODS = ('ransac', 'lmeds')
+
+
+class RobustObserverPosition(collections.namedtuple(
+        'RobustObserverPosition', 'position, inliers, residuals, hypotheses, score')):
+    """The result of observer_position_robust().
+    position is the video_utils.XY least squares position from the inlier lines, inliers is a boolean array with
+    one value per line and residuals the perpendicular distances of each line from position.
+    hypotheses is the number of hypotheses evaluated and score the score of the best one, the inlier count for
+    RANSAC or the median squared residual for LMedS."""
+    __slots__ = ()
+
+
+def _least_squares_position(lines: video_utils.TransitLines, mask: np.ndarray) -> video_utils.XY:
+    """The position that minimises the sum of squared perpendicular distances to the masked lines."""
+    length = lines.distance()[mask]
+    normal_x = -(lines.to_y - lines.from_y)[mask] / length
+    normal_y = (lines.to_x - lines.from_x)[mask] / length
+    a = np.column_stack((normal_x, normal_y))
+    b = normal_x * lines.from_x[mask] + normal_y * lines.from_y[mask]
+    (x, y), _residuals, _rank, _sv = np.linalg.lstsq(a, b, rcond=None)
+    return video_utils.XY(x, y)
+
+
+def observer_position_robust(lines: video_utils.TransitLines,
+                             threshold: float = OBSERVER_ROBUST_THRESHOLD,
+                             hypotheses: int = OBSERVER_ROBUST_HYPOTHESES,
+                             method: str = 'ransac',
+                             seed: typing.Optional[int] = None) -> RobustObserverPosition:
+    """
+    Robust estimate of the observer position from lines that all should pass through the observer.
+
+    Hypotheses are the intersections of minimal pairs of lines. All pairs are used if there are no more than
+    hypotheses of them, otherwise hypotheses random pairs are drawn. Every hypothesis is scored against every line
+    at once as a (hypotheses, lines) array of perpendicular distances:
+
+    - 'ransac' maximises the number of lines within threshold, ties are broken by the smallest sum of the inlier
+    residuals.
+    - 'lmeds' minimises the median squared residual. The inliers are those within 2.5 robust standard deviations,
+    or threshold if that is smaller.
+
+    The position is then the least squares fit of the inlier lines.
+    """
+    if method not in OBSERVER_ROBUST_METHODS:
+        raise ValueError('Method must be one of {}, not {}'.format(OBSERVER_ROBUST_METHODS, method))
+    lines = video_utils.TransitLines(*(np.asarray(v, dtype=np.float64) for v in lines))
+    count = len(lines.from_x)
+    if count < 2:
+        raise ValueError('Need at least two lines, not {:d}'.format(count))
+    pair_count = count * (count - 1) // 2
+    if pair_count <= hypotheses:
+        i, j = np.triu_indices(count, k=1)
+    else:
+        rng = np.random.default_rng(seed)
+        i = rng.integers(0, count, hypotheses)
+        # Offset so that j != i
+        j = (i + rng.integers(1, count, hypotheses)) % count
+    crossings = video_utils.intersect_lines(
+        video_utils.TransitLines(*(v[i] for v in lines)), video_utils.TransitLines(*(v[j] for v in lines)),
+    )
+    x = crossings.x[crossings.valid]
+    y = crossings.y[crossings.valid]
+    if len(x) == 0:
+        raise ValueError('All line pairs are parallel or nearly so.')
+    residuals = np.abs(lines.perpendicular_distance(x[:, np.newaxis], y[:, np.newaxis]))
+    if method == 'ransac':
+        inliers = residuals <= threshold
+        inlier_count = np.count_nonzero(inliers, axis=1)
+        inlier_sum = np.sum(np.where(inliers, residuals, 0.0), axis=1)
+        # lexsort uses the last key as the primary key.
+        best = np.lexsort((inlier_sum, -inlier_count))[0]
+        score = inlier_count[best]
+        inlier_mask = inliers[best]
+    else:
+        median = np.median(residuals**2, axis=1)
+        best = np.argmin(median)
+        score = median[best]
+        sigma = 1.4826 * (1 + 5 / max(1, count - 2)) * math.sqrt(score)
+        inlier_mask = residuals[best] <= max(2.5 * sigma, threshold)
+    if np.count_nonzero(inlier_mask) < 2:
+        # Degenerate, use the best hypothesis and its supporting lines as they stand.
+        position = video_utils.XY(x[best], y[best])
+    else:
+        position = _least_squares_position(lines, inlier_mask)
+    return RobustObserverPosition(
+        position,
+        inlier_mask,
+        np.abs(lines.perpendicular_distance(position.x, position.y)),
+        len(x),
+        score,
+    )
+
+
+def aspect_lines(min_mid_max: video_data.ErrorDirection = video_data.ErrorDirection.MID) -> video_utils.TransitLines:
+    """
+    The aspect observations as lines from the aircraft position on the x axis, distance from the start of the
+    video, at the bearing of the aspect.
+    These are the lines that observer_position_combinations_from_aspects() intersects pairwise.
+    """
+    gs_fit = ground_speed_curve_fit(video_data.ErrorDirection.MID)
+    time_distance_aspect_array = observer_time_distance_bearing_from_wing_tips(gs_fit, min_mid_max)
+    distance = time_distance_aspect_array[:, 1]
+    bearing = np.radians(time_distance_aspect_array[:, 2])
+    return video_utils.TransitLines(distance, np.zeros_like(distance), distance + np.cos(bearing), np.sin(bearing))
+
+
+def observer_position_robust_from_full_transits(**kwargs) -> RobustObserverPosition:
+    """Robust observer position from the full transits, the kwargs are passed to observer_position_robust()."""
+    return observer_position_robust(full_transit_lines(), **kwargs)
+
+
+def observer_position_robust_from_aspects(**kwargs) -> RobustObserverPosition:
+    """Robust observer position from the aspects, the kwargs are passed to observer_position_robust().
+    The x datum is the start of the video as for observer_position_mean_std_from_aspects()."""
+    return observer_position_robust(aspect_lines(), **kwargs)
+
+
+def video_start_x_offset() -> float:
+    """The x position of the aircraft at t=0 from the runway start, by integrating the mid ground speed fit back
+    from the end of the asphalt. Adding this moves the x datum from the start of the video to the runway start."""
+    distance_to_end = ground_speed_integral(
+        0, video_data.TIME_VIDEO_END_ASPHALT.time, ground_speed_curve_fit(video_data.ErrorDirection.MID)
+    )
+    return video_data.RUNWAY_LEN_M - distance_to_end
+
+
+def observer_position_robust_from_transits_and_aspects(x_offset: float = None,
+                                                       **kwargs) -> RobustObserverPosition:
+    """
+    Robust observer position from the full transits and the aspects in a single solve so that every line votes
+    for the same hypotheses, the kwargs are passed to observer_position_robust().
+    The aspect lines are moved by x_offset, default video_start_x_offset(), so that the x datum is the runway start
+    as for the full transits.
+    The lines, and so the inliers and residuals of the result, are the full transit lines followed by the aspect
+    lines, see observer_position_robust_sources().
+    """
+    if x_offset is None:
+        x_offset = video_start_x_offset()
+    transits = full_transit_lines()
+    aspects = aspect_lines()
+    lines = video_utils.TransitLines(
+        np.concatenate((transits.from_x, aspects.from_x + x_offset)),
+        np.concatenate((transits.from_y, aspects.from_y)),
+        np.concatenate((transits.to_x, aspects.to_x + x_offset)),
+        np.concatenate((transits.to_y, aspects.to_y)),
+    )
+    return observer_position_robust(lines, **kwargs)
+
+
+def observer_position_robust_sources() -> np.ndarray:
+    """The source of each line of observer_position_robust_from_transits_and_aspects(), 'transit' or 'aspect'."""
+    return np.array(['transit'] * len(full_transit_lines().from_x) + ['aspect'] * len(aspect_lines().from_x))
+
+
+def print_observer_position_robust() -> None:
+    for name, function in (
+            ('Full transits', observer_position_robust_from_full_transits),
+            ('Aspects', observer_position_robust_from_aspects),
+            ('Combined', observer_position_robust_from_transits_and_aspects),
+    ):
+        for method in OBSERVER_ROBUST_METHODS:
+            result = function(method=method)
+            print('{:<16} {:<6} x={:8.1f} y={:8.1f} inliers={:d}/{:d} hypotheses={:d}'.format(
+                name, method, result.position.x, result.position.y,
+                np.count_nonzero(result.inliers), len(result.inliers), result.hypotheses,
+            ))
+    sources = observer_position_robust_sources()
+    for method in OBSERVER_ROBUST_METHODS:
+        inliers = observer_position_robust_from_transits_and_aspects(method=method).inliers
+        print('Combined inliers {:<6} {}'.format(
+            method,
+            ' '.join(
+                '{}={:d}/{:d}'.format(source, np.count_nonzero(inliers[sources == source]),
+                                      np.count_nonzero(sources == source))
+                for source in ('transit', 'aspect')
+            ),
+        ))
+
+
 def distance_fit_from_transits() -> typing.List[float]:
     """
     This uses the observers position from full transits and then the runway positions from all
@@ -542,6 +840,8 @@ def main():
         (obs_array[:,1].max() - obs_array[:,1].min()) / 2.0,
         obs_array[:,1].std(),
     ))
+    print_observer_likelihood_map()
+    print_observer_position_robust()
 
     print('Bye, bye!')
     return 0
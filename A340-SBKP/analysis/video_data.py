@@ -134,10 +134,14 @@ class VideoTime(collections.namedtuple('VideoTime', 'min, sec, frame')):
         return self.time < other.time
 
     def __format__(self, format_spec) -> str:
+        frame_spec = format_spec
         if format_spec == '':
             format_spec = '02d'
-        return 'VideoTime({min:{format_spec}}:{sec:{format_spec}}:{frame:{format_spec}})'.format(
-            min=self.min, sec=self.sec, frame=self.frame, format_spec=format_spec
+            # Fractional frames such as 18.5 as 18.50
+            frame_spec = '02d' if self.frame == int(self.frame) else '05.2f'
+        frame = int(self.frame) if frame_spec.endswith('d') else self.frame
+        return 'VideoTime({min:{format_spec}}:{sec:{format_spec}}:{frame:{frame_spec}})'.format(
+            min=self.min, sec=self.sec, frame=frame, format_spec=format_spec, frame_spec=frame_spec
         )
 
 
@@ -170,6 +174,8 @@ TIME_VIDEO_MAX_AS_INT = int(TIME_VIDEO_END.time + 1)
 # ffmped numbering starts from 1 so there is an off-by-2 error. t=0 is ffmpeg named 2.
 #
 # Let's take the GoPro application as the source of truth, then with ffmpeg all frames - 2 as equivalent.
+#: ffmpeg image number n is video frame n - FFMPEG_FRAME_OFFSET.
+FFMPEG_FRAME_OFFSET = 2
 
 
 def video_frame_to_time(video_frame: int) -> VideoTime:
@@ -181,27 +187,32 @@ def video_frame_to_time(video_frame: int) -> VideoTime:
     )
 
 
+def video_time_to_video_frame(vt: VideoTime) -> int:
+    """Converts video time to a video frame number, the inverse of video_frame_to_time()."""
+    return (vt.min * 60 + vt.sec) * FRAMES_PER_SECOND + vt.frame
+
+
 def video_time_to_ffmepeg_time(vt: VideoTime) -> VideoTime:
     """Converts video time to a ffmpeg frame number."""
-    video_frame = int(vt.time * FRAMES_PER_SECOND + 2)
+    video_frame = int(vt.time * FRAMES_PER_SECOND + FFMPEG_FRAME_OFFSET)
     return video_frame_to_time(video_frame)
 
 
 def video_time_to_ffmpeg_name(vt: VideoTime) -> str:
     """Converts video time to a ffmpeg filename."""
-    return 'image{:06d}.png'.format(int(vt.time * FRAMES_PER_SECOND + 2))
+    return 'image{:06d}.png'.format(int(vt.time * FRAMES_PER_SECOND + FFMPEG_FRAME_OFFSET))
 
 
 def ffmpeg_time_to_video_time(vt: VideoTime) -> VideoTime:
     """Converts ffmpeg frame number to video time."""
-    video_frame = int(vt.time * FRAMES_PER_SECOND - 2)
+    video_frame = int(vt.time * FRAMES_PER_SECOND - FFMPEG_FRAME_OFFSET)
     return video_frame_to_time(video_frame)
 
 
 def ffmpeg_name_to_video_time(name: str) -> VideoTime:
     """Converts ffmpeg filename video time."""
     frame = int(name[len('image'):len('image')+6])
-    return video_frame_to_time(frame - 2)
+    return video_frame_to_time(frame - FFMPEG_FRAME_OFFSET)
 
 
 # Other events
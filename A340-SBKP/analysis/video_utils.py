@@ -3,10 +3,12 @@ General calculation functions for video analysis.
 """
 import collections
 import bisect
+import enum
 import math
 import re
 import typing
 
+import numpy as np
 import utm
 
 
@@ -143,6 +145,70 @@ def aspect_intersection(d0: float, b0: float, d1: float, b1: float) -> typing.Tu
     return d, -y
 
 
+class TriangleStatus(enum.IntEnum):
+    """Status codes of each element from triangle_ASA_array() and aspect_intersection_array()."""
+    OK = 0
+    # The equivalents of the ValueError that triangle_ASA() raises.
+    ALPHA_NOT_POSITIVE = 1
+    SIDE_NOT_POSITIVE = 2
+    BETA_NOT_POSITIVE = 3
+    # alpha + beta >= pi so the sides do not meet.
+    NO_TRIANGLE = 4
+    # The equivalents of the ValueError that aspect_intersection() raises.
+    # The bearing from the nearer point is ahead of the bearing from the further point.
+    BEARINGS_DIVERGE = 5
+    # The bearings are on opposite sides of 180 degrees, that is of the x axis.
+    OPPOSITE_SIDES = 6
+
+
+def triangle_ASA_array(alpha: np.ndarray, c: np.ndarray,
+                       beta: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Array version of triangle_ASA(), the arguments broadcast together.
+    Returns arrays of side A-C, angle at C, side C-B and the TriangleStatus of each element.
+    Where the status is not TriangleStatus.OK the sides and angle are NaN, the first failing check is reported."""
+    alpha, c, beta = np.broadcast_arrays(
+        np.asarray(alpha, dtype=np.float64), np.asarray(c, dtype=np.float64), np.asarray(beta, dtype=np.float64)
+    )
+    gamma = math.pi - alpha - beta
+    # np.select takes the first match so this is in order of precedence, the same as the checks in triangle_ASA().
+    status = np.select(
+        [alpha <= 0.0, c <= 0.0, beta <= 0.0, gamma <= 0.0],
+        [TriangleStatus.ALPHA_NOT_POSITIVE, TriangleStatus.SIDE_NOT_POSITIVE, TriangleStatus.BETA_NOT_POSITIVE,
+         TriangleStatus.NO_TRIANGLE],
+        TriangleStatus.OK,
+    ).astype(np.int8)
+    ok = status == TriangleStatus.OK
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = np.where(ok, c / np.sin(gamma), np.nan)
+    a = factor * np.sin(alpha)
+    b = factor * np.sin(beta)
+    return b, np.where(ok, gamma, np.nan), a, status
+
+
+def aspect_intersection_array(d0: np.ndarray, b0: np.ndarray,
+                              d1: np.ndarray, b1: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Array version of aspect_intersection(), the arguments broadcast together.
+    Returns arrays of d, y (metres) and the TriangleStatus of each element.
+    Instead of raising a ValueError the d, y are NaN and the status is not TriangleStatus.OK."""
+    d0, b0, d1, b1 = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (d0, b0, d1, b1)))
+    b0 = b0 % 360
+    b1 = b1 % 360
+    swap = d1 < d0
+    d0, d1 = np.where(swap, d1, d0), np.where(swap, d0, d1)
+    b0, b1 = np.where(swap, b1, b0), np.where(swap, b0, b1)
+    y_positive = b0 < 180
+    diverge = np.where(y_positive, b1 < b0, b1 > b0)
+    beta = np.radians(np.where(y_positive, b0, 360 - b0))
+    alpha = np.radians(np.where(y_positive, 180 - b1, b1 - 180))
+    _b, _gamma, a, status = triangle_ASA_array(alpha, d1 - d0, beta)
+    status = np.where(y_positive != (b1 < 180), TriangleStatus.OPPOSITE_SIDES, status)
+    status = np.where(diverge, TriangleStatus.BEARINGS_DIVERGE, status).astype(np.int8)
+    ok = status == TriangleStatus.OK
+    d = np.where(ok, d0 + a * np.cos(beta), np.nan)
+    y = np.where(ok, a * np.sin(beta), np.nan)
+    return d, np.where(y_positive, y, -y), status
+
+
 def interpolate(xS: typing.List[float], yS: typing.List[float], x: float) -> float:
     """Linear interpolation with extrapolation."""
     if len(xS) != len(yS):
@@ -199,12 +265,78 @@ def intersect_two_lines(line1from: XY, line1to: XY,
                         line2from: XY, line2to: XY,) -> XY:
     """
     Given two lines, defined by two points each this returns the intersection point.
+    This raises a ValueError if the lines are parallel.
     """
-    dydx1 = (line1to.y - line1from.y) / (line1to.x - line1from.x)
-    dydx2 = (line2to.y - line2from.y) / (line2to.x - line2from.x)
-    x = (line1from.x * dydx1 - line2from.x * dydx2 + line2from.y - line1from.y) / (dydx1 - dydx2)
-    y = (x - line1from.x) * dydx1 + line1from.y
-    return XY(x, y)
+    intersections = intersect_lines(
+        TransitLines(line1from.x, line1from.y, line1to.x, line1to.y),
+        TransitLines(line2from.x, line2from.y, line2to.x, line2to.y),
+        min_angle=0.0,
+    )
+    if not intersections.valid:
+        raise ValueError('Lines are parallel: {} -> {} and {} -> {}'.format(line1from, line1to, line2from, line2to))
+    return XY(float(intersections.x), float(intersections.y))
+
+
+#: Default minimum angle in degrees between lines for intersect_lines() to regard them as crossing.
+INTERSECT_MIN_ANGLE_DEG = 1.0
+
+
+class LineIntersections(collections.namedtuple('LineIntersections', 'x, y, sin_angle, valid')):
+    """
+    The result of intersect_lines().
+    x, y are the intersections, NaN where not valid.
+    sin_angle is the sine of the angle between the lines, 0 for parallel lines and 1 for perpendicular lines.
+    This is the conditioning of the intersection, the uncertainty of the intersection from an uncertainty in
+    either line is proportional to 1 / sin_angle.
+    valid is True where the angle between the lines is at least the minimum angle.
+    """
+    __slots__ = ()
+
+
+def intersect_lines(lines1: 'TransitLines', lines2: 'TransitLines',
+                    min_angle: float = INTERSECT_MIN_ANGLE_DEG) -> LineIntersections:
+    """
+    Returns the intersections of each of lines1 with the corresponding lines2, these broadcast together.
+    This uses homogeneous coordinates, the line through two points is their cross product and the intersection of
+    two lines is the cross product of the lines, so vertical lines need no special treatment.
+    Coordinates are taken relative to the from point of lines1 to preserve precision.
+    Pairs of lines with an angle between them of less than min_angle degrees are not valid.
+    """
+    lines1 = TransitLines(*(np.asarray(v, dtype=np.float64) for v in lines1))
+    lines2 = TransitLines(*(np.asarray(v, dtype=np.float64) for v in lines2))
+    # Line 1 through the origin and (dx1, dy1), its homogeneous form is (-dy1, dx1, 0)
+    dx1 = lines1.to_x - lines1.from_x
+    dy1 = lines1.to_y - lines1.from_y
+    # Line 2 relative to the origin
+    x2 = lines2.from_x - lines1.from_x
+    y2 = lines2.from_y - lines1.from_y
+    dx2 = lines2.to_x - lines2.from_x
+    dy2 = lines2.to_y - lines2.from_y
+    c2 = x2 * dy2 - y2 * dx2
+    # Line 2 is (-dy2, dx2, c2) and the cross product (-dy1, dx1, 0) x (-dy2, dx2, c2) is (dx1 * c2, dy1 * c2, w)
+    w = dx1 * dy2 - dy1 * dx2
+    sin_angle = np.abs(w) / (np.hypot(dx1, dy1) * np.hypot(dx2, dy2))
+    valid = np.asarray(sin_angle > 0.0)
+    if min_angle > 0.0:
+        valid &= sin_angle >= math.sin(math.radians(min_angle))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = np.where(valid, dx1 * c2 / w, np.nan) + lines1.from_x
+        y = np.where(valid, dy1 * c2 / w, np.nan) + lines1.from_y
+    return LineIntersections(x, y, sin_angle, valid)
+
+
+def intersect_all_pairs(lines: 'TransitLines',
+                        min_angle: float = INTERSECT_MIN_ANGLE_DEG
+                        ) -> typing.Tuple[np.ndarray, np.ndarray, LineIntersections]:
+    """
+    Returns the indices i, j and the intersections of all N * (N - 1) / 2 pairs of lines, in the same order as
+    itertools.combinations(range(N), 2).
+    """
+    i, j = np.triu_indices(len(lines.from_x), k=1)
+    lines = TransitLines(*(np.asarray(v, dtype=np.float64) for v in lines))
+    return i, j, intersect_lines(
+        TransitLines(*(v[i] for v in lines)), TransitLines(*(v[j] for v in lines)), min_angle
+    )
 
 
 def polynomial_3(x, a, b, c, d):
@@ -443,3 +575,87 @@ def transit_point_with_error(line_from: XY, line_to: XY, error: float) -> typing
     new_to = move_point(line_to, error, bearing + 90)
     new_bearing = transit_bearing(new_from.x, new_from.y, new_to.x, new_to.y)
     return new_from, new_to, new_bearing
+
+
+class TransitLines(collections.namedtuple('TransitLines', 'from_x, from_y, to_x, to_y')):
+    """
+    Any number of transit lines as columns of from/to x/y, the vectorised equivalent of the transit_* functions
+    where from is the object position px, py and to is the observer ox, oy (or the far point of a transit line).
+    The columns can be any shapes that broadcast together, for example objects of shape (n,) and observers of shape
+    (k, 1) give results of shape (k, n).
+    The results match the scalar transit_* functions to within a few ULP, numpy and math can round the
+    transcendental functions differently.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_xy_pairs(cls, pairs: typing.Iterable[typing.Tuple[XY, XY]]) -> 'TransitLines':
+        """Create from an iterable of (from, to) XY pairs."""
+        values = np.array([(frm.x, frm.y, to.x, to.y) for frm, to in pairs], dtype=np.float64).reshape(-1, 4)
+        return cls(values[:, 0], values[:, 1], values[:, 2], values[:, 3])
+
+    @classmethod
+    def from_points_to_observers(cls, px: np.ndarray, py: np.ndarray,
+                                 ox: np.ndarray, oy: np.ndarray) -> 'TransitLines':
+        """Create the transit lines from every object to every observer, the result has shape
+        observers.shape + objects.shape."""
+        px = np.asarray(px, dtype=np.float64)
+        py = np.asarray(py, dtype=np.float64)
+        ox = np.asarray(ox, dtype=np.float64)
+        oy = np.asarray(oy, dtype=np.float64)
+        expand = (np.newaxis,) * px.ndim
+        return cls(px, py, ox[(Ellipsis,) + expand], oy[(Ellipsis,) + expand])
+
+    def x_axis_intercept(self) -> np.ndarray:
+        """The value on the x axis of each transit line, see transit_x_axis_intercept()."""
+        return self.from_x + self.from_y * (self.to_x - self.from_x) / (self.from_y - self.to_y)
+
+    def bearing(self) -> np.ndarray:
+        """The bearing from -> to of each transit line in degrees, see transit_bearing()."""
+        return np.degrees(np.arctan2(self.to_y - self.from_y, self.to_x - self.from_x))
+
+    def distance(self) -> np.ndarray:
+        """The distance from -> to of each transit line, see transit_distance()."""
+        return np.sqrt(np.square(self.to_y - self.from_y) + np.square(self.to_x - self.from_x))
+
+    def distance_to_x(self) -> np.ndarray:
+        """The distance from -> x axis on each transit line, see transit_distance_to_x()."""
+        return self.distance() * self.from_y / (self.from_y - self.to_y)
+
+    def x_axis_error(self, p_err: float, o_err: float) -> np.ndarray:
+        """The uncertainty on the x axis of each transit line, see transit_x_axis_error()."""
+        return p_err - (p_err - o_err) * self.distance_to_x() / self.distance()
+
+    def perpendicular_distance(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """The signed perpendicular distance of x, y from each (infinite) transit line, positive is to the left
+        looking from -> to."""
+        return ((self.to_x - self.from_x) * (y - self.from_y) - (self.to_y - self.from_y) * (x - self.from_x)) \
+            / self.distance()
+
+    def along_distance(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """The distance along each transit line from the from point of the foot of the perpendicular from x, y."""
+        return ((self.to_x - self.from_x) * (x - self.from_x) + (self.to_y - self.from_y) * (y - self.from_y)) \
+            / self.distance()
+
+    def line_past_observer(self, observer_x: np.ndarray, observer_y: np.ndarray, extra: float) -> XY:
+        """The x, y position of each line extended past the observer by extra amount as an XY of arrays,
+        see transit_line_past_observer()."""
+        bearing = self.bearing()
+        distance = TransitLines(self.from_x, self.from_y, observer_x, observer_y).distance() + extra
+        x = distance * np.cos(np.radians(bearing))
+        y = distance * np.sin(np.radians(bearing))
+        return XY(self.from_x + x, self.from_y + y)
+
+    def point_with_error(self, error: float) -> typing.Tuple['TransitLines', np.ndarray]:
+        """New transit lines with the error applied in the worst possible way to each from/to point and the new
+        bearings, see transit_point_with_error()."""
+        bearing = self.bearing()
+        from_radians = np.radians(bearing - 90)
+        to_radians = np.radians(bearing + 90)
+        new_lines = TransitLines(
+            self.from_x + error * np.cos(from_radians),
+            self.from_y + error * np.sin(from_radians),
+            self.to_x + error * np.cos(to_radians),
+            self.to_y + error * np.sin(to_radians),
+        )
+        return new_lines, new_lines.bearing()
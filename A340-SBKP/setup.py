@@ -9,11 +9,15 @@ __version__ = '0.0.1'
 # Testing: PYTHONPATH=. pytest --benchmark-name=long --benchmark-sort=name --benchmark-save=benchmark_00 --benchmark-warmup=on tests/unit/
 # --benchmark-warmup=on is slow as it does about 10000 warmup iterations.
 # Benchmark data in .benchmarks
+# Benchmarks of the numeric kernels, save a baseline then compare, failing on a regression of more than 10%:
+# PYTHONPATH=. pytest analysis/test_benchmark.py --benchmark-only --benchmark-save=benchmark_00
+# PYTHONPATH=. pytest analysis/test_benchmark.py --benchmark-only --benchmark-compare=0001 --benchmark-compare-fail=mean:10%
 
 
 test_requirements = [
     'pytest',
     'hypothesis',
+    'pytest-benchmark',
 ]
 
 setup(
@@ -0,0 +1,84 @@
+"""
+Time alignment of two signals sampled at different frame rates by FFT cross-correlation.
+
+Times follow map_funcs.frame_to_time() so sample i of a signal at rate r is at time i / r.
+"""
+import typing
+
+import numpy as np
+from scipy import signal
+
+
+class Alignment(typing.NamedTuple):
+    """The time in the first signal is offset + (1 + drift) * the time in the second signal.
+    offset is the same as video_ab.time_difference_mid_max_min(), the time in video A when video B starts."""
+    offset: float
+    drift: float
+    # Peak correlation per sample per channel, 1.0 is a perfect match of normalised signals.
+    correlation: float
+
+
+def normalise(values: np.ndarray) -> np.ndarray:
+    """Returns the columns of a (n, c) array with zero mean and unit variance, constant columns become zero."""
+    values = np.asarray(values, dtype=np.float64)
+    std = np.std(values, axis=0)
+    return np.where(std > 0, (values - np.mean(values, axis=0)) / np.where(std > 0, std, 1.0), 0.0)
+
+
+def resample(values: np.ndarray, rate_from: float, rate_to: float, time_scale: float = 1.0) -> np.ndarray:
+    """Linearly resamples the (n, c) array sampled at rate_from to rate_to.
+    If time_scale is not 1.0 then the time of the result is scaled by it, so output sample j is the input at
+    time j / (rate_to * time_scale)."""
+    values = np.asarray(values, dtype=np.float64)
+    duration = (len(values) - 1) / rate_from
+    t_out = np.arange(int(np.floor(duration * rate_to * time_scale)) + 1) / (rate_to * time_scale)
+    t_in = np.arange(len(values)) / rate_from
+    return np.column_stack([np.interp(t_out, t_in, values[:, c]) for c in range(values.shape[1])])
+
+
+def _peak(correlation: np.ndarray) -> typing.Tuple[float, float]:
+    """Returns the index of the peak with sub-sample parabolic interpolation and the peak value."""
+    i = int(np.argmax(correlation))
+    if 0 < i < len(correlation) - 1:
+        y0, y1, y2 = correlation[i - 1:i + 2]
+        denominator = y0 - 2 * y1 + y2
+        if denominator != 0:
+            delta = 0.5 * (y0 - y2) / denominator
+            return i + delta, y1 - 0.25 * (y0 - y2) * delta
+    return float(i), correlation[i]
+
+
+def cross_correlate(a: np.ndarray, b: np.ndarray, min_overlap: float = 0.5) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Returns the lags and the cross-correlation of the (n, c) arrays a and b summed over the channels and divided
+    by the number of overlapping samples and channels.
+    A peak at lag L means that a[i + L] matches b[i].
+    Lags where the overlap is less than min_overlap of the shorter signal are excluded."""
+    correlation = sum(
+        signal.correlate(a[:, c], b[:, c], mode='full', method='fft') for c in range(a.shape[1])
+    )
+    lags = signal.correlation_lags(len(a), len(b), mode='full')
+    overlap = np.minimum(len(a), lags + len(b)) - np.maximum(0, lags)
+    keep = overlap >= min_overlap * min(len(a), len(b))
+    return lags[keep], correlation[keep] / (overlap[keep] * a.shape[1])
+
+
+def align(signatures_a: np.ndarray, rate_a: float,
+          signatures_b: np.ndarray, rate_b: float,
+          drifts: typing.Sequence[float] = (0.0,),
+          rate: float = None,
+          min_overlap: float = 0.5) -> Alignment:
+    """Finds the offset and drift that maximise the cross-correlation of the signatures of a and b.
+    Both are resampled to rate, default the greater of rate_a and rate_b, and b is time scaled by each candidate
+    drift."""
+    if rate is None:
+        rate = max(rate_a, rate_b)
+    a = normalise(resample(signatures_a, rate_a, rate))
+    best = None
+    for drift in drifts:
+        b = normalise(resample(signatures_b, rate_b, rate, 1.0 + drift))
+        lags, correlation = cross_correlate(a, b, min_overlap)
+        index, peak = _peak(correlation)
+        if best is None or peak > best.correlation:
+            lag = lags[0] + index
+            best = Alignment(lag / rate, drift, float(peak))
+    return best
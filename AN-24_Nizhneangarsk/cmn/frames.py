@@ -0,0 +1,62 @@
+"""
+Streaming per-frame activity signatures from a directory of video frames such as those extracted by ffmpeg.
+
+Frames are read one at a time so that the memory used does not depend on the length of the video.
+"""
+import os
+import typing
+
+import numpy as np
+
+FRAME_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Columns of the array returned by frame_signatures()
+SIGNATURE_COLUMNS = ('mean_intensity', 'difference_energy', 'bright_fraction')
+# Greyscale value, 0 to 255, at or above which a pixel is regarded as smoke or dust.
+BRIGHT_THRESHOLD = 200.0
+
+
+def frame_paths(directory: str) -> typing.List[str]:
+    """Returns the paths of the frame images in the directory in frame order.
+    ffmpeg names frames with a zero padded number, such as frame0001.jpg, so this is the sorted order."""
+    return [
+        os.path.join(directory, name) for name in sorted(os.listdir(directory))
+        if os.path.splitext(name)[1].lower() in FRAME_EXTENSIONS
+    ]
+
+
+def read_frame(path: str) -> np.ndarray:
+    """Returns the image as a 2D greyscale array of float32.
+    This requires Pillow."""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return np.asarray(image.convert('L'), dtype=np.float32)
+
+
+def iter_frames(directory: str) -> typing.Iterator[np.ndarray]:
+    """Yields each frame in the directory as a greyscale array."""
+    for path in frame_paths(directory):
+        yield read_frame(path)
+
+
+def frame_signatures(frames: typing.Iterable[np.ndarray], bright_threshold: float = BRIGHT_THRESHOLD) -> np.ndarray:
+    """Returns a (n, 3) array of the signature of each frame, the columns are SIGNATURE_COLUMNS:
+
+    - The mean intensity of the frame.
+    - The mean squared difference from the previous frame, zero for the first frame.
+    - The fraction of pixels at or above bright_threshold, a measure of smoke or dust.
+
+    Only the current and previous frame are held in memory.
+    """
+    rows = []
+    previous = None
+    for frame in frames:
+        frame = np.asarray(frame, dtype=np.float32)
+        if previous is None:
+            difference_energy = 0.0
+        else:
+            difference_energy = float(np.mean((frame - previous) ** 2))
+        rows.append((float(np.mean(frame)), difference_energy, float(np.mean(frame >= bright_threshold))))
+        previous = frame
+    return np.array(rows, dtype=np.float64).reshape(-1, len(SIGNATURE_COLUMNS))
@@ -41,6 +41,15 @@ def polynomial_differential_factors(*args: typing.List[float]) -> typing.List[fl
     return ret
 
 
+def polynomial_nth_differential_factors(n: int, *args: typing.List[float]) -> typing.List[float]:
+    """Returns the factors of the n'th differential of the polynomial factors.
+    n == 0 returns the factors unchanged. This may be an empty list if n >= len(args)."""
+    ret = list(args)
+    for _i in range(n):
+        ret = polynomial_differential_factors(*ret)
+    return ret
+
+
 def polynomial_3(x, a, b, c, d):
     """Polynomial order 3 where f(x) = a + b * x + c * x**2 + d * x**3"""
     return polynomial(x, a, b, c, d)
@@ -4,6 +4,8 @@ import pprint
 import sys
 import typing
 
+import numpy as np
+
 import map_funcs
 
 GOOGLE_EARTH_AIRPORT_IMAGES = {
@@ -85,11 +87,14 @@ def bearings_from_camera_b() -> typing.Dict[str, float]:
     ret: typing.Dict[str, float] = {}
     camera_b = GOOGLE_EARTH_AIRPORT_IMAGES['GoogleEarth_AirportCamera_C.jpg']['measurements']['camera_B']
     m_per_px = GOOGLE_EARTH_AIRPORT_IMAGES['GoogleEarth_AirportCamera_C.jpg']['m_per_px']
-    for k, v in GOOGLE_EARTH_AIRPORT_IMAGES['GoogleEarth_AirportCamera_C.jpg']['measurements'].items():
-        if k != 'camera_B':
-            b = map_funcs.bearing(camera_b, v)
-            b_min, b_max = map_funcs.bearing_min_max(camera_b, v, ABSOLUTE_POSITION_ERROR_M / m_per_px)
-            ret[k] = b, b_min, b_max
+    measurements = GOOGLE_EARTH_AIRPORT_IMAGES['GoogleEarth_AirportCamera_C.jpg']['measurements']
+    names = [k for k in measurements if k != 'camera_B']
+    points = np.array([measurements[k] for k in names], dtype=np.float64)
+    b_min, b_max = map_funcs.bearing_min_max_array(
+        np.broadcast_to(camera_b, points.shape), points, ABSOLUTE_POSITION_ERROR_M / m_per_px
+    )
+    for i, k in enumerate(names):
+        ret[k] = map_funcs.bearing(camera_b, measurements[k]), b_min[i], b_max[i]
     return ret
 
 
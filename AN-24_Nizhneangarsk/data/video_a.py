@@ -1,5 +1,6 @@
 import math
 import sys
+import timeit
 import typing
 
 import numpy as np
@@ -11,6 +12,8 @@ from cmn import polynomial
 from data import google_earth
 
 URL = 'https://youtu.be/LtJcgdU5MUk'
+# Frames extracted with ffmpeg as frame%04d.jpg, see video_images/ffmpeg.txt. The first is frame 1.
+FRAMES_DIRECTORY = 'video_images/frames'
 FRAME_RATE = 30
 
 
@@ -313,6 +316,42 @@ def _compute_distance(
             )
 
 
+def _compute_distance_tile_slab_array(
+        frames: np.ndarray,
+        tile_d_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]],
+        slab_v_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]]) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Returns a pair of (n, 3) arrays of distance (mid, plus, minus) for the frames, the first from the tile fits,
+    the second from the slab fits. These are not blended, see _blend_tile_slab_array()."""
+    t = map_funcs.frame_to_time(np.asarray(frames), FRAME_RATE)
+    threshold_time = map_funcs.frame_to_time(FRAME_THRESHOLD, FRAME_RATE)
+    tile = np.empty((len(t), 3))
+    slab = np.empty((len(t), 3))
+    for column, (d_name, v_name) in enumerate(zip(TILE_D_ORDER, SLAB_V_ORDER)):
+        tile[:, column] = polynomial.polynomial_3(t, *tile_d_fits[d_name][0])
+        slab[:, column] = polynomial.polynomial_3_integral(t, *slab_v_fits[v_name][0]) \
+                          - polynomial.polynomial_3_integral(threshold_time, *slab_v_fits[v_name][0])
+    return tile, slab
+
+
+def _blend_tile_slab_array(frames: np.ndarray, tile: np.ndarray, slab: np.ndarray) -> np.ndarray:
+    """Given tile and slab values for the frames this blends them in the same way as _compute_distance() and
+    _compute_speed(). The first dimension of tile and slab must match the frames, any other dimensions are
+    broadcast."""
+    frames = np.asarray(frames).reshape((-1,) + (1,) * (max(np.ndim(tile), np.ndim(slab)) - 1))
+    tile_only = frames <= FRAME_THRESHOLD
+    slab_only = frames > max(POSITIONS_FROM_TILES.keys())
+    return np.where(tile_only, tile, np.where(slab_only, slab, (tile + slab) / 2.0))
+
+
+def _compute_distance_array(
+        frames: np.ndarray,
+        tile_d_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]],
+        slab_v_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+    """Returns a (n, 3) array of distance (mid, plus, minus) for the frames."""
+    tile, slab = _compute_distance_tile_slab_array(frames, tile_d_fits, slab_v_fits)
+    return _blend_tile_slab_array(frames, tile, slab)
+
+
 def _compute_speed(
         frame: int,
         tile_d_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]],
@@ -341,11 +380,68 @@ def _compute_speed(
             )
 
 
+def _compute_speed_differential_array(
+        frames: np.ndarray,
+        tile_d_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]],
+        slab_v_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]],
+        order: int) -> np.ndarray:
+    """Returns a (n, 3) array of the order'th differential of speed for the frames, order 0 is speed, 1 is
+    acceleration and 2 is jerk. Columns are mid, plus, minus.
+
+    This evaluates the differential factors of the fits directly over the whole array of frames and blends the tile
+    and slab data in the same way as _compute_speed()."""
+    frames = np.asarray(frames)
+    t = map_funcs.frame_to_time(frames, FRAME_RATE)
+    tile = np.empty((len(frames), 3))
+    slab = np.empty((len(frames), 3))
+    for column, (d_name, v_name) in enumerate(zip(TILE_D_ORDER, SLAB_V_ORDER)):
+        tile[:, column] = polynomial.polynomial(
+            t, *polynomial.polynomial_nth_differential_factors(order + 1, *tile_d_fits[d_name][0])
+        )
+        slab[:, column] = polynomial.polynomial(
+            t, *polynomial.polynomial_nth_differential_factors(order, *slab_v_fits[v_name][0])
+        )
+    return _blend_tile_slab_array(frames, tile, slab)
+
+
+def _compute_speed_array(
+        frames: np.ndarray,
+        tile_d_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]],
+        slab_v_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+    """Returns a (n, 3) array of speed (mid, plus, minus) for the frames."""
+    return _compute_speed_differential_array(frames, tile_d_fits, slab_v_fits, 0)
+
+
+def _compute_acceleration_array(
+        frames: np.ndarray,
+        tile_d_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]],
+        slab_v_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+    """Returns a (n, 3) array of acceleration (mid, plus, minus) for the frames."""
+    return _compute_speed_differential_array(frames, tile_d_fits, slab_v_fits, 1)
+
+
+def _compute_jerk_array(
+        frames: np.ndarray,
+        tile_d_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]],
+        slab_v_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+    """Returns a (n, 3) array of jerk (mid, plus, minus) for the frames."""
+    return _compute_speed_differential_array(frames, tile_d_fits, slab_v_fits, 2)
+
+
 def _compute_acceleration(
         frame: int,
         tile_d_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]],
         slab_v_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]]) -> typing.Tuple[float, float, float]:
-    """Returns acceleration by looking at frame to frame speed change."""
+    """Returns acceleration from the differential of the fits."""
+    return tuple(_compute_acceleration_array(np.array([frame]), tile_d_fits, slab_v_fits)[0])
+
+
+def _compute_acceleration_finite_difference(
+        frame: int,
+        tile_d_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]],
+        slab_v_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]]) -> typing.Tuple[float, float, float]:
+    """Returns acceleration by looking at frame to frame speed change.
+    This is slower than _compute_acceleration() and is retained for comparison."""
     v_0_triple: typing.Tuple[float, float, float] = _compute_speed(frame - 1, tile_d_fits, slab_v_fits)
     v_1_triple: typing.Tuple[float, float, float] = _compute_speed(frame + 1, tile_d_fits, slab_v_fits)
     ret = tuple(
@@ -398,13 +494,161 @@ def _quadratic_distance_solution(d_0: float, v_0: float, a: float, d: float) ->
     return part_one + part_two, part_one - part_two
 
 
+def _terminal_speed_and_mean_acceleration_array(
+        v_initial: np.ndarray, d_initial: np.ndarray, dt: np.ndarray, d_terminal: np.ndarray
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Array version of _terminal_speed_and_mean_acceleration(), arguments are broadcast.
+    Rather than raising, where the terminal speed is negative the results are NaN."""
+    v_mean = (d_terminal - d_initial) / dt
+    v_terminal = 2 * v_mean - v_initial
+    v_terminal = np.where(v_terminal < 0, np.nan, v_terminal)
+    return v_terminal, (v_terminal - v_initial) / dt
+
+
+def _quadratic_distance_solution_array(
+        d_0: np.ndarray, v_0: np.ndarray, a: np.ndarray, d: np.ndarray
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Array version of _quadratic_distance_solution(), arguments are broadcast.
+    Rather than raising, where there is no real root the results are NaN."""
+    discriminant = v_0**2 - 2 * a * (d_0 - d)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        part_two = np.sqrt(np.where(discriminant < 0, np.nan, discriminant)) / a
+        part_one = v_0 / a
+    return part_one + part_two, part_one - part_two
+
+
+class ImpactArrays(typing.NamedTuple):
+    """Results of compute_impacts_array(). Each array has the shape (3, frames, fence errors, scale errors) where
+    the first dimension is mid, plus, minus. Non-physical results are NaN."""
+    v_terminal: np.ndarray
+    acceleration: np.ndarray
+    stop_distance: np.ndarray
+    v_final: np.ndarray
+
+
+FRAME_FENCE_IMPACT = 1685
+
+
+def compute_impacts_array(
+        last_measured_frames: np.ndarray,
+        fence_distance_errors: np.ndarray,
+        tile_scale_errors: np.ndarray,
+        tile_d_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]] = None,
+        slab_v_fits: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]] = None,
+) -> ImpactArrays:
+    """Does the calculation of compute_impacts() for every combination of:
+
+    - The last measured frame.
+    - An additive error in the boundary fence distance (m).
+    - A proportional error in TILE_SCALE_M_PER_PIXEL, this scales the fence and final building distances and the
+      tile component of the initial distance.
+
+    This is vectorised over all the combinations.
+
+    Combinations where the mean acceleration between the last measured frame and the fence is not negative (the
+    aircraft is not decelerating) have no physical stopping solution. Their acceleration, stop distance and final
+    speed are NaN although their terminal speed is finite, see dropped_combinations().
+    """
+    if tile_d_fits is None:
+        tile_d_fits = get_tile_d_fits()[1]
+    if slab_v_fits is None:
+        slab_v_fits = get_slab_v_fits()
+    frames = np.asarray(last_measured_frames)
+    # Shape (3, frames, 1, 1) for the initial conditions and (1, 1, fence errors, scale errors) for the distances.
+    scale = 1.0 + np.asarray(tile_scale_errors)[np.newaxis, np.newaxis, :]
+    tile, slab = _compute_distance_tile_slab_array(frames, tile_d_fits, slab_v_fits)
+    d_initial = _blend_tile_slab_array(
+        frames, tile[:, :, np.newaxis, np.newaxis] * scale, slab[:, :, np.newaxis, np.newaxis]
+    ).transpose(1, 0, 2, 3)
+    v_initial = _compute_speed_array(frames, tile_d_fits, slab_v_fits).T[:, :, np.newaxis, np.newaxis]
+    dt = map_funcs.frames_to_dtime(frames, FRAME_FENCE_IMPACT, FRAME_RATE)[np.newaxis, :, np.newaxis, np.newaxis]
+    d_fence = data.tiles.BOUNDARY_FENCE_DISTANCE_FROM_THRESHOLD_M * scale \
+              + np.asarray(fence_distance_errors)[np.newaxis, :, np.newaxis]
+    d_final_building = data.tiles.FINAL_BUILDING_DISTANCE_FROM_THRESHOLD_M * scale
+    v_terminal, accln = _terminal_speed_and_mean_acceleration_array(v_initial, d_initial, dt, d_fence)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        accln = np.where(accln < 0, accln, np.nan)
+        stop_distance = v_terminal * (v_terminal / -accln) / 2.0
+        t_roots = _quadratic_distance_solution_array(d_fence, v_terminal, accln, d_final_building)
+        dt_final = -t_roots[1]
+        dt_final = np.where(dt_final < 0, np.nan, dt_final)
+        v_final = v_terminal + accln * dt_final
+    return ImpactArrays(v_terminal, accln, stop_distance, v_final)
+
+
+def dropped_combinations(impacts: ImpactArrays) -> np.ndarray:
+    """Returns the number of combinations for each of mid, plus, minus that have a terminal speed but where the
+    aircraft is not decelerating so the acceleration was set to NaN by compute_impacts_array()."""
+    return np.sum(np.isfinite(impacts.v_terminal) & np.isnan(impacts.acceleration), axis=(1, 2, 3))
+
+
+class Distribution(typing.NamedTuple):
+    count: int
+    valid: int
+    mean: float
+    std: float
+    minimum: float
+    maximum: float
+    percentiles: typing.Dict[float, float]
+
+
+def distribution(values: np.ndarray, percentiles: typing.Sequence[float] = (5, 50, 95)) -> Distribution:
+    """Returns a summary of the distribution of the finite values."""
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0:
+        return Distribution(values.size, 0, math.nan, math.nan, math.nan, math.nan, {p: math.nan for p in percentiles})
+    return Distribution(
+        values.size, len(finite),
+        float(np.mean(finite)), float(np.std(finite)), float(np.min(finite)), float(np.max(finite)),
+        {p: float(v) for p, v in zip(percentiles, np.percentile(finite, percentiles))},
+    )
+
+
+def print_impact_distribution(
+        last_measured_frames: np.ndarray = None,
+        fence_distance_errors: np.ndarray = None,
+        tile_scale_errors: np.ndarray = None,
+) -> None:
+    """Prints the distribution of the impact results over the combinations of the last measured frame, fence
+    distance error and tile scale error. The defaults are frames 1300 to LAST_MEASURED_FRAME, fence errors of
+    +/-20m and tile scale errors of +/-5%."""
+    if last_measured_frames is None:
+        last_measured_frames = np.arange(1300, LAST_MEASURED_FRAME + 1)
+    if fence_distance_errors is None:
+        fence_distance_errors = np.linspace(-20.0, 20.0, 101)
+    if tile_scale_errors is None:
+        tile_scale_errors = np.linspace(-0.05, 0.05, 101)
+    impacts = compute_impacts_array(last_measured_frames, fence_distance_errors, tile_scale_errors)
+    print(f'Impact distribution over {impacts.v_terminal[0].size:,d} combinations:')
+    print(f'Last measured frame {min(last_measured_frames)} to {max(last_measured_frames)}'
+          f', fence distance error {min(fence_distance_errors):+.1f} to {max(fence_distance_errors):+.1f} (m)'
+          f', tile scale error {min(tile_scale_errors):+.1%} to {max(tile_scale_errors):+.1%}')
+    for v_name, dropped in zip(SLAB_V_ORDER, dropped_combinations(impacts)):
+        print(f'{v_name:2}: {dropped:,d} combinations with no deceleration are NaN and excluded'
+              f' from acceleration, stop_distance and v_final')
+    for name, units in (
+            ('v_terminal', 'm/s'),
+            ('acceleration', 'm/s^2'),
+            ('stop_distance', 'm'),
+            ('v_final', 'm/s'),
+    ):
+        for i, v_name in enumerate(SLAB_V_ORDER):
+            dist = distribution(getattr(impacts, name)[i])
+            percentile_str = ' '.join(f'P{k:g}={v:6.1f}' for k, v in dist.percentiles.items())
+            print(
+                f'{name:14} {v_name:2} ({units:5}): valid {dist.valid / dist.count:6.1%}'
+                f' mean={dist.mean:6.1f} std={dist.std:5.1f} min={dist.minimum:6.1f} max={dist.maximum:6.1f}'
+                f' {percentile_str}'
+            )
+
+
 def compute_impacts():
     """Does the calculation of de-acceleration after departure from the runway."""
     tile_d_fits = get_tile_d_fits()[1]
     slab_v_fits = get_slab_v_fits()
     d_data = _compute_distance(LAST_MEASURED_FRAME, tile_d_fits, slab_v_fits)
     v_data = _compute_speed(LAST_MEASURED_FRAME, tile_d_fits, slab_v_fits)
-    dt = map_funcs.frames_to_dtime(LAST_MEASURED_FRAME, 1685, FRAME_RATE)
+    dt = map_funcs.frames_to_dtime(LAST_MEASURED_FRAME, FRAME_FENCE_IMPACT, FRAME_RATE)
     d_fence = data.tiles.BOUNDARY_FENCE_DISTANCE_FROM_THRESHOLD_M
     print('Boundary fence impact:')
     boundary_fence_data = []
@@ -519,11 +763,37 @@ def print_events_on_GoogleEarth_C_Annotated() -> None:
 
 
 
+def print_acceleration_benchmark(repeat: int = 5) -> None:
+    """Compares the time taken for the acceleration of every frame with the finite difference and the analytic,
+    array based, methods."""
+    tile_d_fits = get_tile_d_fits()[1]
+    slab_v_fits = get_slab_v_fits()
+    frames = np.arange(1, FRAME_LAST + 1)
+    time_finite_difference = min(
+        timeit.repeat(
+            lambda: [_compute_acceleration_finite_difference(f, tile_d_fits, slab_v_fits) for f in frames],
+            number=1, repeat=repeat,
+        )
+    )
+    time_array = min(
+        timeit.repeat(
+            lambda: _compute_acceleration_array(frames, tile_d_fits, slab_v_fits),
+            number=1, repeat=repeat,
+        )
+    )
+    print(f'Acceleration of {len(frames)} frames:'
+          f' finite difference {time_finite_difference * 1000:.3f} (ms)'
+          f' analytic array {time_array * 1000:.3f} (ms)'
+          f' speedup x{time_finite_difference / time_array:.0f}')
+
+
 def main() -> int:
     print_events()
     print_table_of_events()
     compute_impacts()
+    print_impact_distribution()
     print_events_on_GoogleEarth_C_Annotated()
+    print_acceleration_benchmark()
     return 0
 
 
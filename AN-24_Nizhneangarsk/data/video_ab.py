@@ -1,12 +1,17 @@
 """
 This is for data that links video A and video B together.
 """
+import os
 import sys
 import typing
 
+import numpy as np
+from scipy.optimize import least_squares
+
 import map_funcs
+from cmn import alignment, frames
 from common import structs
-from data import video_a, video_b
+from data import aircraft, video_a, video_b
 
 
 # Map of events in video A to video B by respective frame number.
@@ -79,10 +84,201 @@ def print_video_a_video_b_ties_markdown():
     # print(f'Mean (Ta - Tb): {mid_max_min.mid:.2f} ±{mid_max_min.tolerance:.1f} (s)')
 
 
+def cross_correlation_alignment(
+        directory_a: str = video_a.FRAMES_DIRECTORY,
+        directory_b: str = video_b.FRAMES_DIRECTORY,
+        drifts: typing.Sequence[float] = tuple(np.linspace(-0.01, 0.01, 21)),
+) -> alignment.Alignment:
+    """Aligns video A and video B from their frames by the cross-correlation of the per-frame signatures, see
+    cmn.frames.frame_signatures().
+    The frames are streamed so this needs memory for only two frames at a time.
+    This requires Pillow."""
+    signatures_a = frames.frame_signatures(frames.iter_frames(directory_a))
+    signatures_b = frames.frame_signatures(frames.iter_frames(directory_b))
+    return alignment.align(signatures_a, video_a.FRAME_RATE, signatures_b, video_b.FRAME_RATE, drifts)
+
+
+def print_cross_correlation_alignment() -> None:
+    if not (os.path.isdir(video_a.FRAMES_DIRECTORY) and os.path.isdir(video_b.FRAMES_DIRECTORY)):
+        print(f'No frames in "{video_a.FRAMES_DIRECTORY}" and "{video_b.FRAMES_DIRECTORY}" to align.')
+        return
+    result = cross_correlation_alignment()
+    mid_max_min = time_difference_mid_max_min()
+    print(
+        f'Cross-correlation (Ta - Tb): {result.offset:.2f} (s) drift {result.drift:+.2%}'
+        f' correlation {result.correlation:.2f}'
+        f', from time ties: {mid_max_min.mid:.2f} ±{mid_max_min.tolerance:.1f} (s)'
+    )
+
+
+def _speed_differential_matrix(t: np.ndarray) -> np.ndarray:
+    """Returns the (n, n) matrix that maps positions at times t to the speeds at t from the differential of a least
+    squares cubic fit of those positions.
+    This is the linear equivalent of the curve_fit and polynomial_3_differential() in main._get_video_b_v_array()."""
+    vandermonde = np.vander(t, 4, increasing=True)
+    differential = np.column_stack((np.zeros_like(t), np.ones_like(t), 2 * t, 3 * t**2))
+    return differential @ np.linalg.pinv(vandermonde)
+
+
+class CalibrationData(typing.NamedTuple):
+    """Everything that the camera calibration residuals need that does not depend on the camera.
+    Frames are those used by each video B method, rows are those that are within the measured video A data."""
+    pixels: video_b.AircraftPixels
+    # Frames of video B limited to AIRCRAFT_ASPECTS_SPAN_FRAME_LIMIT for the tail height and span methods.
+    limited: np.ndarray
+    bearings_speed_matrix: np.ndarray
+    bearings_rows: np.ndarray
+    limited_speed_matrix: np.ndarray
+    limited_rows: np.ndarray
+    # Video A speed at each video B frame.
+    v_video_a: np.ndarray
+
+
+def calibration_data() -> CalibrationData:
+    """Returns the data for calibrating the video B camera against the video A speeds using the time ties."""
+    pixels = video_b.aircraft_pixels()
+    t_b = video_b.frame_to_time(pixels.frame)
+    t_a = t_b + time_difference_mid_max_min().mid
+    frames_a = t_a * video_a.FRAME_RATE + 1
+    limited = pixels.frame <= video_b.AIRCRAFT_ASPECTS_SPAN_FRAME_LIMIT
+    in_video_a = t_a <= video_a.LAST_MEASURED_TIME
+    return CalibrationData(
+        pixels,
+        limited,
+        _speed_differential_matrix(t_b),
+        np.flatnonzero(in_video_a),
+        _speed_differential_matrix(t_b[limited]),
+        np.flatnonzero(in_video_a[limited]),
+        video_a._compute_speed_array(frames_a, video_a.get_tile_d_fits()[1], video_a.get_slab_v_fits())[:, 0],
+    )
+
+
+CALIBRATION_METHODS = ('bearings', 'tail_height', 'span')
+# The tail height and span methods are too noisy to calibrate against by default.
+CALIBRATION_METHODS_DEFAULT = ('bearings',)
+
+
+def calibration_residuals(
+        px_per_degree: np.ndarray,
+        bearing: np.ndarray,
+        cal_data: CalibrationData = None,
+        methods: typing.Sequence[str] = CALIBRATION_METHODS_DEFAULT) -> np.ndarray:
+    """Returns the residuals of the video B speeds by the methods in CALIBRATION_METHODS less the video A speeds for
+    every candidate camera pixels per degree and bearing.
+    px_per_degree and bearing are 1D arrays of the same length K, the result is a (residuals, K) array.
+    Where a method has no solution, for example a range less than the camera offset from the runway, the residual
+    is NaN."""
+    for method in methods:
+        if method not in CALIBRATION_METHODS:
+            raise ValueError(f'Unknown calibration method {method}')
+    if cal_data is None:
+        cal_data = calibration_data()
+    camera = video_b.CAMERA_MODEL.replace(
+        px_per_degree=np.atleast_1d(px_per_degree)[np.newaxis, :],
+        bearing=np.atleast_1d(bearing)[np.newaxis, :],
+    )
+    pixels = cal_data.pixels
+    # All these are (frames, K)
+    mid_span_bearing = camera.bearing_x_degrees(pixels.mid_span_x[:, np.newaxis])
+    x_bearings = camera.x_from_bearing(mid_span_bearing)
+    with np.errstate(invalid='ignore'):
+        x_tail_height, _bearing = camera.x_bearing_from_range(
+            camera.range_to_target(pixels.tail_height[cal_data.limited, np.newaxis], aircraft.ANTONOV_AN_24_HEIGHT)
+        )
+        apparent_span = aircraft.ANTONOV_AN_24_SPAN * np.cos(
+            np.radians(mid_span_bearing[cal_data.limited] - camera.runway_heading)
+        )
+        x_span, _bearing = camera.x_bearing_from_range(
+            camera.range_to_target(pixels.span[cal_data.limited, np.newaxis], apparent_span)
+        )
+    v_a_limited = cal_data.v_video_a[cal_data.limited]
+    residuals = {
+        'bearings': (cal_data.bearings_speed_matrix @ x_bearings)[cal_data.bearings_rows]
+                    - cal_data.v_video_a[cal_data.bearings_rows, np.newaxis],
+        'tail_height': (cal_data.limited_speed_matrix @ x_tail_height)[cal_data.limited_rows]
+                       - v_a_limited[cal_data.limited_rows, np.newaxis],
+        'span': (cal_data.limited_speed_matrix @ x_span)[cal_data.limited_rows]
+                - v_a_limited[cal_data.limited_rows, np.newaxis],
+    }
+    return np.concatenate([residuals[method] for method in methods], axis=0)
+
+
+class CameraCalibration(typing.NamedTuple):
+    camera: video_b.CameraModel
+    # RMS of the residuals in m/s
+    rms_residual: float
+    # Fitted values less the measured values
+    px_per_degree_adjustment: float
+    bearing_adjustment: float
+
+
+def calibrate_camera(
+        px_per_degree_range: typing.Tuple[float, float] = (-5.0, 5.0),
+        bearing_range: typing.Tuple[float, float] = (-5.0, 5.0),
+        grid_size: int = 201,
+        methods: typing.Sequence[str] = CALIBRATION_METHODS_DEFAULT,
+) -> CameraCalibration:
+    """Fits the video B camera pixels per degree and bearing jointly so that the video B speeds best match the
+    video A speeds.
+    This searches a grid_size x grid_size grid of adjustments to the measured calibration in one vectorised pass
+    then refines the best of those with a least squares fit."""
+    measured = video_b.CameraModel.from_calibration(0.0, 0.0)
+    cal_data = calibration_data()
+    # Grid search
+    grid_ppd, grid_brg = np.meshgrid(
+        measured.px_per_degree + np.linspace(*px_per_degree_range, grid_size),
+        measured.bearing + np.linspace(*bearing_range, grid_size),
+    )
+    grid_ppd = grid_ppd.ravel()
+    grid_brg = grid_brg.ravel()
+    residuals = calibration_residuals(grid_ppd, grid_brg, cal_data, methods)
+    costs = np.sum(residuals**2, axis=0)
+    costs[np.isnan(costs)] = np.inf
+    best = np.argmin(costs)
+    # Refine
+    result = least_squares(
+        lambda p: calibration_residuals(p[0], p[1], cal_data, methods)[:, 0],
+        (grid_ppd[best], grid_brg[best]),
+    )
+    px_per_degree, bearing = result.x
+    camera = measured.replace(px_per_degree=float(px_per_degree), bearing=float(bearing))
+    return CameraCalibration(
+        camera,
+        float(np.sqrt(np.mean(result.fun**2))),
+        camera.px_per_degree - measured.px_per_degree,
+        camera.bearing - measured.bearing,
+    )
+
+
+def print_camera_calibration() -> None:
+    cal_data = calibration_data()
+    measured = video_b.CameraModel.from_calibration(0.0, 0.0)
+    print('Video B camera calibration against video A speeds:')
+    for methods in (CALIBRATION_METHODS_DEFAULT, CALIBRATION_METHODS):
+        print(f'Methods: {", ".join(methods)}')
+        for name, camera in (
+                ('Measured', measured),
+                ('Adjusted', video_b.CAMERA_MODEL),
+                ('Fitted', calibrate_camera(methods=methods).camera),
+        ):
+            residuals = calibration_residuals(camera.px_per_degree, camera.bearing, cal_data, methods)[:, 0]
+            print(
+                f'{name:8}: px/degree={camera.px_per_degree:6.2f}'
+                f' ({camera.px_per_degree - measured.px_per_degree:+5.2f})'
+                f' bearing={camera.bearing:6.2f}'
+                f' ({camera.bearing - measured.bearing:+5.2f})'
+                f' RMS residual={np.sqrt(np.mean(residuals**2)):5.2f} (m/s)'
+            )
+
+
 def main() -> int:
     print_video_a_video_b_ties()
     print()
     print_video_a_video_b_ties_markdown()
+    print()
+    print_cross_correlation_alignment()
+    print()
+    print_camera_calibration()
     return 0
 
 
@@ -193,15 +193,17 @@ def _pixels_per_degree_sum_count_mean_min_max():
     return values_sum, values_count, values_mean, values_min, values_max
 
 
-def pixels_per_degree():
+# These adjustments are added to the measured calibration to get the speeds to match video A.
+PX_PER_DEGREE_ADJUSTMENT = 2.25
+CAMERA_BEARING_ADJUSTMENT = -1.75
+
+
+def pixels_per_degree(adjustment: float = PX_PER_DEGREE_ADJUSTMENT) -> typing.Tuple[float, float]:
+    """Returns the pixels per degree and the error from the measurements plus the adjustment."""
     values_sum, values_count, values_mean, values_min, values_max = _pixels_per_degree_sum_count_mean_min_max()
     px_per_degree_mean = values_sum / values_count
     px_per_degree_error = px_per_degree_mean / 10.0
-    # TODO: the -1 is experimental to get the speeds to match video A
-    return px_per_degree_mean +2.25, px_per_degree_error
-
-
-PX_PER_DEGREE, PX_PER_DEGREE_ERROR = pixels_per_degree()
+    return px_per_degree_mean + adjustment, px_per_degree_error
 
 
 def print_pixels_per_degree_data():
@@ -242,7 +244,7 @@ def focal_length():
     return structs.MidPlusMinus(*focal_lengths)
 
 
-def _camera_axis_bearings():
+def _camera_axis_bearings(px_per_degree: float, px_per_degree_error: float):
     ret = {}
     ge_measurements = google_earth.GOOGLE_EARTH_AIRPORT_IMAGES['GoogleEarth_AirportCamera_C.jpg']['measurements']
     m_per_px = google_earth.GOOGLE_EARTH_AIRPORT_IMAGES['GoogleEarth_AirportCamera_C.jpg']['m_per_px']
@@ -255,19 +257,19 @@ def _camera_axis_bearings():
         )
         frame_position_a = FRAME_850_POSITIONS[k]
         these_camera_bearings = (
-            dist_brng[1] + (VIDEO_WIDTH / 2.0 - frame_position_a.x) / PX_PER_DEGREE,
-            dist_brng[1] + (VIDEO_WIDTH / 2.0 - frame_position_a.x) / (PX_PER_DEGREE + PX_PER_DEGREE_ERROR),
-            dist_brng[1] + (VIDEO_WIDTH / 2.0 - frame_position_a.x) / (PX_PER_DEGREE - PX_PER_DEGREE_ERROR),
+            dist_brng[1] + (VIDEO_WIDTH / 2.0 - frame_position_a.x) / px_per_degree,
+            dist_brng[1] + (VIDEO_WIDTH / 2.0 - frame_position_a.x) / (px_per_degree + px_per_degree_error),
+            dist_brng[1] + (VIDEO_WIDTH / 2.0 - frame_position_a.x) / (px_per_degree - px_per_degree_error),
         )
         ret[k] = these_camera_bearings
     return ret
 
 
-def _camera_axis_bearing_mean_min_max():
+def _camera_axis_bearing_mean_min_max(px_per_degree: float, px_per_degree_error: float):
     camera_bearings = []
     camera_bearing_min = sys.float_info.max
     camera_bearing_max = sys.float_info.min
-    bearings = _camera_axis_bearings()
+    bearings = _camera_axis_bearings(px_per_degree, px_per_degree_error)
     for k in bearings:
         these_camera_bearings = bearings[k]
         camera_bearings.append(these_camera_bearings[0])
@@ -277,52 +279,161 @@ def _camera_axis_bearing_mean_min_max():
     return camera_bearing_mean, camera_bearing_min, camera_bearing_max
 
 
-def camera_axis_bearing():
-    """
-    """
-    camera_bearing_mean, camera_bearing_min, camera_bearing_max = _camera_axis_bearing_mean_min_max()
+def camera_axis_bearing(
+        px_per_degree: float,
+        px_per_degree_error: float,
+        adjustment: float = CAMERA_BEARING_ADJUSTMENT) -> typing.Tuple[float, float]:
+    """Returns the bearing of the camera axis and the error from the measurements given the pixels per degree, the
+    adjustment is added to the measured bearing."""
+    camera_bearing_mean, camera_bearing_min, camera_bearing_max = _camera_axis_bearing_mean_min_max(
+        px_per_degree, px_per_degree_error
+    )
     camera_bearing_error = (camera_bearing_max - camera_bearing_min) / 2
-    # TODO: the +1 is experimental to get the speeds to match video A
-    return camera_bearing_mean -1.75, camera_bearing_error
+    return camera_bearing_mean + adjustment, camera_bearing_error
+
+
+class CameraModel:
+    """The calibration of the fixed camera of video B and the geometry that follows from it.
 
+    replace() creates a new model with some parameters changed which is cheap enough to use for perturbing the
+    calibration.
 
-CAMERA_BEARING, CAMERA_BEARING_ERROR = camera_axis_bearing()
+    The parameters may be numpy arrays to evaluate many candidate calibrations at once, the results of the methods
+    are then broadcast against them.
+    """
+    __slots__ = (
+        'px_per_degree', 'px_per_degree_error', 'bearing', 'bearing_error',
+        'position_xy', 'width', 'runway_heading',
+    )
+
+    def __init__(self,
+                 px_per_degree: float,
+                 px_per_degree_error: float,
+                 bearing: float,
+                 bearing_error: float,
+                 position_xy: map_funcs.Point = CAMERA_POSITION_XY,
+                 width: int = VIDEO_WIDTH,
+                 runway_heading: float = google_earth.RUNWAY_HEADING_DEG):
+        self.px_per_degree = px_per_degree
+        self.px_per_degree_error = px_per_degree_error
+        self.bearing = bearing
+        self.bearing_error = bearing_error
+        self.position_xy = position_xy
+        self.width = width
+        self.runway_heading = runway_heading
+
+    @classmethod
+    def from_calibration(cls,
+                         px_per_degree_adjustment: float = PX_PER_DEGREE_ADJUSTMENT,
+                         bearing_adjustment: float = CAMERA_BEARING_ADJUSTMENT) -> 'CameraModel':
+        """Create a camera model from the FRAME_850_POSITIONS and Google Earth measurements with the given
+        adjustments added to the pixels per degree and the camera bearing."""
+        px_per_degree, px_per_degree_error = pixels_per_degree(px_per_degree_adjustment)
+        bearing, bearing_error = camera_axis_bearing(px_per_degree, px_per_degree_error, bearing_adjustment)
+        return cls(px_per_degree, px_per_degree_error, bearing, bearing_error)
+
+    def replace(self, **kwargs) -> 'CameraModel':
+        """Returns a new camera model with the given parameters replaced, for example::
+
+            camera.replace(px_per_degree=camera.px_per_degree + 0.5)
+        """
+        parameters = {
+            k: getattr(self, k) for k in (
+                'px_per_degree', 'px_per_degree_error', 'bearing', 'bearing_error',
+                'position_xy', 'width', 'runway_heading',
+            )
+        }
+        for k in kwargs:
+            if k not in parameters:
+                raise ValueError(f'Unknown camera parameter {k}')
+        parameters.update(kwargs)
+        return CameraModel(**parameters)
+
+    def __repr__(self) -> str:
+        return (
+            f'CameraModel(px_per_degree={self.px_per_degree!r}, px_per_degree_error={self.px_per_degree_error!r},'
+            f' bearing={self.bearing!r}, bearing_error={self.bearing_error!r})'
+        )
+
+    def bearing_x_degrees(self, p: int, px_per_degree_error: float = 0.0) -> float:
+        """Returns the bearing of the x pixel in degrees.
+        p may be a numpy array."""
+        db = (p - self.width / 2.0) / (self.px_per_degree + px_per_degree_error)
+        return self.bearing + db
+
+    def range_to_target(self, dp: float, s: float) -> float:
+        """Given the distance in pixels and the actual distance s in metres this returns the range.
+        dp and s may be numpy arrays."""
+        alpha_deg = dp / self.px_per_degree
+        return s / (2 * np.tan(np.radians(alpha_deg / 2)))
+
+    def x_from_bearing(self, bearing: float) -> float:
+        """Given a bearing from the camera then, assuming y=0, this returns the x position in metres relative to the
+        runway start.
+        bearing may be a numpy array."""
+        theta_deg = bearing - self.runway_heading
+        return self.position_xy.x - self.position_xy.y * np.tan(np.radians(90 - theta_deg))
+
+    def xy_from_range_bearing(self, range: float, bearing: float) -> map_funcs.Point:
+        """Given a range in metres and a bearing from the camera this returns the x, y position in metres relative to
+        the runway start."""
+        theta_deg = bearing - self.runway_heading
+        x = self.position_xy.x + range * np.cos(np.radians(theta_deg))
+        y = self.position_xy.y + range * np.sin(np.radians(theta_deg))
+        return map_funcs.Point(x, y)
+
+    def x_bearing_from_range(self, range: float) -> typing.Tuple[float, float]:
+        """Given a range in metres from the camera then, assuming y=0, this returns the x position in metres relative
+        to the runway start and the bearing.
+        range may be a numpy array."""
+        x = self.position_xy.x + np.sqrt(range**2 - self.position_xy.y**2)
+        theta_deg = np.degrees(np.arctan2(self.position_xy.y, x - self.position_xy.x))
+        bearing = (theta_deg + self.runway_heading) % 360
+        return x, bearing
+
+
+CAMERA_MODEL = CameraModel.from_calibration()
+PX_PER_DEGREE = CAMERA_MODEL.px_per_degree
+PX_PER_DEGREE_ERROR = CAMERA_MODEL.px_per_degree_error
+CAMERA_BEARING = CAMERA_MODEL.bearing
+CAMERA_BEARING_ERROR = CAMERA_MODEL.bearing_error
 
 
 def bearing_x_degrees(p: int, px_per_degree_error: float=0.0) -> float:
-    """Returns the bearing of the x pixel in degrees."""
-    db = (p - VIDEO_WIDTH / 2.0) / (PX_PER_DEGREE + px_per_degree_error)
-    return CAMERA_BEARING + db
+    """Returns the bearing of the x pixel in degrees.
+    p may be a numpy array."""
+    return CAMERA_MODEL.bearing_x_degrees(p, px_per_degree_error)
 
 
 def range_to_target(dp: float, s: float) -> float:
-    """Given the distance in pixels and the actual distance s in metres this returns the range."""
-    alpha_deg = dp / PX_PER_DEGREE
-    d = s / (2 * math.tan(math.radians(alpha_deg / 2)))
-    return d
+    """Given the distance in pixels and the actual distance s in metres this returns the range.
+    dp and s may be numpy arrays."""
+    return CAMERA_MODEL.range_to_target(dp, s)
+
+
+def x_from_bearing(bearing: float) -> float:
+    """Given a bearing from the camera then, assuming y=0, this returns the x position in metres relative to the
+    runway start.
+    bearing may be a numpy array."""
+    return CAMERA_MODEL.x_from_bearing(bearing)
 
 
 def xy_from_range_bearing(range: float, bearing: float) -> map_funcs.Point:
     """Given a range in metres and a bearing from the camera this returns the x, y position in metres relative to the runway
     start."""
-    theta_deg = bearing - google_earth.RUNWAY_HEADING_DEG
-    x = CAMERA_POSITION_XY.x + range * math.cos(math.radians(theta_deg))
-    y = CAMERA_POSITION_XY.y + range * math.sin(math.radians(theta_deg))
-    return map_funcs.Point(x, y)
+    return CAMERA_MODEL.xy_from_range_bearing(range, bearing)
 
 
 def x_bearing_from_range(range: float) -> typing.Tuple[float, float]:
     """Given a range in metres from the camera then, assuming y=0, this returns the x position in metres relative to
-    the runway start and the bearing."""
-    x = CAMERA_POSITION_XY.x + math.sqrt(range**2 - CAMERA_POSITION_XY.y**2)
-    theta_deg = math.degrees(math.atan2(CAMERA_POSITION_XY.y, x - CAMERA_POSITION_XY.x))
-    bearing = (theta_deg + google_earth.RUNWAY_HEADING_DEG) % 360
-    return x, bearing
+    the runway start and the bearing.
+    range may be a numpy array."""
+    return CAMERA_MODEL.x_bearing_from_range(range)
 
 
 def print_camera_axis_bearing_data():
     print('print_camera_axis_bearing_data():')
-    bearings = _camera_axis_bearings()
+    bearings = _camera_axis_bearings(PX_PER_DEGREE, PX_PER_DEGREE_ERROR)
     for k in bearings:
         these_camera_bearings = bearings[k]
         # print('TRACE:', these_camera_bearings)
@@ -331,7 +442,9 @@ def print_camera_axis_bearing_data():
             f' ± {these_camera_bearings[1] - these_camera_bearings[0]:.2f}'
             f'/{these_camera_bearings[2] - these_camera_bearings[0]:.2f}'
         )
-    camera_bearing_mean, camera_bearing_min, camera_bearing_max = _camera_axis_bearing_mean_min_max()
+    camera_bearing_mean, camera_bearing_min, camera_bearing_max = _camera_axis_bearing_mean_min_max(
+        PX_PER_DEGREE, PX_PER_DEGREE_ERROR
+    )
     camera_bearing_error = (camera_bearing_max - camera_bearing_min) / 2
     print(
         f'Camera bearing: mean: {camera_bearing_mean:6.2f} ±{camera_bearing_error:.2f}'
@@ -652,93 +765,99 @@ def print_aircraft_x_from_bearings():
         x_prev = x
 
 
+class AircraftPixels(typing.NamedTuple):
+    """Pixel measurements of the aircraft from AircraftExtremities as arrays, one value per frame."""
+    frame: np.ndarray
+    mid_span_x: np.ndarray
+    span: np.ndarray
+    tail_height: np.ndarray
+
+
+def aircraft_pixels(aspects: typing.Dict[int, AircraftExtremities] = AIRCRAFT_ASPECTS) -> AircraftPixels:
+    """Converts the AircraftExtremities to arrays of pixel measurements ordered by frame."""
+    frames = sorted(aspects.keys())
+    # Shape (frames, 6, 2) of the six extremities.
+    points = np.array([aspects[frame] for frame in frames], dtype=np.float64)
+    left_tip, right_tip = points[:, 0], points[:, 1]
+    fin_tip, fin_gnd = points[:, 4], points[:, 5]
+    return AircraftPixels(
+        np.array(frames),
+        (left_tip[:, 0] + right_tip[:, 0]) / 2,
+        np.sqrt(((left_tip - right_tip) ** 2).sum(axis=1)),
+        np.sqrt(((fin_gnd - fin_tip) ** 2).sum(axis=1)),
+    )
+
+
+class AircraftXArrays(typing.NamedTuple):
+    """The aircraft position by each method, each is a (n, 4) array of [t, x, x+, x-]. Time is in video B time."""
+    bearings: np.ndarray
+    tail_height: np.ndarray
+    span: np.ndarray
+
+
+def aircraft_x_arrays(pixels: AircraftPixels, camera: CameraModel = None) -> AircraftXArrays:
+    """Takes the pixel measurements for any number of frames and the camera model, default CAMERA_MODEL, to calculate
+    the aircraft position by all three methods, bearings, tail height and apparent span.
+    This makes no allowance for the reliability of each method at any particular frame."""
+    if camera is None:
+        camera = CAMERA_MODEL
+    t = frame_to_time(pixels.frame)
+    # Bearings
+    x_bearings = (
+        camera.x_from_bearing(camera.bearing_x_degrees(pixels.mid_span_x)),
+        camera.x_from_bearing(
+            camera.bearing_x_degrees(
+                pixels.mid_span_x - AIRCRAFT_ASPECTS_ERROR_PIXELS, +camera.px_per_degree_error
+            ) - camera.bearing_error
+        ),
+        camera.x_from_bearing(
+            camera.bearing_x_degrees(
+                pixels.mid_span_x + AIRCRAFT_ASPECTS_ERROR_PIXELS, -camera.px_per_degree_error
+            ) + camera.bearing_error
+        ),
+    )
+    # Ranges are computed for the mid, minus, plus pixel errors as a (frames, 3) array.
+    px_errors = np.array([0, -AIRCRAFT_ASPECTS_ERROR_PIXELS, AIRCRAFT_ASPECTS_ERROR_PIXELS])
+    # Tail height
+    x_tail_height, _bearing = camera.x_bearing_from_range(
+        camera.range_to_target(pixels.tail_height[:, np.newaxis] + px_errors, aircraft.ANTONOV_AN_24_HEIGHT)
+    )
+    # Apparent span
+    apparent_span = aircraft.ANTONOV_AN_24_SPAN * np.cos(
+        np.radians(camera.bearing_x_degrees(pixels.mid_span_x) - camera.runway_heading)
+    )
+    x_span, _bearing = camera.x_bearing_from_range(
+        camera.range_to_target(pixels.span[:, np.newaxis] + px_errors, apparent_span[:, np.newaxis])
+    )
+    return AircraftXArrays(
+        np.column_stack((t,) + x_bearings),
+        np.column_stack((t, x_tail_height)),
+        np.column_stack((t, x_span)),
+    )
+
+
 def aircraft_x_array_from_bearings() -> np.ndarray:
     """Takes the AIRCRAFT_ASPECTS and the camera data to create a numpy array of the aircraft position from the bearings
     of the aircraft.
     Time is in video B time.
     """
-    array = np.empty((len(AIRCRAFT_ASPECTS), 4), dtype=np.float64)
-    for f, frame in enumerate(sorted(AIRCRAFT_ASPECTS)):
-        # Compute mid point of span
-        mid_span = map_funcs.mid_point(
-            AIRCRAFT_ASPECTS[frame].left_tip,
-            AIRCRAFT_ASPECTS[frame].right_tip,
-        )
-        array[f, 0] = frame_to_time(frame)
-        for b, brg_deg in enumerate(
-                (
-                    bearing_x_degrees(mid_span.x),
-                    bearing_x_degrees(
-                        mid_span.x - AIRCRAFT_ASPECTS_ERROR_PIXELS, +PX_PER_DEGREE_ERROR
-                    ) - CAMERA_BEARING_ERROR,
-                    bearing_x_degrees(
-                        mid_span.x + AIRCRAFT_ASPECTS_ERROR_PIXELS, -PX_PER_DEGREE_ERROR
-                    ) + CAMERA_BEARING_ERROR,)
-        ):
-            # Compute x, y relative to runway
-            theta_deg = brg_deg - google_earth.RUNWAY_HEADING_DEG
-            x = CAMERA_POSITION_XY.x - CAMERA_POSITION_XY.y * math.tan(math.radians(90 - theta_deg))
-            array[f, b + 1] = x
-    return array
+    return aircraft_x_arrays(aircraft_pixels()).bearings
 
 
 def aircraft_x_array_from_tail_height() -> np.ndarray:
     """Takes the AIRCRAFT_ASPECTS and the camera data to calculate the ranges of the aircraft using tail height.
     Time is in video B time.
     """
-    array_length = 0
-    for frame in AIRCRAFT_ASPECTS:
-        if frame <= AIRCRAFT_ASPECTS_TAIL_HEIGHT_FRAME_LIMIT:
-            array_length += 1
-    array = np.empty((array_length, 4), dtype=np.float64)
-    idx = 0
-    for frame in sorted(AIRCRAFT_ASPECTS.keys()):
-        if frame <= AIRCRAFT_ASPECTS_SPAN_FRAME_LIMIT:
-            array[idx, 0] = frame_to_time(frame)
-            # Compute height of tail
-            tail_height_px = map_funcs.distance_between_points(
-                AIRCRAFT_ASPECTS[frame].fin_gnd, AIRCRAFT_ASPECTS[frame].fin_tip
-            )
-            for i, px_error in enumerate((0, -AIRCRAFT_ASPECTS_ERROR_PIXELS, AIRCRAFT_ASPECTS_ERROR_PIXELS)):
-                rng = range_to_target(tail_height_px + px_error, aircraft.ANTONOV_AN_24_HEIGHT)
-                x, _bearing = x_bearing_from_range(rng)
-                array[idx, i + 1] = x
-            idx += 1
-    return array
+    pixels = aircraft_pixels()
+    return aircraft_x_arrays(pixels).tail_height[pixels.frame <= AIRCRAFT_ASPECTS_TAIL_HEIGHT_FRAME_LIMIT]
 
 
 def aircraft_x_array_from_span() -> np.ndarray:
     """Takes the AIRCRAFT_ASPECTS and the camera data to calculate the ranges of the aircraft using apparent span.
     Time is in video B time.
     """
-    array_length = 0
-    for frame in AIRCRAFT_ASPECTS:
-        if frame <= AIRCRAFT_ASPECTS_SPAN_FRAME_LIMIT:
-            array_length += 1
-    array = np.empty((array_length, 4), dtype=np.float64)
-    idx = 0
-    for frame in sorted(AIRCRAFT_ASPECTS.keys()):
-        if frame <= AIRCRAFT_ASPECTS_SPAN_FRAME_LIMIT:
-            # Compute mid point of span
-            mid_span = map_funcs.mid_point(
-                AIRCRAFT_ASPECTS[frame].left_tip,
-                AIRCRAFT_ASPECTS[frame].right_tip,
-            )
-            brg_deg = bearing_x_degrees(mid_span.x)
-            # Pixels of apparent span
-            span_px: float = map_funcs.distance_between_points(
-                AIRCRAFT_ASPECTS[frame].left_tip,
-                AIRCRAFT_ASPECTS[frame].right_tip,
-            )
-            array[idx, 0] = frame_to_time(frame)
-            apparent_span = aircraft.ANTONOV_AN_24_SPAN * math.cos(math.radians(brg_deg - google_earth.RUNWAY_HEADING_DEG))
-            for i, px_error in enumerate((0, -AIRCRAFT_ASPECTS_ERROR_PIXELS, AIRCRAFT_ASPECTS_ERROR_PIXELS)):
-                rng = range_to_target(span_px + px_error, apparent_span)
-                # print('TRACE:', span_px, brg_deg, apparent_span, rng)
-                x, bearing = x_bearing_from_range(rng)
-                array[idx, i + 1] = x
-            idx += 1
-    return array
+    pixels = aircraft_pixels()
+    return aircraft_x_arrays(pixels).span[pixels.frame <= AIRCRAFT_ASPECTS_SPAN_FRAME_LIMIT]
 
 
 def get_v_array_from_bearings() -> np.ndarray:
@@ -22,6 +22,7 @@ RT videos: https://www.rt.com/news/462775-russia-nizhneangarsk-crash-landing/
 
 """
 import os
+import shutil
 import subprocess
 import sys
 import typing
@@ -38,6 +39,9 @@ from cmn import polynomial
 
 
 def plot_all(directory: str) -> None:
+    if shutil.which('gnuplot') is None:
+        print(f'ERROR: gnuplot is not installed or not on the PATH, not plotting "{directory}"')
+        return
     for file_name in os.listdir(directory):
         if os.path.splitext(file_name)[1] == '.plt':
             print(f'Plotting "{file_name}"')
@@ -1,6 +1,8 @@
 import math
 import typing
 
+import numpy as np
+
 
 class Point(typing.NamedTuple):
     x: typing.Union[int, float]
@@ -69,6 +71,59 @@ def bearing_min_max(a: Point, b: Point, disp: float) -> typing.Tuple[float, floa
     return min(bearings), max(bearings)
 
 
+def bearing_array(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Array version of bearing() where a and b are arrays of shape (..., 2) of x, y.
+    Returns the bearings in degrees, the shape is the broadcast of a and b less the last dimension."""
+    x_north = a[..., 1] - b[..., 1]
+    y_east = b[..., 0] - a[..., 0]
+    bearing_degrees = np.degrees(np.arctan2(y_east, x_north))
+    return np.where(bearing_degrees < 0, bearing_degrees + 360, bearing_degrees)
+
+
+def square_stencil(disp: float) -> np.ndarray:
+    """The four corners of a square of ±disp as a (4, 2) array, the displacements used by bearing_min_max()."""
+    return np.array([(dx, dy) for dx in (-disp, +disp) for dy in (-disp, +disp)], dtype=np.float64)
+
+
+def circle_stencil(disp: float, k: int) -> np.ndarray:
+    """k points equally spaced on a circle of radius disp as a (k, 2) array."""
+    theta = np.linspace(0.0, 2 * np.pi, k, endpoint=False)
+    return disp * np.column_stack((np.cos(theta), np.sin(theta)))
+
+
+# Maximum number of bearings computed at once by bearing_min_max_array(), this limits the memory used.
+BEARING_MIN_MAX_CHUNK_SIZE = 1 << 20
+
+
+def bearing_min_max_array(a: np.ndarray, b: np.ndarray, disp: float = None,
+                          stencil: np.ndarray = None) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Array version of bearing_min_max() where a and b are (n, 2) arrays of x, y.
+    Each point of a and b is displaced by every point of the stencil, a (k, 2) array, which defaults to
+    square_stencil(disp) so there are 16 combinations for each pair as bearing_min_max().
+    Returns the (n,) arrays of minimum and maximum bearings."""
+    if stencil is None:
+        if disp is None:
+            raise ValueError('One of disp or stencil is required.')
+        stencil = square_stencil(disp)
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 2)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 2)
+    stencil = np.asarray(stencil, dtype=np.float64).reshape(-1, 2)
+    if len(a) != len(b):
+        raise ValueError(f'Length of a {len(a)} must be the same as b {len(b)}')
+    b_min = np.empty(len(a))
+    b_max = np.empty(len(a))
+    chunk = max(1, BEARING_MIN_MAX_CHUNK_SIZE // len(stencil) ** 2)
+    for start in range(0, len(a), chunk):
+        stop = start + chunk
+        # Shape (n, k, 1, 2) and (n, 1, k, 2) broadcast to all combinations (n, k, k).
+        new_a = a[start:stop, np.newaxis, np.newaxis, :] + stencil[np.newaxis, :, np.newaxis, :]
+        new_b = b[start:stop, np.newaxis, np.newaxis, :] + stencil[np.newaxis, np.newaxis, :, :]
+        bearings = bearing_array(new_a, new_b).reshape(len(new_a), -1)
+        b_min[start:stop] = bearings.min(axis=1)
+        b_max[start:stop] = bearings.max(axis=1)
+    return b_min, b_max
+
+
 def translate_rotate(pt: Point, rotation_degrees: float, origin: Point=Point(0, 0)) -> Point:
     cos = math.cos(math.radians(rotation_degrees))
     sin = math.sin(math.radians(rotation_degrees))
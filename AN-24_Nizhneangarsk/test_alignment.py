@@ -0,0 +1,81 @@
+import math
+
+import numpy as np
+import pytest
+
+from cmn import alignment, frames
+
+
+def _activity(t: np.ndarray) -> np.ndarray:
+    """A smooth, non-periodic, multi-channel test signal."""
+    rng = np.random.default_rng(1234)
+    knots = np.arange(-5.0, 100.0, 0.5)
+    values = rng.normal(size=(len(knots), 3))
+    return np.column_stack([np.interp(t, knots, values[:, c]) for c in range(3)])
+
+
+@pytest.mark.parametrize(
+    'offset, drift',
+    (
+        (34.25, 0.0),
+        (10.0, 0.0),
+        (20.1, 0.004),
+        (20.1, -0.006),
+    )
+)
+def test_align_recovers_offset_and_drift(offset, drift):
+    rate_a, rate_b = 30, 25
+    signatures_a = _activity(np.arange(60 * rate_a) / rate_a)
+    t_b = np.arange(20 * rate_b) / rate_b
+    signatures_b = _activity(offset + (1 + drift) * t_b)
+    result = alignment.align(
+        signatures_a, rate_a, signatures_b, rate_b, drifts=np.linspace(-0.01, 0.01, 11)
+    )
+    assert math.isclose(result.offset, offset, abs_tol=1.0 / rate_a)
+    assert math.isclose(result.drift, drift, abs_tol=0.002 + 1e-9)
+    assert result.correlation > 0.9
+
+
+def test_cross_correlate_lag():
+    a = np.zeros((100, 1))
+    a[40, 0] = 1.0
+    b = np.zeros((20, 1))
+    b[5, 0] = 1.0
+    lags, correlation = alignment.cross_correlate(a, b)
+    assert lags[np.argmax(correlation)] == 35
+
+
+def test_resample():
+    values = np.column_stack((np.arange(31.0),))
+    result = alignment.resample(values, 30, 25)
+    assert result.shape == (26, 1)
+    assert np.allclose(result[:, 0], np.arange(26) * 30 / 25)
+
+
+def test_normalise_constant_column():
+    result = alignment.normalise(np.column_stack((np.ones(10), np.arange(10.0))))
+    assert np.all(result[:, 0] == 0.0)
+    assert math.isclose(np.std(result[:, 1]), 1.0)
+
+
+def test_frame_signatures():
+    frame_list = [np.full((4, 4), 10.0), np.full((4, 4), 250.0), np.full((4, 4), 250.0)]
+    result = frames.frame_signatures(iter(frame_list))
+    assert result.shape == (3, len(frames.SIGNATURE_COLUMNS))
+    assert list(result[:, 0]) == [10.0, 250.0, 250.0]
+    assert list(result[:, 1]) == [0.0, 240.0 ** 2, 0.0]
+    assert list(result[:, 2]) == [0.0, 1.0, 1.0]
+
+
+def test_frame_signatures_from_directory(tmp_path):
+    image = pytest.importorskip('PIL.Image')
+    for i, value in enumerate((0, 100, 255)):
+        image.fromarray(np.full((8, 8), value, dtype=np.uint8)).save(tmp_path / f'frame{i + 1:04d}.png')
+    (tmp_path / 'ffmpeg.txt').write_text('Not a frame')
+    assert len(frames.frame_paths(str(tmp_path))) == 3
+    result = frames.frame_signatures(frames.iter_frames(str(tmp_path)))
+    assert list(result[:, 0]) == [0.0, 100.0, 255.0]
+
+
+if __name__ == '__main__':
+    pytest.main()
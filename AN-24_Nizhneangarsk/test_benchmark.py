@@ -0,0 +1,113 @@
+"""
+Benchmarks of the numeric kernels, these need pytest-benchmark and are skipped if it is not installed.
+Each kernel is run at a realistic input size and that size scaled by 100.
+
+Save a baseline:
+PYTHONPATH=..:. pytest test_benchmark.py --benchmark-only --benchmark-sort=name --benchmark-save=benchmark_00
+
+Compare against the saved baseline, failing if any kernel is slower by more than the threshold:
+PYTHONPATH=..:. pytest test_benchmark.py --benchmark-only --benchmark-sort=name --benchmark-compare=0001 --benchmark-compare-fail=mean:10%
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import map_funcs
+from cmn import polynomial
+from data import tiles, video_a
+
+# Realistic input size, about a minute of video A.
+BENCHMARK_SIZE = 60 * video_a.FRAME_RATE
+BENCHMARK_SCALES = (1, 100)
+# Representative cubic factors, a + b * x + c * x**2 + d * x**3
+BENCHMARK_FACTORS = (10.0, 2.5, -0.25, 0.01)
+
+
+def _times(scale: int) -> np.ndarray:
+    return np.linspace(0.0, 60.0, BENCHMARK_SIZE * scale)
+
+
+def _points(scale: int) -> np.ndarray:
+    """Returns a (n, 2) array of pixel positions on a tile."""
+    rng = np.random.default_rng(0)
+    return rng.uniform(0, 2000, (BENCHMARK_SIZE * scale, 2))
+
+
+@pytest.mark.parametrize(
+    'function',
+    (
+        polynomial.polynomial,
+        polynomial.polynomial_differential,
+        polynomial.polynomial_integral,
+        polynomial.polynomial_3,
+        polynomial.polynomial_3_differential,
+        polynomial.polynomial_3_integral,
+    )
+)
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_polynomial_scalar(benchmark, function, scale):
+    values = list(_times(scale))
+
+    def run():
+        return [function(x, *BENCHMARK_FACTORS) for x in values]
+
+    result = benchmark(run)
+    assert len(result) == len(values)
+
+
+@pytest.mark.parametrize(
+    'function',
+    (
+        polynomial.polynomial,
+        polynomial.polynomial_differential,
+        polynomial.polynomial_integral,
+    )
+)
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_polynomial_array(benchmark, function, scale):
+    t = _times(scale)
+    result = benchmark(function, t, *BENCHMARK_FACTORS)
+    assert result.shape == t.shape
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_point_tile_to_tile(benchmark, scale):
+    points = [map_funcs.Point(x, y) for x, y in _points(scale)]
+    tile_pairs = list(itertools.product(tiles.TILE_FILES.keys(), repeat=2))
+
+    def run():
+        return [
+            map_funcs.point_tile_to_tile(tile_a, pt, tile_b, tiles.TILE_OFFSETS)
+            for pt, (tile_a, tile_b) in zip(points, itertools.cycle(tile_pairs))
+        ]
+
+    result = benchmark(run)
+    assert len(result) == len(points)
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_bearing_min_max(benchmark, scale):
+    points = _points(scale)
+    pairs = [
+        (map_funcs.Point(*a), map_funcs.Point(*b)) for a, b in zip(points, points[::-1])
+    ]
+
+    def run():
+        return [map_funcs.bearing_min_max(a, b, 5.0) for a, b in pairs]
+
+    result = benchmark(run)
+    assert len(result) == len(pairs)
+
+
+@pytest.mark.parametrize('scale', BENCHMARK_SCALES)
+def test_benchmark_bearing_min_max_array(benchmark, scale):
+    points = _points(scale)
+    b_min, b_max = benchmark(map_funcs.bearing_min_max_array, points, points[::-1], 5.0)
+    assert np.all(b_min <= b_max)
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+import pytest
+
+import map_funcs
+
+
+POINT_PAIRS = (
+    (map_funcs.Point(0, 0), map_funcs.Point(0, -100)),
+    (map_funcs.Point(0, 0), map_funcs.Point(100, 0)),
+    (map_funcs.Point(0, 0), map_funcs.Point(-100, 0)),
+    (map_funcs.Point(0, 0), map_funcs.Point(0, 100)),
+    (map_funcs.Point(1207, 749), map_funcs.Point(939, 1087)),
+    (map_funcs.Point(3374, 1444), map_funcs.Point(1640, 2008)),
+)
+
+
+@pytest.mark.parametrize('a, b', POINT_PAIRS)
+def test_bearing_array(a, b):
+    result = map_funcs.bearing_array(np.array([a], dtype=np.float64), np.array([b], dtype=np.float64))
+    assert result.shape == (1,)
+    assert math.isclose(result[0], map_funcs.bearing(a, b), abs_tol=1e-12)
+
+
+@pytest.mark.parametrize('a, b', POINT_PAIRS)
+@pytest.mark.parametrize('disp', (1.0, 5.0, 20.0))
+def test_bearing_min_max_array(a, b, disp):
+    b_min, b_max = map_funcs.bearing_min_max_array(np.array([a]), np.array([b]), disp)
+    expected = map_funcs.bearing_min_max(a, b, disp)
+    assert math.isclose(b_min[0], expected[0], abs_tol=1e-12)
+    assert math.isclose(b_max[0], expected[1], abs_tol=1e-12)
+
+
+def test_bearing_min_max_array_many():
+    a = np.array([pair[0] for pair in POINT_PAIRS] * 100, dtype=np.float64)
+    b = np.array([pair[1] for pair in POINT_PAIRS] * 100, dtype=np.float64)
+    b_min, b_max = map_funcs.bearing_min_max_array(a, b, 5.0)
+    assert b_min.shape == b_max.shape == (len(a),)
+    for i in range(len(POINT_PAIRS)):
+        assert np.all(b_min[i::len(POINT_PAIRS)] == b_min[i])
+        assert np.all(b_max[i::len(POINT_PAIRS)] == b_max[i])
+
+
+def test_bearing_min_max_array_chunked(monkeypatch):
+    a = np.array([pair[0] for pair in POINT_PAIRS], dtype=np.float64)
+    b = np.array([pair[1] for pair in POINT_PAIRS], dtype=np.float64)
+    expected = map_funcs.bearing_min_max_array(a, b, 5.0)
+    monkeypatch.setattr(map_funcs, 'BEARING_MIN_MAX_CHUNK_SIZE', 32)
+    result = map_funcs.bearing_min_max_array(a, b, 5.0)
+    assert np.all(result[0] == expected[0])
+    assert np.all(result[1] == expected[1])
+
+
+def test_bearing_min_max_array_circle_stencil():
+    a = np.array([[0.0, 0.0]])
+    b = np.array([[100.0, 0.0]])
+    # A circle is within the square so the envelope is narrower.
+    square = map_funcs.bearing_min_max_array(a, b, 5.0)
+    circle = map_funcs.bearing_min_max_array(a, b, stencil=map_funcs.circle_stencil(5.0, 32))
+    assert square[0][0] < circle[0][0] < circle[1][0] < square[1][0]
+
+
+def test_bearing_min_max_array_requires_disp_or_stencil():
+    with pytest.raises(ValueError):
+        map_funcs.bearing_min_max_array(np.zeros((1, 2)), np.ones((1, 2)))
+
+
+def test_circle_stencil():
+    result = map_funcs.circle_stencil(2.0, 8)
+    assert result.shape == (8, 2)
+    assert np.allclose(np.hypot(result[:, 0], result[:, 1]), 2.0)
+
+
+if __name__ == '__main__':
+    pytest.main()
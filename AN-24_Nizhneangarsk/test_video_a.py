@@ -0,0 +1,110 @@
+import math
+
+import numpy as np
+import pytest
+
+from data import video_a
+
+
+TILE_D_FITS = video_a.get_tile_d_fits()[1]
+SLAB_V_FITS = video_a.get_slab_v_fits()
+
+
+@pytest.mark.parametrize(
+    'frame',
+    # Frames either side of the tile/slab boundaries are excluded as the finite difference straddles the
+    # discontinuity in the blend of tile and slab data.
+    list(range(2, video_a.FRAME_THRESHOLD, 50))
+    + list(range(video_a.FRAME_THRESHOLD + 2, max(video_a.POSITIONS_FROM_TILES.keys())))
+    + list(range(max(video_a.POSITIONS_FROM_TILES.keys()) + 2, video_a.FRAME_LAST, 50))
+)
+def test_acceleration_analytic_matches_finite_difference(frame):
+    analytic = video_a._compute_acceleration(frame, TILE_D_FITS, SLAB_V_FITS)
+    finite_difference = video_a._compute_acceleration_finite_difference(frame, TILE_D_FITS, SLAB_V_FITS)
+    assert len(analytic) == 3
+    for a, f in zip(analytic, finite_difference):
+        assert math.isclose(a, f, abs_tol=1e-4)
+
+
+def test_acceleration_array_matches_scalar():
+    frames = np.arange(1, video_a.FRAME_LAST + 1)
+    result = video_a._compute_acceleration_array(frames, TILE_D_FITS, SLAB_V_FITS)
+    assert result.shape == (len(frames), 3)
+    for frame in (1, video_a.FRAME_THRESHOLD, video_a.FRAME_THRESHOLD + 1, 940, 941, video_a.FRAME_LAST):
+        assert tuple(result[frame - 1]) == video_a._compute_acceleration(frame, TILE_D_FITS, SLAB_V_FITS)
+
+
+@pytest.mark.parametrize('frame', (1, 500, video_a.FRAME_THRESHOLD, 900, 940, 1200, video_a.FRAME_LAST))
+def test_speed_array_matches_compute_speed(frame):
+    result = video_a._compute_speed_array(np.array([frame]), TILE_D_FITS, SLAB_V_FITS)
+    for a, b in zip(result[0], video_a._compute_speed(frame, TILE_D_FITS, SLAB_V_FITS)):
+        assert math.isclose(a, b, rel_tol=1e-12, abs_tol=1e-12)
+
+
+@pytest.mark.parametrize('frame', (500, 900, 1200))
+def test_jerk_array_matches_finite_difference_of_acceleration(frame):
+    frames = np.array([frame - 1, frame, frame + 1])
+    acceleration = video_a._compute_acceleration_array(frames, TILE_D_FITS, SLAB_V_FITS)
+    jerk = video_a._compute_jerk_array(frames, TILE_D_FITS, SLAB_V_FITS)
+    finite_difference = (acceleration[2] - acceleration[0]) / (2 / video_a.FRAME_RATE)
+    for a, b in zip(jerk[1], finite_difference):
+        assert math.isclose(a, b, abs_tol=1e-6)
+
+
+@pytest.mark.parametrize('frame', (1, 500, video_a.FRAME_THRESHOLD, 900, 940, 1200, video_a.FRAME_LAST))
+def test_distance_array_matches_compute_distance(frame):
+    result = video_a._compute_distance_array(np.array([frame]), TILE_D_FITS, SLAB_V_FITS)
+    for a, b in zip(result[0], video_a._compute_distance(frame, TILE_D_FITS, SLAB_V_FITS)):
+        assert math.isclose(a, b, rel_tol=1e-12, abs_tol=1e-12)
+
+
+def test_compute_impacts_array_matches_scalar():
+    frame = video_a.LAST_MEASURED_FRAME
+    result = video_a.compute_impacts_array(np.array([frame]), np.array([0.0]), np.array([0.0]))
+    assert result.v_terminal.shape == (3, 1, 1, 1)
+    d_data = video_a._compute_distance(frame, TILE_D_FITS, SLAB_V_FITS)
+    v_data = video_a._compute_speed(frame, TILE_D_FITS, SLAB_V_FITS)
+    dt = video_a.map_funcs.frames_to_dtime(frame, video_a.FRAME_FENCE_IMPACT, video_a.FRAME_RATE)
+    d_fence = video_a.data.tiles.BOUNDARY_FENCE_DISTANCE_FROM_THRESHOLD_M
+    for i, (d, v) in enumerate(zip(d_data, v_data)):
+        v_terminal, accln = video_a._terminal_speed_and_mean_acceleration(v, d, dt, d_fence)
+        assert math.isclose(result.v_terminal[i, 0, 0, 0], v_terminal, rel_tol=1e-9)
+        assert math.isclose(result.acceleration[i, 0, 0, 0], accln, rel_tol=1e-9)
+        try:
+            t_roots = video_a._quadratic_distance_solution(
+                d_fence, v_terminal, accln, video_a.data.tiles.FINAL_BUILDING_DISTANCE_FROM_THRESHOLD_M
+            )
+        except ValueError:
+            assert np.isnan(result.v_final[i, 0, 0, 0])
+        else:
+            assert math.isclose(result.v_final[i, 0, 0, 0], v_terminal - accln * t_roots[1], rel_tol=1e-9)
+
+
+def test_compute_impacts_array_shape_and_nan():
+    result = video_a.compute_impacts_array(
+        np.arange(1300, 1310), np.linspace(-10.0, 10.0, 5), np.linspace(-0.05, 0.05, 3)
+    )
+    for values in result:
+        assert values.shape == (3, 10, 5, 3)
+    # Non-physical terminal speeds are NaN, not negative.
+    assert not np.any(result.v_terminal < 0)
+    assert np.all(np.isnan(result.acceleration) == np.isnan(result.v_terminal))
+
+
+def test_dropped_combinations():
+    v_terminal = np.ones((3, 2, 1, 1))
+    acceleration = np.full((3, 2, 1, 1), -1.0)
+    acceleration[1, 0, 0, 0] = np.nan
+    v_terminal[2, 1, 0, 0] = np.nan
+    acceleration[2, 1, 0, 0] = np.nan
+    impacts = video_a.ImpactArrays(v_terminal, acceleration, acceleration, acceleration)
+    assert list(video_a.dropped_combinations(impacts)) == [0, 1, 0]
+
+
+def test_print_impact_distribution_reports_dropped(capsys):
+    video_a.print_impact_distribution(np.arange(1300, 1302), np.array([0.0]), np.array([0.0]))
+    assert 'with no deceleration' in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    pytest.main()
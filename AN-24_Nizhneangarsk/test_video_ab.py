@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from scipy.optimize import curve_fit
+
+from cmn import polynomial
+from data import video_ab, video_b
+
+
+def test_speed_differential_matrix_matches_curve_fit():
+    x_array = video_b.aircraft_x_array_from_bearings()
+    fit = curve_fit(polynomial.polynomial_3, x_array[:, 0], x_array[:, 1])[0]
+    expected = polynomial.polynomial_3_differential(x_array[:, 0], *fit)
+    result = video_ab._speed_differential_matrix(x_array[:, 0]) @ x_array[:, 1]
+    assert np.allclose(result, expected, atol=1e-6)
+
+
+def test_calibration_residuals_shape():
+    cal_data = video_ab.calibration_data()
+    px_per_degree = video_b.PX_PER_DEGREE + np.linspace(-1.0, 1.0, 7)
+    bearing = video_b.CAMERA_BEARING + np.linspace(-1.0, 1.0, 7)
+    result = video_ab.calibration_residuals(px_per_degree, bearing, cal_data, video_ab.CALIBRATION_METHODS)
+    assert result.shape == (len(cal_data.bearings_rows) + 2 * len(cal_data.limited_rows), 7)
+    # Each column is the same as evaluating that candidate alone.
+    single = video_ab.calibration_residuals(px_per_degree[3], bearing[3], cal_data, video_ab.CALIBRATION_METHODS)
+    assert np.allclose(result[:, 3], single[:, 0])
+
+
+def test_calibration_residuals_unknown_method():
+    with pytest.raises(ValueError):
+        video_ab.calibration_residuals(video_b.PX_PER_DEGREE, video_b.CAMERA_BEARING, methods=('focal_length',))
+
+
+def test_calibrate_camera_improves_on_adjusted():
+    cal_data = video_ab.calibration_data()
+    calibration = video_ab.calibrate_camera()
+    adjusted = video_ab.calibration_residuals(video_b.PX_PER_DEGREE, video_b.CAMERA_BEARING, cal_data)
+    assert calibration.rms_residual < np.sqrt(np.mean(adjusted ** 2))
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+import pytest
+
+import map_funcs
+from data import aircraft, google_earth, video_b
+
+
+def test_aircraft_pixels():
+    pixels = video_b.aircraft_pixels()
+    assert list(pixels.frame) == sorted(video_b.AIRCRAFT_ASPECTS.keys())
+    for i, frame in enumerate(pixels.frame):
+        extremities = video_b.AIRCRAFT_ASPECTS[frame]
+        assert pixels.mid_span_x[i] == map_funcs.mid_point(extremities.left_tip, extremities.right_tip).x
+        assert pixels.span[i] == map_funcs.distance_between_points(extremities.left_tip, extremities.right_tip)
+        assert pixels.tail_height[i] == map_funcs.distance_between_points(extremities.fin_gnd, extremities.fin_tip)
+
+
+def test_aircraft_x_arrays_shape():
+    pixels = video_b.aircraft_pixels()
+    result = video_b.aircraft_x_arrays(pixels)
+    for array in result:
+        assert array.shape == (len(pixels.frame), 4)
+        assert np.all(array[:, 0] == video_b.frame_to_time(pixels.frame))
+
+
+@pytest.mark.parametrize('frame', sorted(video_b.AIRCRAFT_ASPECTS.keys()))
+def test_aircraft_x_arrays_bearings_matches_scalar(frame):
+    pixels = video_b.aircraft_pixels()
+    row = list(pixels.frame).index(frame)
+    result = video_b.aircraft_x_arrays(pixels).bearings[row]
+    theta_deg = video_b.bearing_x_degrees(pixels.mid_span_x[row]) - google_earth.RUNWAY_HEADING_DEG
+    x = video_b.CAMERA_POSITION_XY.x - video_b.CAMERA_POSITION_XY.y * math.tan(math.radians(90 - theta_deg))
+    assert math.isclose(result[1], x, rel_tol=1e-12)
+
+
+@pytest.mark.parametrize('frame', sorted(video_b.AIRCRAFT_ASPECTS.keys()))
+def test_aircraft_x_arrays_tail_height_matches_scalar(frame):
+    pixels = video_b.aircraft_pixels()
+    row = list(pixels.frame).index(frame)
+    result = video_b.aircraft_x_arrays(pixels).tail_height[row]
+    for i, px_error in enumerate((0, -video_b.AIRCRAFT_ASPECTS_ERROR_PIXELS, video_b.AIRCRAFT_ASPECTS_ERROR_PIXELS)):
+        rng = video_b.range_to_target(pixels.tail_height[row] + px_error, aircraft.ANTONOV_AN_24_HEIGHT)
+        x, _bearing = video_b.x_bearing_from_range(rng)
+        assert math.isclose(result[i + 1], x, rel_tol=1e-12)
+
+
+def test_aircraft_x_array_frame_limits():
+    assert len(video_b.aircraft_x_array_from_bearings()) == len(video_b.AIRCRAFT_ASPECTS)
+    limited = [f for f in video_b.AIRCRAFT_ASPECTS if f <= video_b.AIRCRAFT_ASPECTS_SPAN_FRAME_LIMIT]
+    assert len(video_b.aircraft_x_array_from_span()) == len(limited)
+    assert len(video_b.aircraft_x_array_from_tail_height()) == len(limited)
+
+
+def test_camera_model_matches_module_constants():
+    camera = video_b.CameraModel.from_calibration()
+    assert camera.px_per_degree == video_b.PX_PER_DEGREE
+    assert camera.px_per_degree_error == video_b.PX_PER_DEGREE_ERROR
+    assert camera.bearing == video_b.CAMERA_BEARING
+    assert camera.bearing_error == video_b.CAMERA_BEARING_ERROR
+
+
+def test_camera_model_from_calibration_adjustments():
+    measured = video_b.CameraModel.from_calibration(0.0, 0.0)
+    adjusted = video_b.CameraModel.from_calibration()
+    assert math.isclose(adjusted.px_per_degree - measured.px_per_degree, video_b.PX_PER_DEGREE_ADJUSTMENT)
+    assert adjusted.px_per_degree_error == measured.px_per_degree_error
+
+
+def test_camera_model_replace():
+    camera = video_b.CAMERA_MODEL.replace(bearing=video_b.CAMERA_BEARING + 1.0)
+    assert camera.bearing == video_b.CAMERA_BEARING + 1.0
+    assert camera.px_per_degree == video_b.CAMERA_MODEL.px_per_degree
+    assert camera.bearing_x_degrees(0) == video_b.CAMERA_MODEL.bearing_x_degrees(0) + 1.0
+    # Original is unchanged.
+    assert video_b.CAMERA_MODEL.bearing == video_b.CAMERA_BEARING
+
+
+def test_camera_model_replace_unknown_raises():
+    with pytest.raises(ValueError):
+        video_b.CAMERA_MODEL.replace(focal_length=35.0)
+
+
+def test_aircraft_x_arrays_with_camera():
+    pixels = video_b.aircraft_pixels()
+    default = video_b.aircraft_x_arrays(pixels)
+    perturbed = video_b.aircraft_x_arrays(
+        pixels, video_b.CAMERA_MODEL.replace(px_per_degree=video_b.PX_PER_DEGREE + 1.0)
+    )
+    assert np.all(default.bearings[:, 0] == perturbed.bearings[:, 0])
+    assert not np.any(default.tail_height[:, 1] == perturbed.tail_height[:, 1])
+
+
+if __name__ == '__main__':
+    pytest.main()